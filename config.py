@@ -5,6 +5,30 @@ load_dotenv()
 
 # Telegram Bot
 BOT_TOKEN = os.getenv('BOT_TOKEN')
+# Адрес Bot API (свой сервер Bot API или тестовый стенд); по умолчанию - api.telegram.org
+BOT_API_BASE_URL = os.getenv('BOT_API_BASE_URL')
+
+# Режим получения обновлений: 'polling' или 'webhook'
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+# Публичный адрес, на который Telegram отправляет обновления (например https://bot.example.com)
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+# Секрет, который Telegram передаёт в заголовке X-Telegram-Bot-Api-Secret-Token (обязателен в режиме webhook)
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN')
+# Адрес встроенного HTTP-сервера
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+
+# Метрики в формате Prometheus (0 - сервер метрик выключен)
+METRICS_LISTEN = os.getenv('METRICS_LISTEN', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9090))
+
+# Запись входящих обновлений в JSONL для воспроизведения (пусто - запись выключена)
+UPDATE_RECORD_PATH = os.getenv('UPDATE_RECORD_PATH', '')
+UPDATE_RECORD_MAX_BYTES = int(os.getenv('UPDATE_RECORD_MAX_BYTES', 50 * 1024 * 1024))
+UPDATE_RECORD_BACKUPS = int(os.getenv('UPDATE_RECORD_BACKUPS', 5))
+# Соль для псевдонимов ID; без неё псевдонимы стабильны только в пределах одного запуска
+UPDATE_RECORD_SALT = os.getenv('UPDATE_RECORD_SALT')
 
 # Главные администраторы с полными правами
 SUPER_ADMIN_IDS = [7442002163, 7055682806]
@@ -17,11 +41,64 @@ ADMIN_IDS = SUPER_ADMIN_IDS + MODERATOR_IDS
 
 # База данных
 DATABASE_PATH = os.getenv('DATABASE_PATH', './database/tournament.db')
+# Количество потоков для запросов к БД (1 = все запросы выполняются последовательно)
+DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', '1'))
+
+# Настройки соединений SQLite
+DB_JOURNAL_MODE = os.getenv('DB_JOURNAL_MODE', 'WAL')
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '16384'))          # 16 МБ страничного кеша
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(64 * 1024 * 1024)))    # 64 МБ memory-mapped I/O
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '256'))
+# Запросы дольше порога пишутся в журнал медленных запросов (логгер database.slow_queries)
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '100'))
 
 # Настройки турнира
 MAX_MAIN_PARTICIPANTS = 16
 MAX_RESERVE_PARTICIPANTS = 2
 PAYMENT_TIMEOUT_MINUTES = 30
+# Повтор снятия просроченных заявок, если запуск не смог их снять (ошибка БД):
+# пауза удваивается от минимальной до максимальной
+EXPIRY_RETRY_MIN_SECONDS = 5
+EXPIRY_RETRY_MAX_SECONDS = 300
+
+# Параллельная обработка обновлений (обновления одного чата всегда идут по очереди)
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', 32))    # одновременно выполняемых обработчиков
+UPDATE_MAX_PENDING = int(os.getenv('UPDATE_MAX_PENDING', 1024))  # принятых в работу обновлений, включая ожидающие
+UPDATE_WAIT_WARN_SECONDS = 2.0                                   # предупреждать, если обновление ждало дольше
+
+# Как часто сохранять состояния диалогов и user_data в БД, секунд
+# (все изменения за интервал пишутся одной транзакцией; при остановке бота - сразу)
+PERSISTENCE_UPDATE_INTERVAL = float(os.getenv('PERSISTENCE_UPDATE_INTERVAL', 10))
+
+# Автоархивация: турнир уходит в архив через столько часов после начала
+# (у даты без времени начало - полночь, поэтому запас покрывает все дни турнира)
+TOURNAMENT_ARCHIVE_AFTER_HOURS = float(os.getenv('TOURNAMENT_ARCHIVE_AFTER_HOURS', 48))
+TOURNAMENT_ARCHIVE_CHECK_SECONDS = 3600  # перепроверять не реже, чем раз в столько секунд
+# Турнир, дату которого не удалось разобрать (starts_at пустой), уходит в архив
+# через столько дней после создания
+TOURNAMENT_ARCHIVE_UNDATED_AFTER_DAYS = float(os.getenv('TOURNAMENT_ARCHIVE_UNDATED_AFTER_DAYS', 30))
+# Пауза перед повтором, если запуск не смог заархивировать просроченные турниры (удваивается до максимума)
+TOURNAMENT_ARCHIVE_RETRY_MIN_SECONDS = 60
+TOURNAMENT_ARCHIVE_RETRY_MAX_SECONDS = 3600
+ARCHIVED_TOURNAMENTS_LIST_LIMIT = 20  # сколько последних архивных турниров показывать админу
+
+# Сколько минут карточка турнира у пользователя обновляется при изменениях
+TOURNAMENT_VIEW_TTL_MINUTES = 24 * 60
+
+# Сколько отрендеренных карточек турниров держать в памяти
+TOURNAMENT_CARD_CACHE_SIZE = 256
+
+# Кэш профилей пользователей (в том числе отрицательных результатов поиска)
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL_SECONDS = 300
+
+# Экспорт в Excel: строк за одно чтение из БД и объём файла, до которого он держится в памяти
+EXPORT_BATCH_SIZE = 1000
+EXPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+# Сколько фоновых выгрузок участников строится одновременно (остальные ждут в очереди)
+EXPORT_CONCURRENT_JOBS = 1
 
 # Логирование
 LOG_LEVEL = 'WARNING'
@@ -31,4 +108,14 @@ LOG_FILE = './logs/bot.log'
 MAX_PAIR_SLOTS = 8
 MAX_PAIR_RESERVE = 2
 
-SEND_NOTIFICATIONS = True
\ No newline at end of file
+SEND_NOTIFICATIONS = True
+
+# Массовые рассылки (лимиты Telegram: ~30 сообщений/сек на бота, ~1 сообщение/сек в чат)
+BROADCAST_GLOBAL_RATE = 25            # сообщений в секунду на весь бот
+BROADCAST_PER_CHAT_INTERVAL = 1.0     # секунд между сообщениями в один чат
+BROADCAST_CONCURRENCY = 20            # одновременных запросов к Bot API
+BROADCAST_MAX_RETRIES = 3             # повторов при сетевых ошибках
+BROADCAST_RETRY_BACKOFF = 1.0         # начальная задержка повтора, секунд
+BROADCAST_PROGRESS_INTERVAL = 5       # как часто обновлять прогресс у админа, секунд
+# Получают ли анонс турнира с ограничением по уровню игроки без уровня
+BROADCAST_INCLUDE_UNLEVELED = os.getenv('BROADCAST_INCLUDE_UNLEVELED', '1') == '1'
\ No newline at end of file
@@ -1,13 +1,79 @@
 import sqlite3
 import logging
-from config import DATABASE_PATH
+import asyncio
+import contextlib
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    DATABASE_PATH, DB_EXECUTOR_WORKERS, DB_JOURNAL_MODE, DB_SYNCHRONOUS,
+    DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_BUSY_TIMEOUT_MS, DB_STATEMENT_CACHE_SIZE,
+    DB_SLOW_QUERY_MS
+)
 import os
+from database.migrations import run_migrations
+from utils.metrics import db_executor_wait, db_query_duration, db_slow_queries, statement_label
 
 logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('database.slow_queries')
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Курсор, замеряющий время execute/executemany для метрик и журнала медленных запросов
+
+    Для SELECT замеряется выполнение до первой строки результата - fetch не учитывается.
+    """
+    
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - started)
+    
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - started)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Соединение, все курсоры которого (в том числе conn.execute) - TimedCursor"""
+    
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+    
+    # Встроенные conn.execute/executemany создают обычный курсор в обход cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _record_query(sql: str, elapsed: float):
+    label = statement_label(sql)
+    db_query_duration.observe(elapsed, label)
+    
+    if elapsed * 1000 >= DB_SLOW_QUERY_MS:
+        db_slow_queries.inc(label)
+        slow_query_logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(sql.split())[:500]}")
 
 class DatabaseConnection:
     def __init__(self):
         self.db_path = DATABASE_PATH
+        # Отдельный пул потоков для запросов к БД, чтобы sqlite3 не блокировал event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=DB_EXECUTOR_WORKERS,
+            thread_name_prefix="db"
+        )
+        # Пул долгоживущих соединений: одно соединение на поток
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
         self._ensure_db_directory()
         self._init_database()
     
@@ -20,7 +86,7 @@ class DatabaseConnection:
     def _init_database(self):
         """Инициализация БД с базовой таблицей"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.get_connection() as conn:
                 # Таблица пользователей
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS users (
@@ -76,63 +142,149 @@ class DatabaseConnection:
     
     def _migrate_database(self, conn):
         """Миграции базы данных"""
-        cursor = conn.cursor()
-        
         try:
             logger.info("Checking for database migrations...")
             
-            # ========================================
-            # МИГРАЦИЯ 1: Добавление player_level в users
-            # ========================================
-            cursor.execute("PRAGMA table_info(users)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'player_level' not in columns:
-                logger.info("Migration: Adding player_level columns to users table")
-                cursor.execute("ALTER TABLE users ADD COLUMN player_level TEXT DEFAULT NULL")
-                cursor.execute("ALTER TABLE users ADD COLUMN player_level_updated_at TIMESTAMP DEFAULT NULL")
-                cursor.execute("ALTER TABLE users ADD COLUMN player_level_updated_by INTEGER DEFAULT NULL")
-                logger.info("✅ Migration complete: player_level columns added to users")
-            else:
-                logger.info("⏭️ Migration skipped: player_level already exists in users")
-            
-            # ========================================
-            # МИГРАЦИЯ 2: Добавление ограничений по уровню в tournaments
-            # ========================================
-            cursor.execute("PRAGMA table_info(tournaments)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'min_level' not in columns:
-                logger.info("Migration: Adding level restriction columns to tournaments table")
-                cursor.execute("ALTER TABLE tournaments ADD COLUMN min_level TEXT DEFAULT NULL")
-                cursor.execute("ALTER TABLE tournaments ADD COLUMN max_level TEXT DEFAULT NULL")
-                cursor.execute("ALTER TABLE tournaments ADD COLUMN level_restriction TEXT DEFAULT 'open'")
-                logger.info("✅ Migration complete: level restriction columns added to tournaments")
-            else:
-                logger.info("⏭️ Migration skipped: level restrictions already exist in tournaments")
-            
-            # ========================================
-            # МИГРАЦИЯ 3: Добавление tournament_type в tournaments (если не было)
-            # ========================================
-            cursor.execute("PRAGMA table_info(tournaments)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            if 'tournament_type' not in columns:
-                logger.info("Migration: Adding tournament_type column to tournaments table")
-                cursor.execute("ALTER TABLE tournaments ADD COLUMN tournament_type TEXT DEFAULT 'single'")
-                logger.info("✅ Migration complete: tournament_type column added to tournaments")
-            else:
-                logger.info("⏭️ Migration skipped: tournament_type already exists in tournaments")
-            
-            logger.info("All migrations checked and applied successfully")
+            version = run_migrations(conn)
+            logger.info(f"All migrations checked and applied successfully (schema version {version})")
             
         except Exception as e:
             logger.error(f"Migration error: {e}")
             raise
     
+    def _open_connection(self):
+        """Открыть новое соединение и применить настройки производительности"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=DB_STATEMENT_CACHE_SIZE,
+            # Запросы идут только из потока-владельца; проверка потока отключена,
+            # чтобы close_all мог закрыть соединение из другого потока при shutdown
+            check_same_thread=False,
+            factory=TimedConnection
+        )
+        conn.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+        conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+        # Отрицательное значение cache_size задаётся в килобайтах
+        conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+        conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+        return conn
+    
+    def _create_connection(self):
+        """Открыть соединение для текущего потока и добавить его в пул"""
+        conn = self._open_connection()
+        
+        with self._connections_lock:
+            self._connections.append(conn)
+        
+        logger.info(f"Opened database connection for thread {threading.current_thread().name}")
+        return conn
+    
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        """Проверить, что соединение не закрыто"""
+        try:
+            conn.total_changes
+            return True
+        except sqlite3.ProgrammingError:
+            return False
+    
     def get_connection(self):
-        """Получить соединение с БД"""
-        return sqlite3.connect(self.db_path)
+        """Получить соединение с БД (переиспользуется в рамках потока)"""
+        conn = getattr(self._local, 'conn', None)
+        
+        if conn is None or not self._is_alive(conn):
+            if conn is not None:
+                with self._connections_lock:
+                    if conn in self._connections:
+                        self._connections.remove(conn)
+            conn = self._create_connection()
+            self._local.conn = conn
+        
+        return conn
+    
+    @contextlib.contextmanager
+    def dedicated_connection(self):
+        """
+        Отдельное соединение на время одной долгой операции (например, выгрузки)
+        
+        Не попадает в пул и закрывается при выходе из блока, поэтому долгое
+        чтение можно выполнять вне потоков БД, не занимая их.
+        """
+        conn = self._open_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def check_health(self) -> bool:
+        """
+        Проверить, что БД отвечает на запросы, через соединение текущего потока
+        
+        Соединения других потоков не трогаются (одно из них может быть посреди
+        транзакции). Вызывать через db.run, чтобы проверялся поток БД.
+        """
+        try:
+            self.get_connection().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Database health check failed: {e}")
+            return False
+    
+    def close_all(self):
+        """Закрыть все соединения пула"""
+        with self._connections_lock:
+            connections = self._connections
+            self._connections = []
+        
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"Error closing database connection: {e}")
+        
+        logger.info(f"Closed {len(connections)} database connections")
+    
+    async def run(self, func, *args, **kwargs):
+        """Выполнить блокирующую функцию работы с БД в потоке БД и дождаться результата"""
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        
+        def call():
+            # Сколько запрос ждал свободного потока БД (при одном потоке - очередь к БД)
+            db_executor_wait.observe(time.perf_counter() - submitted)
+            return func(*args, **kwargs)
+        
+        return await loop.run_in_executor(self._executor, call)
+    
+    def shutdown(self):
+        """Остановить пул потоков БД, дождавшись выполнения запросов в очереди, и закрыть соединения"""
+        self._executor.shutdown(wait=True)
+        self.close_all()
+
+
+class AsyncService:
+    """Awaitable-обёртка над сервисом со статическими методами
+    
+    Каждый вызов метода выполняется в потоке БД через db.run:
+        AsyncTournamentService = AsyncService(TournamentService)
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
+    """
+    
+    def __init__(self, service):
+        self._service = service
+    
+    def __getattr__(self, name):
+        func = getattr(self._service, name)
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await db.run(func, *args, **kwargs)
+        
+        # Кешируем обёртку, чтобы не создавать её на каждый вызов
+        setattr(self, name, wrapper)
+        return wrapper
 
 # Создаем глобальный экземпляр
 db = DatabaseConnection()
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""Добавление player_level в users"""
+from database.migrations import column_exists
+
+
+def upgrade(conn):
+    # На базах, созданных до версионных миграций, колонка уже может быть
+    if column_exists(conn, 'users', 'player_level'):
+        return
+
+    conn.execute("ALTER TABLE users ADD COLUMN player_level TEXT DEFAULT NULL")
+    conn.execute("ALTER TABLE users ADD COLUMN player_level_updated_at TIMESTAMP DEFAULT NULL")
+    conn.execute("ALTER TABLE users ADD COLUMN player_level_updated_by INTEGER DEFAULT NULL")
@@ -0,0 +1,11 @@
+"""Добавление ограничений по уровню в tournaments"""
+from database.migrations import column_exists
+
+
+def upgrade(conn):
+    if column_exists(conn, 'tournaments', 'min_level'):
+        return
+
+    conn.execute("ALTER TABLE tournaments ADD COLUMN min_level TEXT DEFAULT NULL")
+    conn.execute("ALTER TABLE tournaments ADD COLUMN max_level TEXT DEFAULT NULL")
+    conn.execute("ALTER TABLE tournaments ADD COLUMN level_restriction TEXT DEFAULT 'open'")
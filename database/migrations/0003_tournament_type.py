@@ -0,0 +1,9 @@
+"""Добавление tournament_type в tournaments"""
+from database.migrations import column_exists
+
+
+def upgrade(conn):
+    if column_exists(conn, 'tournaments', 'tournament_type'):
+        return
+
+    conn.execute("ALTER TABLE tournaments ADD COLUMN tournament_type TEXT DEFAULT 'single'")
@@ -0,0 +1,9 @@
+"""Отметка пользователей, заблокировавших бота"""
+from database.migrations import column_exists
+
+
+def upgrade(conn):
+    if column_exists(conn, 'users', 'is_blocked'):
+        return
+
+    conn.execute("ALTER TABLE users ADD COLUMN is_blocked INTEGER DEFAULT 0")
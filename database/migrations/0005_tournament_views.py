@@ -0,0 +1,22 @@
+"""Сообщения с карточками турниров, открытые пользователями"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tournament_views (
+            user_id INTEGER NOT NULL,
+            tournament_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            viewed_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (user_id, tournament_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tournament_views_tournament
+        ON tournament_views (tournament_id, viewed_at)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tournament_views_message
+        ON tournament_views (chat_id, message_id)
+    ''')
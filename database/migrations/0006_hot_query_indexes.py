@@ -0,0 +1,19 @@
+"""Покрывающие индексы для частых запросов"""
+
+
+def upgrade(conn):
+    # Счётчики мест и списки участников турнира: WHERE tournament_id = ? AND status ...
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_participations_tournament_status
+        ON participations (tournament_id, status, registration_time)
+    ''')
+    # Поиск просроченных заявок: WHERE status = 'pending' AND payment_deadline < ?
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_participations_status_deadline
+        ON participations (status, payment_deadline)
+    ''')
+    # Список активных турниров: WHERE status = 'active' ORDER BY date
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tournaments_status_date
+        ON tournaments (status, date)
+    ''')
@@ -0,0 +1,20 @@
+"""Состояния диалогов и user_data бота, переживающие перезапуск"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bot_user_data (
+            user_id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bot_conversations (
+            name TEXT NOT NULL,
+            conversation_key TEXT NOT NULL,
+            state TEXT NOT NULL,
+            updated_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (name, conversation_key)
+        )
+    ''')
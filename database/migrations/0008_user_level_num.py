@@ -0,0 +1,26 @@
+"""Числовой уровень игрока в users для выбора аудитории рассылок по уровню"""
+from database.migrations import column_exists
+
+# Коды уровней и их числовые значения на момент миграции. Зафиксированы здесь, чтобы
+# дальнейшие изменения справочника levels не меняли результат миграции на новой базе
+LEVEL_NUMBERS = {
+    '1.0': 1.0, '1.5': 1.5, '2.0': 2.0, '2.5': 2.5, '3.0': 3.0, '3.5': 3.5, '4.0': 4.0,
+    '4.5': 4.5, '5.0': 5.0, '5.5': 5.5, '6.0': 6.0, '6.5': 6.5, '7.0': 7.0, '7.5': 7.5
+}
+
+
+def upgrade(conn):
+    if not column_exists(conn, 'users', 'player_level_num'):
+        conn.execute("ALTER TABLE users ADD COLUMN player_level_num REAL DEFAULT NULL")
+
+    # Коды не из справочника остаются NULL
+    conn.executemany(
+        "UPDATE users SET player_level_num = ? WHERE player_level = ?",
+        [(value, code) for code, value in LEVEL_NUMBERS.items()]
+    )
+    # Получатели рассылки: WHERE telegram_id > 0 AND is_blocked = 0 AND player_level_num BETWEEN ? AND ?
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_level_num
+        ON users (player_level_num, telegram_id)
+        WHERE telegram_id > 0 AND is_blocked = 0
+    ''')
@@ -0,0 +1,30 @@
+"""Типизированная дата начала турнира tournaments.starts_at вместо сортировки по тексту date"""
+from datetime import datetime
+from database.migrations import column_exists
+from utils.tournament_dates import parse_tournament_start, to_starts_at
+
+
+def upgrade(conn):
+    if not column_exists(conn, 'tournaments', 'starts_at'):
+        conn.execute("ALTER TABLE tournaments ADD COLUMN starts_at TEXT DEFAULT NULL")
+
+    # Год в тексте обычно не указан - берём ближайший к моменту создания турнира
+    rows = conn.execute("SELECT id, date, created_at FROM tournaments WHERE starts_at IS NULL").fetchall()
+    updates = []
+    for tournament_id, date, created_at in rows:
+        try:
+            reference = datetime.fromisoformat(created_at) if created_at else None
+        except (TypeError, ValueError):
+            reference = None
+        starts_at = to_starts_at(parse_tournament_start(date, reference))
+        if starts_at:
+            updates.append((starts_at, tournament_id))
+    conn.executemany("UPDATE tournaments SET starts_at = ? WHERE id = ?", updates)
+
+    # Списки турниров: WHERE status = ? ORDER BY starts_at, выборки по диапазону дат
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tournaments_status_starts_at
+        ON tournaments (status, starts_at)
+    ''')
+    # Сортировка по тексту date больше не используется
+    conn.execute("DROP INDEX IF EXISTS idx_tournaments_status_date")
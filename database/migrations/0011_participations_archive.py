@@ -0,0 +1,44 @@
+"""Архив участий: записи завершённых турниров уходят из горячей таблицы participations"""
+from datetime import datetime
+
+
+def upgrade(conn):
+    # id сохраняется из participations (AUTOINCREMENT не выдаёт их повторно)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS participations_archive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            tournament_id INTEGER NOT NULL,
+            status TEXT,
+            registration_time TIMESTAMP,
+            payment_deadline TIMESTAMP,
+            archived_at TIMESTAMP NOT NULL
+        )
+    ''')
+    # Состав турнира из архива и история игрока
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_participations_archive_tournament
+        ON participations_archive (tournament_id, registration_time)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_participations_archive_user
+        ON participations_archive (user_id)
+    ''')
+
+    # Турниры, заархивированные раньше, переносим сразу
+    conn.execute('''
+        INSERT INTO participations_archive
+            (id, user_id, tournament_id, status, registration_time, payment_deadline, archived_at)
+        SELECT p.id, p.user_id, p.tournament_id, p.status, p.registration_time, p.payment_deadline, ?
+        FROM participations p
+        JOIN tournaments t ON p.tournament_id = t.id
+        WHERE t.status = 'archived'
+    ''', (datetime.now(),))
+    conn.execute('''
+        DELETE FROM participations
+        WHERE tournament_id IN (SELECT id FROM tournaments WHERE status = 'archived')
+    ''')
+    conn.execute('''
+        DELETE FROM tournament_views
+        WHERE tournament_id IN (SELECT id FROM tournaments WHERE status = 'archived')
+    ''')
@@ -0,0 +1,17 @@
+"""Пересчёт tournaments.starts_at для дат вида 2025-11-05: 0010 разбирала их как 11 мая"""
+from datetime import datetime
+from utils.tournament_dates import ISO_DATE, parse_tournament_start, to_starts_at
+
+
+def upgrade(conn):
+    rows = conn.execute("SELECT id, date, created_at FROM tournaments").fetchall()
+    updates = []
+    for tournament_id, date, created_at in rows:
+        if not date or not ISO_DATE.search(date):
+            continue
+        try:
+            reference = datetime.fromisoformat(created_at) if created_at else None
+        except (TypeError, ValueError):
+            reference = None
+        updates.append((to_starts_at(parse_tournament_start(date, reference)), tournament_id))
+    conn.executemany("UPDATE tournaments SET starts_at = ? WHERE id = ?", updates)
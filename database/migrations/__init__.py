@@ -0,0 +1,91 @@
+import importlib
+import logging
+import pkgutil
+from datetime import datetime
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Миграции лежат в этом пакете в модулях вида NNNN_описание.py.
+# Каждый модуль определяет функцию upgrade(conn), номер версии берётся из имени файла.
+# Применённые версии хранятся в таблице schema_version, каждая миграция
+# выполняется в отдельной транзакции ровно один раз.
+
+
+def column_exists(conn, table: str, column: str) -> bool:
+    """Проверить, есть ли колонка в таблице"""
+    cursor = conn.execute(f"PRAGMA table_info({table})")
+    return column in [row[1] for row in cursor.fetchall()]
+
+
+def discover_migrations() -> List[Tuple[int, str, object]]:
+    """Найти модули миграций и отсортировать их по номеру версии"""
+    migrations = []
+
+    for module_info in pkgutil.iter_modules(__path__):
+        prefix, _, _ = module_info.name.partition('_')
+        if not prefix.isdigit():
+            continue
+
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        migrations.append((int(prefix), module_info.name, module))
+
+    migrations.sort(key=lambda migration: migration[0])
+
+    versions = [migration[0] for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+
+    return migrations
+
+
+def get_schema_version(conn) -> int:
+    """Текущая версия схемы (0 - миграции ещё не применялись)"""
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def run_migrations(conn) -> int:
+    """
+    Применить все миграции новее текущей версии схемы
+
+    Args:
+        conn: соединение с БД
+
+    Returns:
+        int: версия схемы после применения миграций
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    ''')
+    conn.commit()
+
+    current_version = get_schema_version(conn)
+    logger.info(f"Database schema version: {current_version}")
+
+    for version, name, module in discover_migrations():
+        if version <= current_version:
+            continue
+
+        logger.info(f"Migration {name}: applying")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            module.upgrade(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now())
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Migration {name} failed: {e}")
+            raise
+
+        current_version = version
+        logger.info(f"✅ Migration {name} applied")
+
+    return current_version
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from telegram.ext import BasePersistence, PersistenceInput
+from database.connection import db
+from config import PERSISTENCE_UPDATE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Сериализованный user_data пользователя без данных - такие записи в БД не храним
+EMPTY_USER_DATA = '{}'
+
+
+class SQLitePersistence(BasePersistence):
+    """Хранение состояний ConversationHandler-ов и context.user_data в SQLite бота
+
+    Application передаёт изменения раз в update_interval секунд. Они копятся в памяти
+    и записываются одной транзакцией; неизменившийся user_data повторно не пишется.
+    chat_data, bot_data и callback_data бот не использует и не сохраняет.
+    """
+
+    def __init__(self, update_interval: float = PERSISTENCE_UPDATE_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        # Ожидающие записи: None означает удаление
+        self._pending_user_data: Dict[int, Optional[str]] = {}
+        self._pending_conversations: Dict[Tuple[str, str], Optional[str]] = {}
+        # Что уже лежит в БД (или поставлено в очередь), чтобы не писать одно и то же
+        self._stored_user_data: Dict[int, str] = {}
+        self._write_task: Optional[asyncio.Task] = None
+        self._stats = {'batches': 0, 'rows': 0, 'skipped': 0, 'errors': 0}
+
+    # ===============================
+    # Загрузка при старте
+    # ===============================
+
+    async def get_user_data(self) -> Dict[int, Dict]:
+        rows = await db.run(self._load_user_data)
+        user_data = {}
+        for user_id, data in rows:
+            try:
+                user_data[user_id] = json.loads(data)
+                self._stored_user_data[user_id] = data
+            except ValueError as e:
+                logger.error(f"Error loading user_data for {user_id}: {e}")
+        return user_data
+
+    async def get_conversations(self, name: str) -> Dict[Tuple, object]:
+        rows = await db.run(self._load_conversations, name)
+        conversations = {}
+        for key, state in rows:
+            try:
+                conversations[tuple(json.loads(key))] = json.loads(state)
+            except ValueError as e:
+                logger.error(f"Error loading conversation {name} {key}: {e}")
+        return conversations
+
+    async def get_chat_data(self) -> Dict[int, Dict]:
+        return {}
+
+    async def get_bot_data(self) -> Dict:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    # ===============================
+    # Изменения от Application
+    # ===============================
+
+    async def update_user_data(self, user_id: int, data: Dict) -> None:
+        try:
+            serialized = json.dumps(data, ensure_ascii=False, sort_keys=True)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Error serializing user_data for {user_id}: {e}")
+            return
+
+        if self._stored_user_data.get(user_id, EMPTY_USER_DATA) == serialized:
+            self._stats['skipped'] += 1
+            return
+
+        if serialized == EMPTY_USER_DATA:
+            self._stored_user_data.pop(user_id, None)
+            self._pending_user_data[user_id] = None
+        else:
+            self._stored_user_data[user_id] = serialized
+            self._pending_user_data[user_id] = serialized
+        self._schedule_write()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._stored_user_data.pop(user_id, None)
+        self._pending_user_data[user_id] = None
+        self._schedule_write()
+
+    async def update_conversation(self, name: str, key: Tuple,
+                                  new_state: Optional[object]) -> None:
+        try:
+            state = json.dumps(new_state) if new_state is not None else None
+        except (TypeError, ValueError) as e:
+            logger.error(f"Error serializing state of conversation {name} {key}: {e}")
+            return
+
+        self._pending_conversations[(name, json.dumps(list(key)))] = state
+        self._schedule_write()
+
+    async def update_chat_data(self, chat_id: int, data: Dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: Dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: Dict) -> None:
+        pass
+
+    async def flush(self) -> None:
+        """Дописать всё накопленное (вызывается при остановке бота)"""
+        self._schedule_write()
+        if self._write_task:
+            await self._write_task
+
+    def stats(self) -> Dict:
+        """Статистика записи: транзакций, записанных строк, пропущенных неизменившихся user_data"""
+        return dict(self._stats)
+
+    # ===============================
+    # Запись в БД
+    # ===============================
+
+    def _schedule_write(self):
+        """Запустить запись, если она ещё не запущена
+
+        Application вызывает update_* пачкой через asyncio.gather, поэтому задача записи
+        выполняется после них и забирает все изменения прохода сразу.
+        """
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self):
+        while self._pending_user_data or self._pending_conversations:
+            user_data, self._pending_user_data = self._pending_user_data, {}
+            conversations, self._pending_conversations = self._pending_conversations, {}
+
+            if not await db.run(self._write_batch, user_data, conversations):
+                # Возвращаем в очередь то, что не успели перезаписать новые изменения
+                for user_id, data in user_data.items():
+                    self._pending_user_data.setdefault(user_id, data)
+                for key, state in conversations.items():
+                    self._pending_conversations.setdefault(key, state)
+                self._stats['errors'] += 1
+                return
+
+            self._stats['batches'] += 1
+            self._stats['rows'] += len(user_data) + len(conversations)
+
+    @staticmethod
+    def _write_batch(user_data: Dict[int, Optional[str]],
+                     conversations: Dict[Tuple[str, str], Optional[str]]) -> bool:
+        """Записать накопленные изменения одной транзакцией"""
+        try:
+            now = datetime.now()
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO bot_user_data (user_id, data, updated_at)
+                    VALUES (?, ?, ?)
+                """, [(user_id, data, now) for user_id, data in user_data.items() if data is not None])
+                cursor.executemany("""
+                    DELETE FROM bot_user_data WHERE user_id = ?
+                """, [(user_id,) for user_id, data in user_data.items() if data is None])
+
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO bot_conversations (name, conversation_key, state, updated_at)
+                    VALUES (?, ?, ?, ?)
+                """, [(name, key, state, now) for (name, key), state in conversations.items() if state is not None])
+                cursor.executemany("""
+                    DELETE FROM bot_conversations WHERE name = ? AND conversation_key = ?
+                """, [(name, key) for (name, key), state in conversations.items() if state is None])
+
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error writing bot persistence: {e}")
+            return False
+
+    @staticmethod
+    def _load_user_data():
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT user_id, data FROM bot_user_data")
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error loading bot user_data: {e}")
+            return []
+
+    @staticmethod
+    def _load_conversations(name: str):
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT conversation_key, state FROM bot_conversations WHERE name = ?
+                """, (name,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error loading conversations {name}: {e}")
+            return []
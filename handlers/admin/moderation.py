@@ -1,10 +1,12 @@
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 import logging
-from services.tournament_service import TournamentService
-from services.participation_service import ParticipationService
+from services.tournament_service import AsyncTournamentService
+from services.participation_service import AsyncParticipationService
+from services.sync_service import SyncService
 from handlers.admin.panel import is_admin, is_super_admin, is_moderator
 from utils.admin_keyboards import get_admin_panel_keyboard, get_moderator_panel_keyboard
+from utils.callback_router import encode_callback
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +21,7 @@ async def show_moderation_menu(update: Update, context: ContextTypes.DEFAULT_TYP
             await query.edit_message_text("Нет прав доступа")
             return
         
-        tournaments = TournamentService.get_all_tournaments()
+        tournaments = await AsyncTournamentService.get_active_tournaments_with_counts()
         
         if not tournaments:
             # ИСПРАВЛЕНИЕ: Возвращаем правильную клавиатуру в зависимости от роли
@@ -36,14 +38,14 @@ async def show_moderation_menu(update: Update, context: ContextTypes.DEFAULT_TYP
         keyboard = []
         
         for tournament in tournaments:
-            pending_count = len(ParticipationService.get_pending_participations(tournament['id']))
+            pending_count = tournament['counts']['pending']
             
             text += f"{tournament['name']} - {pending_count} заявок\n"
             
             keyboard.append([
                 InlineKeyboardButton(
                     f"{tournament['name']} ({pending_count})", 
-                    callback_data=f"moderate_{tournament['id']}"
+                    callback_data=encode_callback("moderate", tournament['id'])
                 )
             ])
         
@@ -67,9 +69,9 @@ async def show_tournament_moderation(update: Update, context: ContextTypes.DEFAU
             await query.edit_message_text("Нет прав доступа")
             return
         
-        tournament_id = int(query.data.split("_")[1])
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
-        pending_participants = ParticipationService.get_pending_participations(tournament_id)
+        tournament_id = context.args[0]
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
+        pending_participants = await AsyncParticipationService.get_pending_participations(tournament_id)
         
         if not pending_participants:
             keyboard = [[InlineKeyboardButton("← К списку турниров", callback_data="admin_moderation")]]
@@ -104,7 +106,7 @@ async def show_tournament_moderation(update: Update, context: ContextTypes.DEFAU
             keyboard.append([
                 InlineKeyboardButton(
                     f"{participant['name']} ({time_text})",
-                    callback_data=f"participant_{participant['participation_id']}"
+                    callback_data=encode_callback("participant", participant['participation_id'])
                 )
             ])
         
@@ -128,36 +130,24 @@ async def show_participant_moderation(update: Update, context: ContextTypes.DEFA
             await query.edit_message_text("Нет прав доступа")
             return
         
-        participation_id = int(query.data.split("_")[1])
+        participation_id = context.args[0]
         
         # Получаем данные участника
-        from database.connection import db
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT p.id, u.full_name, u.phone_number, p.registration_time, 
-                       p.payment_deadline, t.name as tournament_name, p.tournament_id
-                FROM participations p
-                JOIN users u ON p.user_id = u.telegram_id
-                JOIN tournaments t ON p.tournament_id = t.id
-                WHERE p.id = ?
-            """, (participation_id,))
-            
-            result = cursor.fetchone()
-            
-            if not result:
-                await query.edit_message_text("Участник не найден")
-                return
+        details = await AsyncParticipationService.get_participation_details(participation_id)
+        
+        if not details:
+            await query.edit_message_text("Участник не найден")
+            return
         
         from datetime import datetime
-        deadline = datetime.fromisoformat(result[4])
+        deadline = datetime.fromisoformat(details['payment_deadline'])
         remaining = deadline - datetime.now()
         remaining_minutes = int(remaining.total_seconds() / 60)
         
-        text = f"Участник: {result[1]}\n"
-        text += f"Телефон: {result[2]}\n"
-        text += f"Турнир: {result[5]}\n"
-        text += f"Время подачи: {result[3][:16]}\n"
+        text = f"Участник: {details['name']}\n"
+        text += f"Телефон: {details['phone']}\n"
+        text += f"Турнир: {details['tournament_name']}\n"
+        text += f"Время подачи: {details['registration_time'][:16]}\n"
         
         if remaining_minutes <= 0:
             text += f"Статус: Просрочено ({abs(remaining_minutes)} мин назад)\n"
@@ -166,10 +156,10 @@ async def show_participant_moderation(update: Update, context: ContextTypes.DEFA
         
         keyboard = [
             [
-                InlineKeyboardButton("✅ Одобрить", callback_data=f"approve_{participation_id}"),
-                InlineKeyboardButton("❌ Отклонить", callback_data=f"reject_{participation_id}")
+                InlineKeyboardButton("✅ Одобрить", callback_data=encode_callback("approve", participation_id)),
+                InlineKeyboardButton("❌ Отклонить", callback_data=encode_callback("reject", participation_id))
             ],
-            [InlineKeyboardButton("← Назад к турниру", callback_data=f"moderate_{result[6]}")]
+            [InlineKeyboardButton("← Назад к турниру", callback_data=encode_callback("moderate", details['tournament_id']))]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -190,49 +180,37 @@ async def approve_participant(update: Update, context: ContextTypes.DEFAULT_TYPE
             await query.edit_message_text("Нет прав доступа")
             return
         
-        participation_id = int(query.data.split("_")[1])
+        participation_id = context.args[0]
         
         # Получаем данные перед одобрением для уведомления
-        from database.connection import db
         from config import MAX_MAIN_PARTICIPANTS
         
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT p.user_id, t.name, t.id
-                FROM participations p
-                JOIN tournaments t ON p.tournament_id = t.id
-                WHERE p.id = ?
-            """, (participation_id,))
-            
-            result = cursor.fetchone()
-            if not result:
-                await query.edit_message_text("Участник не найден")
-                return
-            
-            participant_user_id, tournament_name, tournament_id = result
+        details = await AsyncParticipationService.get_participation_details(participation_id)
+        if not details:
+            await query.edit_message_text("Участник не найден")
+            return
+        
+        participant_user_id = details['user_id']
+        tournament_name = details['tournament_name']
+        tournament_id = details['tournament_id']
         
-        success = ParticipationService.approve_participation(participation_id)
+        success = await AsyncParticipationService.approve_participation(participation_id)
         
         if success:
+            # Обновляем карточку турнира у тех, кто её сейчас смотрит
+            context.application.create_task(
+                SyncService.update_tournament_for_all(context.application, tournament_id)
+            )
+            
             # Определяем позицию участника (основной или резерв)
-            participants = ParticipationService.get_tournament_participants(tournament_id)
+            participants = await AsyncParticipationService.get_tournament_participants(tournament_id)
             
             # Ищем позицию одобренного участника
             user_position = None
             for participant in participants:
-                # Сравниваем по user_id из БД
-                with db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        SELECT telegram_id FROM users 
-                        WHERE full_name = ? AND phone_number = ?
-                    """, (participant['name'], participant['phone']))
-                    user_result = cursor.fetchone()
-                    
-                    if user_result and user_result[0] == participant_user_id:
-                        user_position = participant['position']
-                        break
+                if participant['user_id'] == participant_user_id:
+                    user_position = participant['position']
+                    break
             
             # Отправляем уведомление в зависимости от позиции
             try:
@@ -290,35 +268,32 @@ async def reject_participant(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await query.edit_message_text("Нет прав доступа")
             return
         
-        participation_id = int(query.data.split("_")[1])
+        participation_id = context.args[0]
         
         # Получаем данные перед отклонением для уведомления
-        from database.connection import db
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT p.user_id, t.name, t.id
-                FROM participations p
-                JOIN tournaments t ON p.tournament_id = t.id
-                WHERE p.id = ?
-            """, (participation_id,))
-            
-            result = cursor.fetchone()
-            if not result:
-                await query.edit_message_text("Участник не найден")
-                return
-            
-            participant_user_id, tournament_name, tournament_id = result
+        details = await AsyncParticipationService.get_participation_details(participation_id)
+        if not details:
+            await query.edit_message_text("Участник не найден")
+            return
+        
+        participant_user_id = details['user_id']
+        tournament_name = details['tournament_name']
+        tournament_id = details['tournament_id']
         
-        success = ParticipationService.reject_participation(participation_id)
+        success = await AsyncParticipationService.reject_participation(participation_id)
         
         if success:
+            # Обновляем карточку турнира у тех, кто её сейчас смотрит
+            context.application.create_task(
+                SyncService.update_tournament_for_all(context.application, tournament_id)
+            )
+            
             # Отправляем уведомление пользователю
             try:
                 keyboard = [
                     [InlineKeyboardButton(
                         "Попробовать записаться снова", 
-                        callback_data=f"tournament_{tournament_id}"
+                        callback_data=encode_callback("tournament", tournament_id)
                     )]
                 ]
                 reply_markup = InlineKeyboardMarkup(keyboard)
@@ -3,12 +3,14 @@ from telegram.ext import ContextTypes, ConversationHandler
 import logging
 from config import SEND_NOTIFICATIONS
 from states.admin_states import TournamentCreationStates, TournamentEditStates, END
-from services.tournament_service import TournamentService
+from services.tournament_service import AsyncTournamentService
 from services.notification_service import NotificationService
+from services.sync_service import SyncService
 from handlers.admin.panel import is_admin, is_super_admin, is_moderator
 from utils.admin_keyboards import get_admin_panel_keyboard, get_admin_panel_text
-from services.participation_service import ParticipationService
-from levels import PLAYER_LEVELS, get_level_name
+from services.participation_service import AsyncParticipationService
+from levels import PLAYER_LEVELS, LEVELS, get_level_name
+from utils.tournament_dates import parse_tournament_start
 
 logger = logging.getLogger(__name__)
 
@@ -126,10 +128,20 @@ async def ask_tournament_date(update: Update, context: ContextTypes.DEFAULT_TYPE
             )
             return TournamentCreationStates.WAITING_DATE
         
+        starts_at = parse_tournament_start(date)
+        if not starts_at:
+            await update.message.reply_text(
+                "Не удалось распознать дату. Укажите день и месяц, при желании - время:\n"
+                "Пример: ⏰ 30 и 31 августа, 10:00 или 30.08 10:00",
+                reply_markup=reply_markup
+            )
+            return TournamentCreationStates.WAITING_DATE
+        
         context.user_data['tournament_date'] = date
         
         await update.message.reply_text(
-            f"Дата: {date}\n\n"
+            f"Дата: {date}\n"
+            f"Начало: {starts_at.strftime('%d.%m.%Y %H:%M')}\n\n"
             "Введите место проведения:\n"
             "Пример: 📍 ADD Padel Indoor Алматы, Утепова, 2/2",
             reply_markup=reply_markup
@@ -314,15 +326,15 @@ async def handle_min_level_selection(update: Update, context: ContextTypes.DEFAU
         keyboard = []
         
         # Показываем только уровни >= минимального
-        for cat_code, category in PLAYER_LEVELS.items():
-            for level_code, level_name in category['levels'].items():
-                if float(level_code) >= float(min_level):
-                    keyboard.append([
-                        InlineKeyboardButton(
-                            f"{level_code} - {level_name}", 
-                            callback_data=f"maxlevel_{level_code}"
-                        )
-                    ])
+        min_ordinal = LEVELS[min_level].ordinal if min_level in LEVELS else 0
+        for level in LEVELS.values():
+            if level.ordinal >= min_ordinal:
+                keyboard.append([
+                    InlineKeyboardButton(
+                        f"{level.code} - {level.name}", 
+                        callback_data=f"maxlevel_{level.code}"
+                    )
+                ])
         
         keyboard.append([InlineKeyboardButton("← Назад", callback_data="level_restricted")])
         keyboard.append([InlineKeyboardButton("❌ Отменить", callback_data="admin_panel_return")])
@@ -378,9 +390,9 @@ async def finish_tournament_creation_with_levels(update: Update, context: Contex
         max_level = context.user_data.get('max_level')
 
         # Создаем турнир (обновляем функцию TournamentService)
-        from services.tournament_service import TournamentService
+        from services.tournament_service import AsyncTournamentService
         
-        new_tournament_id = TournamentService.create_tournament_with_levels(
+        new_tournament_id = await AsyncTournamentService.create_tournament_with_levels(
             name=name,
             date=date,
             location=location,
@@ -396,7 +408,7 @@ async def finish_tournament_creation_with_levels(update: Update, context: Contex
         
         if new_tournament_id:
             # Получаем созданный турнир
-            new_tournament = TournamentService.get_tournament_by_id(new_tournament_id)
+            new_tournament = await AsyncTournamentService.get_tournament_by_id(new_tournament_id)
             
             # Автоматически добавляем системных пользователей только для одиночных турниров
             if tournament_type == 'single':
@@ -404,7 +416,7 @@ async def finish_tournament_creation_with_levels(update: Update, context: Contex
                 
                 for system_user_id in SYSTEM_USERS:
                     try:
-                        ParticipationService.add_participant(system_user_id, new_tournament_id)
+                        await AsyncParticipationService.add_participant(system_user_id, new_tournament_id)
                         logger.info(f"System user {system_user_id} automatically added to tournament {new_tournament_id}")
                     except Exception as e:
                         logger.error(f"Failed to add system user {system_user_id} to tournament: {e}")
@@ -439,7 +451,7 @@ async def finish_tournament_creation_with_levels(update: Update, context: Contex
             success_text += f"Описание: {description}\n\n"
             
             if SEND_NOTIFICATIONS:
-                success_text += "Уведомления отправлены всем пользователям!"
+                success_text += "Рассылка уведомлений запущена, отчёт придёт отдельным сообщением."
             
             # Отправляем сообщение
             if update.callback_query:
@@ -447,10 +459,12 @@ async def finish_tournament_creation_with_levels(update: Update, context: Contex
             else:
                 await update.message.reply_text(success_text, reply_markup=reply_markup)
             
-            # Отправляем уведомления
+            # Отправляем уведомления в фоне, чтобы не блокировать админа
             if new_tournament and SEND_NOTIFICATIONS:
-                await NotificationService.notify_new_tournament(
-                    context.application, new_tournament
+                context.application.create_task(
+                    NotificationService.notify_new_tournament(
+                        context.application, new_tournament, admin_chat_id=created_by
+                    )
                 )
         else:
             error_text = "Ошибка при создании турнира"
@@ -531,7 +545,7 @@ async def start_tournament_edit(update: Update, context: ContextTypes.DEFAULT_TY
             await query.edit_message_text("Нет прав доступа")
             return END
         
-        tournaments = TournamentService.get_all_tournaments()
+        tournaments = await AsyncTournamentService.get_all_tournaments()
         
         if not tournaments:
             keyboard = [[InlineKeyboardButton("← Назад", callback_data="admin_panel_return")]]
@@ -575,7 +589,7 @@ async def select_tournament_for_edit(update: Update, context: ContextTypes.DEFAU
         await query.answer()
         
         tournament_id = int(query.data.split("_")[2])
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
         
         if not tournament:
             await query.edit_message_text("Турнир не найден")
@@ -688,6 +702,15 @@ async def handle_field_edit(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return TournamentEditStates.SELECTING_TOURNAMENT
         
+        # Новая дата должна распознаваться: по ней сортируются турниры
+        if field == 'date' and not parse_tournament_start(new_value):
+            await update.message.reply_text(
+                "Не удалось распознать дату. Укажите день и месяц, при желании - время:\n"
+                "Пример: ⏰ 30 и 31 августа, 10:00 или 30.08 10:00\n\n"
+                "Или отправьте '-', чтобы оставить дату без изменений"
+            )
+            return TournamentEditStates.EDITING_DATE
+        
         # Сохраняем новое значение
         if 'updated_fields' not in context.user_data:
             context.user_data['updated_fields'] = {}
@@ -744,10 +767,15 @@ async def finish_tournament_edit(update: Update, context: ContextTypes.DEFAULT_T
             return END
         
         # Применяем изменения
-        success = TournamentService.update_tournament(tournament_id, updated_fields)
+        success = await AsyncTournamentService.update_tournament(tournament_id, updated_fields)
         logger.info(f"Update result: {success}")
         
         if success:
+            # Обновляем карточку турнира у тех, кто её сейчас смотрит
+            context.application.create_task(
+                SyncService.update_tournament_for_all(context.application, tournament_id)
+            )
+            
             changes_text = "\n".join([f"• {field}: {value}" for field, value in updated_fields.items()])
             
             keyboard = [
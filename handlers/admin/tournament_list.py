@@ -1,10 +1,12 @@
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 import logging
-from services.tournament_service import TournamentService
+from services.tournament_service import AsyncTournamentService
 from handlers.admin.panel import is_admin, is_super_admin, is_moderator
-from services.participation_service import ParticipationService
-from config import MAX_MAIN_PARTICIPANTS, MAX_RESERVE_PARTICIPANTS
+from services.participation_service import AsyncParticipationService
+from services.sync_service import SyncService
+from config import MAX_MAIN_PARTICIPANTS, MAX_RESERVE_PARTICIPANTS, ARCHIVED_TOURNAMENTS_LIST_LIMIT
+from utils.callback_router import encode_callback
 
 logger = logging.getLogger(__name__)
 
@@ -22,11 +24,14 @@ async def show_admin_tournaments(update: Update, context: ContextTypes.DEFAULT_T
             await query.edit_message_text("Нет прав доступа")
             return
         
-        tournaments = TournamentService.get_all_tournaments()
+        tournaments = await AsyncTournamentService.get_active_tournaments_with_counts()
         
         if not tournaments:
             from utils.admin_keyboards import get_admin_panel_keyboard, get_admin_panel_text
-            keyboard = [[InlineKeyboardButton("← Назад", callback_data="admin_panel_return")]]
+            keyboard = [
+                [InlineKeyboardButton("📦 Архив турниров", callback_data="admin_archive")],
+                [InlineKeyboardButton("← Назад", callback_data="admin_panel_return")]
+            ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             await query.edit_message_text(
@@ -39,16 +44,19 @@ async def show_admin_tournaments(update: Update, context: ContextTypes.DEFAULT_T
         keyboard = []
         
         for tournament in tournaments:
+            counts = tournament['counts']
             text += f"🏆 {tournament['name']}\n"
-            text += f"📅 {tournament['date']}\n\n"
+            text += f"📅 {tournament['date']}\n"
+            text += f"👥 {counts['main']}/{MAX_MAIN_PARTICIPANTS} основных, {counts['reserve']}/{MAX_RESERVE_PARTICIPANTS} резерв, {counts['pending']} ожидают\n\n"
             
             keyboard.append([
                 InlineKeyboardButton(
                     f"📋 {tournament['name']}", 
-                    callback_data=f"admin_tournament_{tournament['id']}"
+                    callback_data=encode_callback("admin_tournament", tournament['id'])
                 )
             ])
         
+        keyboard.append([InlineKeyboardButton("📦 Архив турниров", callback_data="admin_archive")])
         keyboard.append([InlineKeyboardButton("← Назад", callback_data="admin_panel_return")])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -58,6 +66,37 @@ async def show_admin_tournaments(update: Update, context: ContextTypes.DEFAULT_T
         logger.error(f"Error in show_admin_tournaments: {e}")
         await query.edit_message_text("Произошла ошибка")
 
+async def show_archived_tournaments(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Показать последние архивные турниры (состав и выгрузка участников)"""
+    try:
+        query = update.callback_query
+        await query.answer()
+        
+        user_id = query.from_user.id
+        if not is_super_admin(user_id):
+            await query.edit_message_text("Нет прав доступа. Эта функция доступна только главному администратору.")
+            return
+        if not is_admin(user_id):
+            await query.edit_message_text("Нет прав доступа")
+            return
+        
+        tournaments = await AsyncTournamentService.get_archived_tournaments(ARCHIVED_TOURNAMENTS_LIST_LIMIT)
+        
+        keyboard = [
+            [InlineKeyboardButton(f"📦 {tournament['name']} ({tournament['date']})",
+                                  callback_data=encode_callback("admin_tournament", tournament['id']))]
+            for tournament in tournaments
+        ]
+        keyboard.append([InlineKeyboardButton("← К списку турниров", callback_data="admin_tournaments")])
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        text = "Архив турниров:" if tournaments else "В архиве пока нет турниров"
+        await query.edit_message_text(text, reply_markup=reply_markup)
+        
+    except Exception as e:
+        logger.error(f"Error in show_archived_tournaments: {e}")
+        await query.edit_message_text("Произошла ошибка")
+
 async def show_tournament_management(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показать управление конкретным турниром"""
     try:
@@ -72,25 +111,32 @@ async def show_tournament_management(update: Update, context: ContextTypes.DEFAU
             await query.edit_message_text("Нет прав доступа")
             return
         
-        tournament_id = int(query.data.split("_")[2])
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
+        tournament_id = context.args[0]
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
         
         if not tournament:
             await query.edit_message_text("Турнир не найден")
             return
         
+        archived = tournament['status'] == 'archived'
+        
         text = f"Управление турниром:\n\n"
         text += f"🏆 {tournament['name']}\n"
         text += f"📅 {tournament['date']}\n"
         text += f"📍 {tournament['location']}\n"
         text += f"💳 {tournament['entry_fee']}\n\n"
+        if archived:
+            text += "📦 Турнир в архиве\n"
         
         keyboard = [
-            [InlineKeyboardButton("📦 Переместить в архив", callback_data=f"archive_{tournament_id}")],
-            [InlineKeyboardButton("📊 Выгрузить участников", callback_data=f"export_{tournament_id}")],
-            [InlineKeyboardButton("👥 Список участников", callback_data=f"participants_list_{tournament_id}")],
-            [InlineKeyboardButton("← К списку турниров", callback_data="admin_tournaments")]
+            [InlineKeyboardButton("📊 Выгрузить участников", callback_data=encode_callback("export", tournament_id))],
+            [InlineKeyboardButton("👥 Список участников", callback_data=encode_callback("participants_list", tournament_id))]
         ]
+        if archived:
+            keyboard.append([InlineKeyboardButton("← К архиву", callback_data="admin_archive")])
+        else:
+            keyboard.insert(0, [InlineKeyboardButton("📦 Переместить в архив", callback_data=encode_callback("archive", tournament_id))])
+            keyboard.append([InlineKeyboardButton("← К списку турниров", callback_data="admin_tournaments")])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         await query.edit_message_text(text, reply_markup=reply_markup)
@@ -113,9 +159,9 @@ async def archive_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await query.edit_message_text("Нет прав доступа")
             return
         
-        tournament_id = int(query.data.split("_")[1])
+        tournament_id = context.args[0]
         
-        success = TournamentService.archive_tournament(tournament_id)
+        success = await AsyncTournamentService.archive_tournament(tournament_id)
         
         if success:
             # Создаем кнопку для возврата в админ панель
@@ -150,96 +196,15 @@ async def export_participants(update: Update, context: ContextTypes.DEFAULT_TYPE
             await query.edit_message_text("Нет прав доступа")
             return
         
-        tournament_id = int(query.data.split("_")[1])
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
-        participants = ParticipationService.get_tournament_participants(tournament_id)
-        
-        if not tournament:
-            await query.edit_message_text("Турнир не найден")
-            return
-        
-        if not participants:
-            await query.edit_message_text("Нет участников для экспорта")
-            return
-        
-        # Создаем Excel файл
-        import io
-        from datetime import datetime
-        import xlsxwriter
-        
-        # Создаем буфер в памяти
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        worksheet = workbook.add_worksheet('Участники')
-        
-        # Форматы
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#366092',
-            'font_color': 'white',
-            'align': 'center'
-        })
-        
-        main_format = workbook.add_format({'bg_color': '#E8F4FD'})
-        reserve_format = workbook.add_format({'bg_color': '#FFF2CC'})
-        pending_format = workbook.add_format({'bg_color': '#FFE6E6'})
-        
-        # Заголовки
-        headers = ['№', 'ФИО', 'Телефон', 'Статус', 'Тип участия', 'Время регистрации']
-        for col, header in enumerate(headers):
-            worksheet.write(0, col, header, header_format)
-        
-        # Данные участников
-        for row, participant in enumerate(participants, 1):
-            # Выбираем формат в зависимости от типа и статуса
-            if participant['status'] == 'pending':
-                cell_format = pending_format
-            elif participant['type'] == 'основной':
-                cell_format = main_format
-            else:
-                cell_format = reserve_format
-            
-            worksheet.write(row, 0, participant['position'], cell_format)
-            worksheet.write(row, 1, participant['name'], cell_format)
-            worksheet.write(row, 2, participant['phone'], cell_format)
-            worksheet.write(row, 3, participant['status_text'], cell_format)
-            worksheet.write(row, 4, participant['type'], cell_format)
-            worksheet.write(row, 5, participant['registration_time'][:16], cell_format)
-        
-        # Автоподбор ширины колонок
-        worksheet.set_column('A:A', 5)
-        worksheet.set_column('B:B', 25)
-        worksheet.set_column('C:C', 15)
-        worksheet.set_column('D:D', 12)
-        worksheet.set_column('E:E', 12)
-        worksheet.set_column('F:F', 18)
-        
-        workbook.close()
-        output.seek(0)
-        
-        # Отправляем файл
-        filename = f"participants_{tournament['name']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        await context.bot.send_document(
-            chat_id=query.message.chat_id,
-            document=output,
-            filename=filename,
-            caption=f"📊 Участники турнира: {tournament['name']}\n"
-                   f"Всего участников: {len(participants)}"
-        )
+        tournament_id = context.args[0]
         
-        # Отправляем админ панель отдельным сообщением
-        from utils.admin_keyboards import get_admin_panel_keyboard, get_admin_panel_text
+        # Выгрузка строится в фоне, о ходе сообщаем в этом же сообщении
+        status_message = await query.edit_message_text("⏳ Выгрузка участников поставлена в очередь...")
         
-        await context.bot.send_message(
-            chat_id=query.message.chat_id,
-            text=get_admin_panel_text(),
-            reply_markup=get_admin_panel_keyboard()
+        context.application.create_task(
+            _run_participants_export(context, query.message.chat_id, tournament_id, status_message)
         )
         
-        # Удаляем исходное сообщение с управлением турниром
-        await query.delete_message()
-        
     except Exception as e:
         logger.error(f"Error in export_participants: {e}")
         try:
@@ -250,6 +215,39 @@ async def export_participants(update: Update, context: ContextTypes.DEFAULT_TYPE
                 text="Произошла ошибка при экспорте"
             )
 
+async def _run_participants_export(context: ContextTypes.DEFAULT_TYPE, chat_id: int,
+                                  tournament_id: int, status_message):
+    """Фоновая выгрузка участников с отчётом о ходе в сообщении статуса"""
+    from services.export_service import ExportService
+    from utils.admin_keyboards import get_admin_panel_keyboard, get_admin_panel_text
+    
+    async def on_progress(text):
+        try:
+            await status_message.edit_text(text)
+        except Exception as e:
+            logger.warning(f"Failed to update export progress: {e}")
+    
+    try:
+        sent = await ExportService.send_participants_export(context.bot, chat_id, tournament_id, on_progress)
+        
+        if not sent:
+            await on_progress("Нет участников для экспорта")
+            return
+        
+        # Отправляем админ панель отдельным сообщением
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text=get_admin_panel_text(),
+            reply_markup=get_admin_panel_keyboard()
+        )
+        
+        # Удаляем сообщение с ходом выгрузки
+        await status_message.delete()
+        
+    except Exception as e:
+        logger.error(f"Error exporting participants: {e}")
+        await on_progress("Произошла ошибка при экспорте")
+
 async def show_participants_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показать список участников с кнопками"""
     try:
@@ -264,9 +262,9 @@ async def show_participants_list(update: Update, context: ContextTypes.DEFAULT_T
             await query.edit_message_text("Нет прав доступа")
             return
         
-        tournament_id = int(query.data.split("_")[2])
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
-        participants = ParticipationService.get_tournament_participants(tournament_id)
+        tournament_id = context.args[0]
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
+        participants = await AsyncParticipationService.get_tournament_participants(tournament_id)
         
         if not tournament:
             await query.edit_message_text("Турнир не найден")
@@ -274,7 +272,7 @@ async def show_participants_list(update: Update, context: ContextTypes.DEFAULT_T
         
         if not participants:
             keyboard = [
-                [InlineKeyboardButton("← Назад к управлению", callback_data=f"admin_tournament_{tournament_id}")]
+                [InlineKeyboardButton("← Назад к управлению", callback_data=encode_callback("admin_tournament", tournament_id))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -285,9 +283,13 @@ async def show_participants_list(update: Update, context: ContextTypes.DEFAULT_T
             )
             return
         
+        # Состав архивного турнира только для просмотра
+        archived = tournament['status'] == 'archived'
+        
         text = f"Турнир: {tournament['name']}\n"
         text += f"Участников: {len(participants)}\n\n"
-        text += "Выберите участника для управления:\n\n"
+        if not archived:
+            text += "Выберите участника для управления:\n\n"
         
         keyboard = []
         
@@ -297,10 +299,12 @@ async def show_participants_list(update: Update, context: ContextTypes.DEFAULT_T
             text += "👥 ОСНОВНЫЕ УЧАСТНИКИ:\n"
             for participant in main_participants:
                 text += f"{participant['status_icon']} {participant['position']}. {participant['name']}\n"
+                if archived:
+                    continue
                 keyboard.append([
                     InlineKeyboardButton(
                         f"{participant['status_icon']} {participant['name']}", 
-                        callback_data=f"manage_participant_{tournament_id}_{participant['position']}"
+                        callback_data=encode_callback("manage_participant", tournament_id, participant['position'])
                     )
                 ])
             text += "\n"
@@ -311,14 +315,16 @@ async def show_participants_list(update: Update, context: ContextTypes.DEFAULT_T
             text += "📋 РЕЗЕРВИСТЫ:\n"
             for participant in reserve_participants:
                 text += f"{participant['status_icon']} {participant['position']}. {participant['name']}\n"
+                if archived:
+                    continue
                 keyboard.append([
                     InlineKeyboardButton(
                         f"{participant['status_icon']} {participant['name']}", 
-                        callback_data=f"manage_participant_{tournament_id}_{participant['position']}"
+                        callback_data=encode_callback("manage_participant", tournament_id, participant['position'])
                     )
                 ])
         
-        keyboard.append([InlineKeyboardButton("← Назад к управлению", callback_data=f"admin_tournament_{tournament_id}")])
+        keyboard.append([InlineKeyboardButton("← Назад к управлению", callback_data=encode_callback("admin_tournament", tournament_id))])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         await query.edit_message_text(text, reply_markup=reply_markup)
@@ -342,12 +348,10 @@ async def manage_participant(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
         
         # Парсим данные: manage_participant_tournament_id_position
-        data_parts = query.data.split("_")
-        tournament_id = int(data_parts[2])
-        position = int(data_parts[3])
+        tournament_id, position = context.args
         
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
-        participants = ParticipationService.get_tournament_participants(tournament_id)
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
+        participants = await AsyncParticipationService.get_tournament_participants(tournament_id)
         
         # Находим участника по позиции
         participant = None
@@ -369,8 +373,8 @@ async def manage_participant(update: Update, context: ContextTypes.DEFAULT_TYPE)
         text += f"📅 Регистрация: {participant['registration_time'][:16]}\n"
         
         keyboard = [
-            [InlineKeyboardButton("🗑️ Удалить из турнира", callback_data=f"remove_participant_{tournament_id}_{position}")],
-            [InlineKeyboardButton("← Назад к списку", callback_data=f"participants_list_{tournament_id}")]
+            [InlineKeyboardButton("🗑️ Удалить из турнира", callback_data=encode_callback("remove_participant", tournament_id, position))],
+            [InlineKeyboardButton("← Назад к списку", callback_data=encode_callback("participants_list", tournament_id))]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -395,12 +399,10 @@ async def remove_participant(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
         
         # Парсим данные
-        data_parts = query.data.split("_")
-        tournament_id = int(data_parts[2])
-        position = int(data_parts[3])
+        tournament_id, position = context.args
         
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
-        participants = ParticipationService.get_tournament_participants(tournament_id)
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
+        participants = await AsyncParticipationService.get_tournament_participants(tournament_id)
         
         # Находим участника
         participant = None
@@ -408,15 +410,7 @@ async def remove_participant(update: Update, context: ContextTypes.DEFAULT_TYPE)
         for p in participants:
             if p['position'] == position:
                 participant = p
-                # Получаем telegram_id участника
-                from database.connection import db
-                with db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT telegram_id FROM users WHERE full_name = ? AND phone_number = ?", 
-                                 (p['name'], p['phone']))
-                    result = cursor.fetchone()
-                    if result:
-                        participant_user_id = result[0]
+                participant_user_id = p['user_id']
                 break
         
         if not participant or not participant_user_id:
@@ -424,9 +418,14 @@ async def remove_participant(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return
         
         # Удаляем участника
-        success = ParticipationService.remove_participant(participant_user_id, tournament_id)
+        success = await AsyncParticipationService.remove_participant(participant_user_id, tournament_id)
         
         if success:
+            # Обновляем карточку турнира у тех, кто её сейчас смотрит
+            context.application.create_task(
+                SyncService.update_tournament_for_all(context.application, tournament_id)
+            )
+            
             # Уведомляем участника
             if participant_user_id > 0:  # Добавить эту проверку
                 try:
@@ -441,7 +440,7 @@ async def remove_participant(update: Update, context: ContextTypes.DEFAULT_TYPE)
                     logger.error(f"Failed to notify removed participant {participant_user_id}: {e}")
             
             keyboard = [
-                [InlineKeyboardButton("← К списку участников", callback_data=f"participants_list_{tournament_id}")]
+                [InlineKeyboardButton("← К списку участников", callback_data=encode_callback("participants_list", tournament_id))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
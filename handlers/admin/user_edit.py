@@ -1,7 +1,7 @@
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 import logging
-from services.user_service import UserService
+from services.user_service import AsyncUserService
 from handlers.admin.panel import is_admin, is_super_admin
 from states.admin_states import UserEditStates, END
 from levels import PLAYER_LEVELS, get_level_name, get_category_by_level, format_level_display
@@ -69,7 +69,7 @@ async def find_user_by_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_id = int(telegram_id_str)
         
         # Ищем пользователя
-        user = UserService.search_user_by_id(telegram_id)
+        user = await AsyncUserService.search_user_by_id(telegram_id)
         
         if not user:
             keyboard = [
@@ -206,7 +206,7 @@ async def handle_new_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
         old_name = context.user_data['editing_user_data']['full_name']
         
         # Сохраняем в БД
-        success = UserService.update_user_name(telegram_id, new_name)
+        success = await AsyncUserService.update_user_name(telegram_id, new_name)
         
         if success:
             # Обновляем данные в контексте
@@ -352,7 +352,7 @@ async def save_selected_level(update: Update, context: ContextTypes.DEFAULT_TYPE
         user = context.user_data.get('editing_user_data')
         
         # Сохраняем в БД
-        success = UserService.set_player_level(telegram_id, level_code, admin_id)
+        success = await AsyncUserService.set_player_level(telegram_id, level_code, admin_id)
         
         if success:
             # Обновляем данные в контексте
@@ -411,7 +411,7 @@ async def reset_user_level(update: Update, context: ContextTypes.DEFAULT_TYPE):
         admin_id = query.from_user.id
         user = context.user_data.get('editing_user_data')
         
-        success = UserService.reset_player_level(telegram_id, admin_id)
+        success = await AsyncUserService.reset_player_level(telegram_id, admin_id)
         
         if success:
             context.user_data['editing_user_data']['player_level'] = None
@@ -476,7 +476,7 @@ async def show_user_card_callback(update: Update, context: ContextTypes.DEFAULT_
         
         # Обновляем данные пользователя
         telegram_id = context.user_data.get('editing_user_id')
-        updated_user = UserService.get_user_by_telegram_id(telegram_id)
+        updated_user = await AsyncUserService.get_user_by_telegram_id(telegram_id)
         
         if updated_user:
             context.user_data['editing_user_data'] = updated_user
@@ -0,0 +1,11 @@
+from telegram.ext import ContextTypes
+import logging
+from utils.metrics import handler_errors, update_label
+
+logger = logging.getLogger(__name__)
+
+async def handle_error(update: object, context: ContextTypes.DEFAULT_TYPE):
+    """Журналирование и подсчёт исключений, не перехваченных обработчиками"""
+    label = update_label(update)
+    handler_errors.inc(label, type(context.error).__name__)
+    logger.error(f"Unhandled error in {label}: {context.error}", exc_info=context.error)
@@ -2,9 +2,15 @@ from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 import logging
 from config import MAX_MAIN_PARTICIPANTS, MAX_RESERVE_PARTICIPANTS
-from services.participation_service import ParticipationService
-from services.tournament_service import TournamentService
-from services.user_service import UserService
+from services.participation_service import AsyncParticipationService
+from services.tournament_service import AsyncTournamentService
+from services.user_service import AsyncUserService
+from services.viewer_service import AsyncViewerService
+from services.sync_service import SyncService
+from services.expiry_service import ExpiryService
+from services.card_service import CardService
+from utils.tournament_card import build_payment_timer_text, get_tournament_card_keyboard
+from utils.callback_router import encode_callback
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +21,15 @@ async def join_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.answer()
         
         user_id = query.from_user.id
-        tournament_id = int(query.data.split("_")[1])
+        tournament_id = context.args[0]
+        
+        # Сообщение с карточкой турнира сейчас сменится другим экраном
+        await AsyncViewerService.forget_message(query.message.chat_id, query.message.message_id)
         
         # Проверяем, зарегистрирован ли пользователь в системе
-        if not UserService.is_user_registered(user_id):
+        user_data = await AsyncUserService.get_user_by_telegram_id(user_id)
+        
+        if not user_data:
             await query.edit_message_text(
                 "Для участия в турнирах необходимо зарегистрироваться.\n"
                 "Используйте команду /start"
@@ -26,10 +37,10 @@ async def join_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Проверяем, не записан ли уже
-        if ParticipationService.is_user_registered(user_id, tournament_id):
+        if await AsyncParticipationService.is_user_registered(user_id, tournament_id):
             keyboard = [
-                [InlineKeyboardButton("Отменить участие", callback_data=f"leave_{tournament_id}")],
-                [InlineKeyboardButton("← Назад к турниру", callback_data=f"tournament_{tournament_id}")]
+                [InlineKeyboardButton("Отменить участие", callback_data=encode_callback("leave", tournament_id))],
+                [InlineKeyboardButton("← Назад к турниру", callback_data=encode_callback("tournament", tournament_id))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -44,16 +55,19 @@ async def join_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # НОВОЕ: ПРОВЕРКА УРОВНЯ ИГРОКА
         # ============================================
         
-        from services.tournament_service import TournamentService
         from levels import check_level_in_range, get_level_name
         
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
-        user_data = UserService.get_user_by_telegram_id(user_id)
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
         
         if not tournament:
             await query.edit_message_text("Турнир не найден")
             return
         
+        # Кнопка могла остаться в старом сообщении после архивации турнира
+        if tournament.get('status') != 'active':
+            await query.edit_message_text("Турнир завершён, запись закрыта")
+            return
+        
         # Проверяем ограничения по уровню
         if tournament.get('level_restriction') == 'restricted':
             player_level = user_data.get('player_level')
@@ -63,7 +77,7 @@ async def join_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Проверка 1: Уровень не установлен
             if not player_level:
                 keyboard = [
-                    [InlineKeyboardButton("← Назад к турниру", callback_data=f"tournament_{tournament_id}")]
+                    [InlineKeyboardButton("← Назад к турниру", callback_data=encode_callback("tournament", tournament_id))]
                 ]
                 reply_markup = InlineKeyboardMarkup(keyboard)
                 
@@ -84,7 +98,7 @@ async def join_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 max_level_name = get_level_name(max_level)
                 
                 keyboard = [
-                    [InlineKeyboardButton("← Назад к турниру", callback_data=f"tournament_{tournament_id}")]
+                    [InlineKeyboardButton("← Назад к турниру", callback_data=encode_callback("tournament", tournament_id))]
                 ]
                 reply_markup = InlineKeyboardMarkup(keyboard)
                 
@@ -102,14 +116,21 @@ async def join_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Если турнир открытый ИЛИ уровень подходит - записываем
         
         # Пытаемся записать на турнир со статусом pending
-        success = ParticipationService.add_participant_pending(user_id, tournament_id)
+        success = await AsyncParticipationService.add_participant_pending(user_id, tournament_id)
         
         if success:
             from config import PAYMENT_TIMEOUT_MINUTES
             
+            # Обновляем карточку турнира у тех, кто её сейчас смотрит
+            context.application.create_task(
+                SyncService.update_tournament_for_all(context.application, tournament_id)
+            )
+            # Новая заявка может оказаться ближайшей к истечению
+            context.application.create_task(ExpiryService.schedule(context.application))
+            
             keyboard = [
-                [InlineKeyboardButton("Отменить участие", callback_data=f"leave_{tournament_id}")],
-                [InlineKeyboardButton("← Назад к турниру", callback_data=f"tournament_{tournament_id}")]
+                [InlineKeyboardButton("Отменить участие", callback_data=encode_callback("leave", tournament_id))],
+                [InlineKeyboardButton("← Назад к турниру", callback_data=encode_callback("tournament", tournament_id))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -125,7 +146,7 @@ async def join_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
         else:
             keyboard = [
-                [InlineKeyboardButton("← Назад к турниру", callback_data=f"tournament_{tournament_id}")]
+                [InlineKeyboardButton("← Назад к турниру", callback_data=encode_callback("tournament", tournament_id))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -144,11 +165,13 @@ async def leave_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
         await query.answer()
         
-        tournament_id = int(query.data.split("_")[1])
+        tournament_id = context.args[0]
+        
+        # Сообщение с карточкой турнира сейчас сменится подтверждением
+        await AsyncViewerService.forget_message(query.message.chat_id, query.message.message_id)
         
         # Получаем информацию о турнире
-        from services.tournament_service import TournamentService
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
         
         if not tournament:
             await query.edit_message_text("Турнир не найден")
@@ -156,8 +179,8 @@ async def leave_tournament(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Спрашиваем подтверждение
         keyboard = [
-            [InlineKeyboardButton("✅ Да, отменить участие", callback_data=f"confirm_leave_{tournament_id}")],
-            [InlineKeyboardButton("❌ Нет, оставить участие", callback_data=f"cancel_leave_{tournament_id}")]
+            [InlineKeyboardButton("✅ Да, отменить участие", callback_data=encode_callback("confirm_leave", tournament_id))],
+            [InlineKeyboardButton("❌ Нет, оставить участие", callback_data=encode_callback("cancel_leave", tournament_id))]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -180,13 +203,18 @@ async def confirm_leave_tournament(update: Update, context: ContextTypes.DEFAULT
         await query.answer()
         
         user_id = query.from_user.id
-        tournament_id = int(query.data.split("_")[2])
+        tournament_id = context.args[0]
         
-        success = ParticipationService.remove_participant(user_id, tournament_id)
+        success = await AsyncParticipationService.remove_participant(user_id, tournament_id)
         
         if success:
+            # Обновляем карточку турнира у тех, кто её сейчас смотрит
+            context.application.create_task(
+                SyncService.update_tournament_for_all(context.application, tournament_id)
+            )
+            
             keyboard = [
-                [InlineKeyboardButton("← Назад к турниру", callback_data=f"tournament_{tournament_id}")]
+                [InlineKeyboardButton("← Назад к турниру", callback_data=encode_callback("tournament", tournament_id))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -196,7 +224,7 @@ async def confirm_leave_tournament(update: Update, context: ContextTypes.DEFAULT
             )
         else:
             keyboard = [
-                [InlineKeyboardButton("← Назад к турниру", callback_data=f"tournament_{tournament_id}")]
+                [InlineKeyboardButton("← Назад к турниру", callback_data=encode_callback("tournament", tournament_id))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -216,115 +244,31 @@ async def cancel_leave_tournament(update: Update, context: ContextTypes.DEFAULT_
         query = update.callback_query
         await query.answer("Участие сохранено")
         
-        tournament_id = int(query.data.split("_")[2])
+        tournament_id = context.args[0]
         
-        # Получаем данные турнира
-        from services.tournament_service import TournamentService
-        from services.participation_service import ParticipationService
-        from config import MAX_MAIN_PARTICIPANTS, MAX_RESERVE_PARTICIPANTS
-        from datetime import datetime
+        # Общая часть карточки турнира (из кэша)
+        card = await CardService.get_card(tournament_id)
         
-        tournament = TournamentService.get_tournament_by_id(tournament_id)
-        
-        if not tournament:
+        if not card:
             await query.edit_message_text("Турнир не найден")
             return
         
-        # Получаем данные об участниках
-        counts = ParticipationService.get_participants_count(tournament_id)
-        participants = ParticipationService.get_tournament_participants(tournament_id)
-
-        text = f"🏆 {tournament['name']}\n\n"
-        text += f"📅 {tournament['date']}\n"
-        text += f"📍 {tournament['location']}\n"
-        text += f"✅ {tournament['format_info']}\n"
-        text += f"💳 {tournament['entry_fee']}\n\n"
-        text += f"👥 Участники: {counts['main']}/{MAX_MAIN_PARTICIPANTS} основных\n"
-        text += f"📋 Резерв: {counts['reserve']}/{MAX_RESERVE_PARTICIPANTS}\n\n"
-
-        # Разделяем участников на основных и резерв
-        main_participants = [p for p in participants if p['position'] <= MAX_MAIN_PARTICIPANTS]
-        reserve_participants = [p for p in participants if p['position'] > MAX_MAIN_PARTICIPANTS]
-
-        # Основные участники
-        if main_participants:
-            text += "👥 УЧАСТНИКИ:\n"
-            for participant in main_participants:
-                text += f"{participant['status_icon']} {participant['position']}. {participant['name']}\n"
-            text += "\n"
-        else:
-            text += "👥 УЧАСТНИКИ:\nПока никого нет\n\n"
-
-        # Резервные участники
-        if reserve_participants:
-            text += "📋 РЕЗЕРВ:\n"
-            for participant in reserve_participants:
-                text += f"{participant['status_icon']} {participant['position']}. {participant['name']}\n"
-            text += "\n"
-        else:
-            text += "📋 РЕЗЕРВ:\nПока никого нет\n\n"
+        counts = card['counts']
+        text = card['text']
 
-        text += f"📝 ОПИСАНИЕ:\n{tournament['description']}\n\n"
-
-        # Определяем статус кнопки
+        # Определяем статус кнопки и показываем таймер для pending
         user_id = query.from_user.id
-        user_participation = ParticipationService.get_user_participation_status(user_id, tournament_id)
-        total_available = counts['available_main'] + counts['available_reserve']
+        user_participation = await AsyncParticipationService.get_user_participation_status(user_id, tournament_id)
 
-        # Показываем таймер если пользователь в pending
         if user_participation and user_participation['status'] == 'pending':
-            deadline = datetime.fromisoformat(user_participation['payment_deadline'])
-            current_time = datetime.now()
-            
-            text += f"⏰ ВАША ЗАЯВКА: Оплатите до {deadline.strftime('%H:%M:%S')}\n"
-            text += f"📱 Сейчас: {current_time.strftime('%H:%M:%S')}\n"
-            
-            remaining = deadline - current_time
-            if remaining.total_seconds() > 0:
-                minutes = int(remaining.total_seconds() // 60)
-                seconds = int(remaining.total_seconds() % 60)
-                text += f"⏳ Осталось: {minutes} мин {seconds} сек\n\n"
-            else:
-                text += f"❌ Время истекло\n\n"
-
-        if user_participation:
-            if user_participation['status'] == 'confirmed':
-                keyboard = [
-                    [InlineKeyboardButton("✅ ВЫ ЗАПИСАНЫ", callback_data=f"confirmed_{tournament_id}")],
-                    [InlineKeyboardButton("❌ Отменить участие", callback_data=f"leave_{tournament_id}")],
-                    [InlineKeyboardButton("← Назад к списку", callback_data="back_to_tournaments")]
-                ]
-            elif user_participation['status'] == 'pending':
-                keyboard = [
-                    [InlineKeyboardButton("🟡 ОЖИДАЕТ ОПЛАТЫ", callback_data=f"pending_{tournament_id}")],
-                    [InlineKeyboardButton("💳 Оплата Kaspi", url="https://pay.kaspi.kz/pay/g6b21oa4")],
-                    [InlineKeyboardButton("❌ Отменить участие", callback_data=f"leave_{tournament_id}")],
-                    [InlineKeyboardButton("← Назад к списку", callback_data="back_to_tournaments")]
-                ]
-            else:
-                keyboard = [
-                    [InlineKeyboardButton("❌ ОТМЕНИТЬ УЧАСТИЕ", callback_data=f"leave_{tournament_id}")],
-                    [InlineKeyboardButton("← Назад к списку", callback_data="back_to_tournaments")]
-                ]
-        else:
-            if total_available > 0:
-                if counts['available_main'] > 0:
-                    button_text = "🟢 УЧАСТВОВАТЬ В ТУРНИРЕ"
-                else:
-                    button_text = "🟡 УЧАСТВОВАТЬ (в резерв)"
-                button_callback = f"join_{tournament_id}"
-            else:
-                button_text = "🔴 МЕСТ НЕТ"
-                button_callback = f"no_slots_{tournament_id}"
-            
-            keyboard = [
-                [InlineKeyboardButton(button_text, callback_data=button_callback)],
-                [InlineKeyboardButton("← Назад к списку", callback_data="back_to_tournaments")]
-            ]
+            text += build_payment_timer_text(user_participation)
 
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = get_tournament_card_keyboard(tournament_id, counts, user_participation)
+        
+        message = await query.edit_message_text(text, reply_markup=reply_markup)
         
-        await query.edit_message_text(text, reply_markup=reply_markup)
+        # Сообщение снова показывает карточку турнира
+        await AsyncViewerService.record_view(user_id, tournament_id, message.chat_id, message.message_id)
         
     except Exception as e:
         logger.error(f"Error in cancel_leave_tournament: {e}")
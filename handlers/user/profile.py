@@ -1,7 +1,7 @@
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 import logging
-from services.user_service import UserService
+from services.user_service import AsyncUserService
 from states.user_states import ProfileStates
 from utils.keyboards import get_main_menu_keyboard
 from levels import format_level_display
@@ -12,7 +12,7 @@ async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показать профиль пользователя"""
     try:
         user_id = update.effective_user.id
-        user_data = UserService.get_user_by_telegram_id(user_id)
+        user_data = await AsyncUserService.get_user_by_telegram_id(user_id)
         
         if not user_data:
             await update.message.reply_text(
@@ -58,7 +58,7 @@ async def start_edit_profile(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await query.answer()
         
         user_id = query.from_user.id
-        user_data = UserService.get_user_by_telegram_id(user_id)
+        user_data = await AsyncUserService.get_user_by_telegram_id(user_id)
         
         if not user_data:
             await query.edit_message_text("Профиль не найден")
@@ -132,7 +132,7 @@ async def save_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await query.edit_message_text("Ошибка: новое имя не найдено")
             return
         
-        success = UserService.update_user_name(user_id, new_name)
+        success = await AsyncUserService.update_user_name(user_id, new_name)
         
         if success:
             await query.edit_message_text(
@@ -2,7 +2,7 @@ from telegram import Update, ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKe
 from telegram.ext import ContextTypes, ConversationHandler
 import logging
 from states.user_states import RegistrationStates, END
-from services.user_service import UserService
+from services.user_service import AsyncUserService
 from utils.keyboards import get_phone_keyboard, remove_keyboard, get_main_menu_keyboard
 logger = logging.getLogger(__name__)
 
@@ -16,7 +16,7 @@ async def start_registration(update: Update, context: ContextTypes.DEFAULT_TYPE)
         else:
             telegram_id = update.effective_user.id
         
-        if UserService.is_user_registered(telegram_id):
+        if await AsyncUserService.is_user_registered(telegram_id):
             await update.effective_message.reply_text(
                 "✅ Вы уже зарегистрированы в системе!\n"
                 "Используйте /start для доступа к главному меню."
@@ -114,7 +114,7 @@ async def handle_contact_share(update: Update, context: ContextTypes.DEFAULT_TYP
         telegram_id = update.effective_user.id
         full_name = context.user_data['full_name']
         
-        success = UserService.register_user(
+        success = await AsyncUserService.register_user(
             telegram_id=telegram_id,
             full_name=full_name,
             phone_number=phone_number,
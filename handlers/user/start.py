@@ -1,7 +1,7 @@
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 import logging
-from services.user_service import UserService
+from services.user_service import AsyncUserService
 from utils.keyboards import get_phone_keyboard, remove_keyboard, get_main_menu_keyboard
 
 logger = logging.getLogger(__name__)
@@ -14,10 +14,13 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         logger.info(f"User {telegram_id} ({user.username}) started the bot")
         
-        # Проверяем, зарегистрирован ли пользователь
-        if UserService.is_user_registered(telegram_id):
+        # Проверяем, зарегистрирован ли пользователь (один запрос за профилем)
+        user_data = await AsyncUserService.get_user_by_telegram_id(telegram_id)
+        
+        if user_data:
             # Показываем главное меню для зарегистрированного пользователя
-            user_data = UserService.get_user_by_telegram_id(telegram_id)
+            # Пользователь снова пишет боту - можно возобновить рассылки
+            await AsyncUserService.mark_user_active(telegram_id)
             
             welcome_message = f"🎾 Добро пожаловать, {user_data['full_name']}!\n\nВыберите действие:"
             
@@ -58,10 +61,10 @@ async def enter_cabinet(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = query.from_user
         telegram_id = user.id
         
-        # Проверяем, зарегистрирован ли пользователь
-        if UserService.is_user_registered(telegram_id):
-            user_data = UserService.get_user_by_telegram_id(telegram_id)
-            
+        # Проверяем, зарегистрирован ли пользователь (один запрос за профилем)
+        user_data = await AsyncUserService.get_user_by_telegram_id(telegram_id)
+        
+        if user_data:
             welcome_message = f"🎾 Добро пожаловать, {user_data['full_name']}!\n\nВыберите действие:"
             
             await query.edit_message_text(welcome_message)
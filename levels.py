@@ -1,4 +1,5 @@
 # Справочник уровней игроков
+from typing import Dict, NamedTuple, Optional
 
 PLAYER_LEVELS = {
     "C": {
@@ -36,6 +37,49 @@ PLAYER_LEVELS = {
 }
 
 
+class Level(NamedTuple):
+    """Уровень из справочника со всеми атрибутами"""
+    code: str
+    ordinal: int      # порядковый номер от самого низкого уровня
+    value: float      # числовое значение кода (хранится в users.player_level_num)
+    name: str
+    category: str
+    category_name: str
+    emoji: str
+
+
+def _compile_levels() -> Dict[str, Level]:
+    """Плоский справочник код -> Level в порядке возрастания уровня"""
+    codes = sorted(
+        ((code, cat_code) for cat_code, category in PLAYER_LEVELS.items() for code in category["levels"]),
+        key=lambda item: float(item[0])
+    )
+    levels = {}
+    for ordinal, (code, cat_code) in enumerate(codes):
+        category = PLAYER_LEVELS[cat_code]
+        levels[code] = Level(
+            code=code,
+            ordinal=ordinal,
+            value=float(code),
+            name=category["levels"][code],
+            category=cat_code,
+            category_name=category["name"],
+            emoji=category["emoji"]
+        )
+    return levels
+
+
+# Собирается один раз при импорте; PLAYER_LEVELS после этого не меняется
+LEVELS = _compile_levels()
+
+
+def get_level(level_code) -> Optional[Level]:
+    """Уровень из справочника по коду или None"""
+    if not level_code:
+        return None
+    return LEVELS.get(level_code)
+
+
 def get_level_name(level_code):
     """
     Получить название уровня по коду
@@ -54,14 +98,8 @@ def get_level_name(level_code):
         >>> get_level_name(None)
         'Не установлен'
     """
-    if not level_code:
-        return "Не установлен"
-    
-    for category in PLAYER_LEVELS.values():
-        if level_code in category["levels"]:
-            return category["levels"][level_code]
-    
-    return "Не установлен"
+    level = get_level(level_code)
+    return level.name if level else "Не установлен"
 
 
 def get_category_by_level(level_code):
@@ -82,14 +120,8 @@ def get_category_by_level(level_code):
         >>> get_category_by_level("5.0")
         'A'
     """
-    if not level_code:
-        return None
-    
-    for cat_code, category in PLAYER_LEVELS.items():
-        if level_code in category["levels"]:
-            return cat_code
-    
-    return None
+    level = get_level(level_code)
+    return level.category if level else None
 
 
 def get_category_name(category_code):
@@ -135,20 +167,17 @@ def get_level_info(level_code):
         >>> info['category']
         'B'
     """
-    if not level_code:
+    level = get_level(level_code)
+    if not level:
         return None
     
-    for cat_code, category in PLAYER_LEVELS.items():
-        if level_code in category["levels"]:
-            return {
-                'code': level_code,
-                'name': category["levels"][level_code],
-                'category': cat_code,
-                'category_name': category["name"],
-                'emoji': category["emoji"]
-            }
-    
-    return None
+    return {
+        'code': level.code,
+        'name': level.name,
+        'category': level.category,
+        'category_name': level.category_name,
+        'emoji': level.emoji
+    }
 
 
 def format_level_display(level_code):
@@ -187,18 +216,36 @@ def check_level_in_range(player_level, min_level, max_level):
         False
         >>> check_level_in_range(None, "3.0", "4.5")
         False
+        >>> check_level_in_range("3.7", "3.0", "4.5")  # неизвестный код
+        False
     """
-    if not player_level or not min_level or not max_level:
+    player = LEVELS.get(player_level)
+    min_lvl = LEVELS.get(min_level)
+    max_lvl = LEVELS.get(max_level)
+    if not player or not min_lvl or not max_lvl:
         return False
     
-    try:
-        player = float(player_level)
-        min_lvl = float(min_level)
-        max_lvl = float(max_level)
-        
-        return min_lvl <= player <= max_lvl
-    except (ValueError, TypeError):
-        return False
+    return min_lvl.ordinal <= player.ordinal <= max_lvl.ordinal
+
+
+def get_level_number(level_code):
+    """
+    Числовое значение уровня для хранения в users.player_level_num
+    
+    Args:
+        level_code (str): Код уровня, например "3.5"
+    
+    Returns:
+        float: Значение уровня или None, если код не задан или неизвестен
+    
+    Examples:
+        >>> get_level_number("3.5")
+        3.5
+        >>> get_level_number(None) is None
+        True
+    """
+    level = get_level(level_code)
+    return level.value if level else None
 
 
 def get_all_levels_list():
@@ -213,8 +260,4 @@ def get_all_levels_list():
         >>> levels[0]
         ('1.0', 'Новички')
     """
-    all_levels = []
-    for category in PLAYER_LEVELS.values():
-        for code, name in category["levels"].items():
-            all_levels.append((code, name))
-    return all_levels
\ No newline at end of file
+    return [(level.code, level.name) for level in LEVELS.values()]
\ No newline at end of file
@@ -1,12 +1,14 @@
 import logging
 import asyncio
 from telegram.ext import Application, CommandHandler, ConversationHandler, MessageHandler, CallbackQueryHandler, filters
-from config import BOT_TOKEN, LOG_LEVEL, LOG_FILE
+from config import BOT_TOKEN, BOT_API_BASE_URL, BOT_MODE, LOG_LEVEL, LOG_FILE, UPDATE_CONCURRENCY, UPDATE_MAX_PENDING
 from handlers.user.start import start_command, enter_cabinet
 from handlers.user.registration import (
     start_registration, ask_full_name, handle_contact_share, cancel_registration
 )
-from handlers.user.tournaments import show_tournaments_list, show_tournament_details, back_to_tournaments
+from handlers.user.tournaments import (
+    show_tournaments_list, show_tournament_details, back_to_tournaments, show_eligible_tournaments
+)
 from handlers.admin.panel import admin_panel, export_all_users
 from handlers.admin.tournament_crud import (
     start_tournament_creation, ask_tournament_name, ask_tournament_date,
@@ -20,9 +22,22 @@ from handlers.admin.tournament_crud import (
     handle_field_edit, finish_tournament_edit, cancel_field_edit
 )
 from handlers.common.menu_handler import handle_menu_buttons
+from handlers.common.error_handler import handle_error
 from states.user_states import RegistrationStates, ProfileStates
 from states.admin_states import TournamentCreationStates, TournamentEditStates, UserEditStates
 from database.connection import db
+from database.persistence import SQLitePersistence
+from utils.callback_router import CallbackRouter
+from utils.update_processor import ChatOrderedUpdateProcessor
+from utils.instrumented_request import InstrumentedRequest
+from utils.metrics import metrics
+from utils.metrics_server import start_metrics_server, stop_metrics_server
+from utils.update_recorder import RecordingRequest, start_recording, stop_recording
+from services.card_cache import card_cache
+from services.eligibility_index import eligibility_index
+from services.user_service import user_cache
+from services.expiry_service import ExpiryService
+from services.archive_service import ArchiveService
 from handlers.user.participation import join_tournament, leave_tournament, confirm_leave_tournament, cancel_leave_tournament
 from handlers.admin.moderation import (
     show_moderation_menu, show_tournament_moderation, 
@@ -30,7 +45,7 @@ from handlers.admin.moderation import (
 )
 from handlers.user.participation import handle_confirmed_status, handle_pending_status
 from handlers.admin.tournament_list import (
-    show_admin_tournaments, show_tournament_management, archive_tournament, 
+    show_admin_tournaments, show_tournament_management, archive_tournament, show_archived_tournaments,
     export_participants, show_participants_list, manage_participant, remove_participant
 )
 from handlers.user.profile import (
@@ -54,233 +69,316 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
-    """Главная функция запуска бота"""
-    try:
-        if not BOT_TOKEN:
-            logger.error("BOT_TOKEN не найден в .env файле!")
-            return
-        
-        logger.info("Инициализация бота...")
-        
-        application = Application.builder().token(BOT_TOKEN).build()
-        
-        # ===============================
-        # ConversationHandler-ы (добавляем ПЕРВЫМИ)
-        # ===============================
-        
-        # Обработчик регистрации
-        registration_handler = ConversationHandler(
-            entry_points=[
-                CommandHandler("register", start_registration),
-                CallbackQueryHandler(start_registration, pattern="^start_registration$")
+# Типы обновлений, которые запрашиваем у Telegram
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+async def post_init(application: Application):
+    """Проверка соединения с БД и запуск фоновых задач перед обработкой обновлений"""
+    if not await db.run(db.check_health):
+        raise RuntimeError("Database health check failed")
+    
+    # Снимаем заявки, просроченные пока бот был выключен, и планируем следующие
+    await ExpiryService.schedule(application)
+    
+    # Прошедшие турниры уходят в архив вместе с участиями
+    await ArchiveService.schedule(application)
+    
+    # Текущее состояние очереди обновлений и кэшей отдаётся вместе с метриками
+    metrics.add_collector('bot_update_processor', application.update_processor.stats)
+    metrics.add_collector('bot_user_cache', user_cache.stats)
+    metrics.add_collector('bot_card_cache', card_cache.stats)
+    metrics.add_collector('bot_eligibility_index', eligibility_index.stats)
+    metrics.add_collector('bot_persistence', application.persistence.stats)
+    await start_metrics_server()
+    
+    # Запись входящих обновлений для нагрузочных тестов (если включена в настройках)
+    start_recording()
+
+async def post_shutdown(application: Application):
+    """Освобождение ресурсов после остановки бота"""
+    await stop_metrics_server()
+    stop_recording()
+    db.shutdown()
+
+def build_application() -> Application:
+    """Собрать приложение бота со всеми обработчиками, не запуская его"""
+    builder = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        # Время и ошибки запросов к Bot API попадают в метрики (getUpdates не учитывается)
+        .request(InstrumentedRequest(connection_pool_size=256))
+        # Ответы getUpdates можно записывать для воспроизведения (UPDATE_RECORD_PATH)
+        .get_updates_request(RecordingRequest(connection_pool_size=1))
+        # Обновления разных чатов обрабатываются параллельно, одного чата - по очереди
+        .concurrent_updates(ChatOrderedUpdateProcessor(UPDATE_CONCURRENCY, UPDATE_MAX_PENDING))
+        # Состояния диалогов и user_data переживают перезапуск бота
+        .persistence(SQLitePersistence())
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    
+    if BOT_API_BASE_URL:
+        builder = builder.base_url(f"{BOT_API_BASE_URL.rstrip('/')}/bot")
+    
+    # В режиме вебхука обновления принимает встроенный HTTP-сервер, Updater не нужен
+    if BOT_MODE == 'webhook':
+        builder = builder.updater(None)
+    
+    application = builder.build()
+    
+    # ===============================
+    # ConversationHandler-ы (добавляем ПЕРВЫМИ)
+    # ===============================
+    
+    # Обработчик регистрации
+    registration_handler = ConversationHandler(
+        entry_points=[
+            CommandHandler("register", start_registration),
+            CallbackQueryHandler(start_registration, pattern="^start_registration$")
+        ],
+        states={
+            RegistrationStates.WAITING_FULL_NAME: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, ask_full_name)
             ],
-            states={
-                RegistrationStates.WAITING_FULL_NAME: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, ask_full_name)
-                ],
-                RegistrationStates.WAITING_PHONE: [
-                    MessageHandler(filters.CONTACT, handle_contact_share),
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, handle_contact_share)
-                ]
-            },
-            fallbacks=[CommandHandler("cancel", cancel_registration)],
-            per_message=False
-        )
-        
-        tournament_creation_handler = ConversationHandler(
-            entry_points=[
-                CallbackQueryHandler(start_tournament_creation, pattern="^create_tournament$")
+            RegistrationStates.WAITING_PHONE: [
+                MessageHandler(filters.CONTACT, handle_contact_share),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_contact_share)
+            ]
+        },
+        fallbacks=[CommandHandler("cancel", cancel_registration)],
+        per_message=False,
+        name="registration",
+        persistent=True
+    )
+    
+    tournament_creation_handler = ConversationHandler(
+        entry_points=[
+            CallbackQueryHandler(start_tournament_creation, pattern="^create_tournament$")
+        ],
+        states={
+            TournamentCreationStates.WAITING_TYPE: [
+                CallbackQueryHandler(handle_tournament_type, pattern="^tournament_type_")
             ],
-            states={
-                TournamentCreationStates.WAITING_TYPE: [
-                    CallbackQueryHandler(handle_tournament_type, pattern="^tournament_type_")
-                ],
-                TournamentCreationStates.WAITING_NAME: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_name)
-                ],
-                TournamentCreationStates.WAITING_DATE: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_date)
-                ],
-                TournamentCreationStates.WAITING_LOCATION: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_location)
-                ],
-                TournamentCreationStates.WAITING_FORMAT: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_format)
-                ],
-                TournamentCreationStates.WAITING_ENTRY_FEE: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_entry_fee)
-                ],
-                TournamentCreationStates.WAITING_DESCRIPTION: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, ask_level_restriction)  # ← ИЗМЕНИЛИ!
-                ],
-                # НОВЫЕ СОСТОЯНИЯ:
-                TournamentCreationStates.WAITING_LEVEL_RESTRICTION: [
-                    CallbackQueryHandler(handle_level_restriction_choice, pattern="^level_(open|restricted)$")
-                ],
-                TournamentCreationStates.WAITING_MIN_LEVEL: [
-                    CallbackQueryHandler(handle_min_level_selection, pattern="^minlevel_")
-                ],
-                TournamentCreationStates.WAITING_MAX_LEVEL: [
-                    CallbackQueryHandler(handle_max_level_selection, pattern="^maxlevel_")
-                ]
-            },
-            fallbacks=[
-                CommandHandler("cancel", cancel_tournament_creation),
-                CallbackQueryHandler(cancel_tournament_creation_callback, pattern="^admin_panel_return$")
+            TournamentCreationStates.WAITING_NAME: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_name)
             ],
-            per_message=False
-        )
-        
-        # ConversationHandler для редактирования профиля
-        profile_edit_handler = ConversationHandler(
-            entry_points=[
-                CallbackQueryHandler(start_edit_profile, pattern="^edit_profile$")
+            TournamentCreationStates.WAITING_DATE: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_date)
             ],
-            states={
-                ProfileStates.EDITING_NAME: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, handle_new_name)
-                ]
-            },
-            fallbacks=[],
-            per_message=False
-        )
-        
-        # Обработчик редактирования турнира
-        tournament_edit_handler = ConversationHandler(
-            entry_points=[
-                CallbackQueryHandler(start_tournament_edit, pattern="^edit_tournament$")
+            TournamentCreationStates.WAITING_LOCATION: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_location)
             ],
-            states={
-                TournamentEditStates.SELECTING_TOURNAMENT: [
-                    CallbackQueryHandler(select_tournament_for_edit, pattern="^edit_tournament_[0-9]+$"),
-                    CallbackQueryHandler(edit_tournament_field, pattern="^edit_field_"),
-                    CallbackQueryHandler(finish_tournament_edit, pattern="^finish_edit$")
-                ],
-                TournamentEditStates.EDITING_NAME: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
-                ],
-                TournamentEditStates.EDITING_DATE: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
-                ],
-                TournamentEditStates.EDITING_LOCATION: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
-                ],
-                TournamentEditStates.EDITING_FORMAT: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
-                ],
-                TournamentEditStates.EDITING_ENTRY_FEE: [  
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
-                ],
-                TournamentEditStates.EDITING_DESCRIPTION: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
-                ]
-            },
-            fallbacks=[
-                CallbackQueryHandler(cancel_field_edit, pattern="^cancel_field_edit$"),
-                CallbackQueryHandler(cancel_tournament_creation_callback, pattern="^admin_panel_return$")
+            TournamentCreationStates.WAITING_FORMAT: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_format)
             ],
-            per_message=False
-        )
-        
-        # ===============================
-        # НОВЫЙ ConversationHandler для редактирования пользователей
-        # ===============================
-        user_edit_handler = ConversationHandler(
-            entry_points=[
-                CallbackQueryHandler(start_user_edit, pattern="^edit_user$")
+            TournamentCreationStates.WAITING_ENTRY_FEE: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, ask_tournament_entry_fee)
             ],
-            states={
-                UserEditStates.WAITING_TELEGRAM_ID: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, find_user_by_id)
-                ],
-                UserEditStates.SHOWING_USER_CARD: [
-                    CallbackQueryHandler(start_edit_name, pattern="^edit_user_name$"),
-                    CallbackQueryHandler(start_edit_level, pattern="^edit_user_level$"),
-                    CallbackQueryHandler(show_user_card_callback, pattern="^show_user_card_return$"),
-                    CallbackQueryHandler(start_user_edit, pattern="^edit_user$")  # ← ДОБАВИТЬ ЭТУ СТРОКУ
-                ],
-                UserEditStates.EDITING_NAME: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, handle_user_new_name)
-                ],
-                UserEditStates.SELECTING_CATEGORY: [
-                    CallbackQueryHandler(select_level_category, pattern="^select_category_"),
-                    CallbackQueryHandler(reset_user_level, pattern="^reset_level$")
-                ],
-                UserEditStates.SELECTING_LEVEL: [
-                    CallbackQueryHandler(save_selected_level, pattern="^set_level_"),
-                    CallbackQueryHandler(start_edit_level, pattern="^edit_user_level$")
-                ]
-            },
-            fallbacks=[
-                CallbackQueryHandler(cancel_user_edit, pattern="^cancel_user_edit$"),
-                CallbackQueryHandler(cancel_user_edit, pattern="^admin_panel_return$")
+            TournamentCreationStates.WAITING_DESCRIPTION: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, ask_level_restriction)  # ← ИЗМЕНИЛИ!
             ],
-            per_message=False
-        )
-        
-        # ===============================
-        # Добавляем обработчики в правильном порядке
-        # ===============================
-        
-        # 1. Команды
-        application.add_handler(CommandHandler("start", start_command))
-        application.add_handler(CommandHandler("admin", admin_panel))
-        application.add_handler(CommandHandler("tournaments", show_tournaments_list))
-        
-        # 2. ConversationHandler-ы (ВАЖНО: добавляем ПЕРЕД callback обработчиками)
-        application.add_handler(registration_handler)
-        application.add_handler(tournament_creation_handler)
-        application.add_handler(profile_edit_handler)
-        application.add_handler(tournament_edit_handler)
-        application.add_handler(user_edit_handler)  # ← НОВЫЙ HANDLER!
-        
-        # 3. Callback обработчики для турниров
-        application.add_handler(CallbackQueryHandler(show_tournament_details, pattern="^tournament_"))
-        application.add_handler(CallbackQueryHandler(back_to_tournaments, pattern="^back_to_tournaments$"))
-        application.add_handler(CallbackQueryHandler(join_tournament, pattern="^join_"))
-        application.add_handler(CallbackQueryHandler(leave_tournament, pattern="^leave_"))
-        application.add_handler(CallbackQueryHandler(confirm_leave_tournament, pattern="^confirm_leave_"))
-        application.add_handler(CallbackQueryHandler(cancel_leave_tournament, pattern="^cancel_leave_"))
-        
-        # 4. Обработчики участия
-        application.add_handler(CallbackQueryHandler(handle_confirmed_status, pattern="^confirmed_"))
-        application.add_handler(CallbackQueryHandler(handle_pending_status, pattern="^pending_"))
-        
-        # 5. Админские обработчики
-        application.add_handler(CallbackQueryHandler(show_moderation_menu, pattern="^admin_moderation$"))
-        application.add_handler(CallbackQueryHandler(show_tournament_moderation, pattern="^moderate_"))
-        application.add_handler(CallbackQueryHandler(show_participant_moderation, pattern="^participant_"))
-        application.add_handler(CallbackQueryHandler(approve_participant, pattern="^approve_"))
-        application.add_handler(CallbackQueryHandler(reject_participant, pattern="^reject_"))
-        application.add_handler(CallbackQueryHandler(show_admin_tournaments, pattern="^admin_tournaments$"))
-        application.add_handler(CallbackQueryHandler(show_tournament_management, pattern="^admin_tournament_"))
-        application.add_handler(CallbackQueryHandler(archive_tournament, pattern="^archive_"))
-        
-        # 6. Управление участниками турниров
-        application.add_handler(CallbackQueryHandler(export_participants, pattern="^export_[0-9]+$"))
-        application.add_handler(CallbackQueryHandler(show_participants_list, pattern="^participants_list_"))
-        application.add_handler(CallbackQueryHandler(manage_participant, pattern="^manage_participant_"))
-        application.add_handler(CallbackQueryHandler(remove_participant, pattern="^remove_participant_"))
-        
-        # 7. Экспорт пользователей
-        application.add_handler(CallbackQueryHandler(export_all_users, pattern="^export_all_users$"))
-        application.add_handler(CallbackQueryHandler(export_all_users, pattern="^users_export$"))
-        
-        # 8. Профиль
-        application.add_handler(CallbackQueryHandler(save_profile, pattern="^save_profile$"))
-        application.add_handler(CallbackQueryHandler(cancel_edit, pattern="^cancel_edit$"))
-        application.add_handler(CallbackQueryHandler(enter_cabinet, pattern="^enter_cabinet$"))
+            # НОВЫЕ СОСТОЯНИЯ:
+            TournamentCreationStates.WAITING_LEVEL_RESTRICTION: [
+                CallbackQueryHandler(handle_level_restriction_choice, pattern="^level_(open|restricted)$")
+            ],
+            TournamentCreationStates.WAITING_MIN_LEVEL: [
+                CallbackQueryHandler(handle_min_level_selection, pattern="^minlevel_")
+            ],
+            TournamentCreationStates.WAITING_MAX_LEVEL: [
+                CallbackQueryHandler(handle_max_level_selection, pattern="^maxlevel_")
+            ]
+        },
+        fallbacks=[
+            CommandHandler("cancel", cancel_tournament_creation),
+            CallbackQueryHandler(cancel_tournament_creation_callback, pattern="^admin_panel_return$")
+        ],
+        per_message=False,
+        name="tournament_creation",
+        persistent=True
+    )
+    
+    # ConversationHandler для редактирования профиля
+    profile_edit_handler = ConversationHandler(
+        entry_points=[
+            CallbackQueryHandler(start_edit_profile, pattern="^edit_profile$")
+        ],
+        states={
+            ProfileStates.EDITING_NAME: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_new_name)
+            ]
+        },
+        fallbacks=[],
+        per_message=False,
+        name="profile_edit",
+        persistent=True
+    )
+    
+    # Обработчик редактирования турнира
+    tournament_edit_handler = ConversationHandler(
+        entry_points=[
+            CallbackQueryHandler(start_tournament_edit, pattern="^edit_tournament$")
+        ],
+        states={
+            TournamentEditStates.SELECTING_TOURNAMENT: [
+                CallbackQueryHandler(select_tournament_for_edit, pattern="^edit_tournament_[0-9]+$"),
+                CallbackQueryHandler(edit_tournament_field, pattern="^edit_field_"),
+                CallbackQueryHandler(finish_tournament_edit, pattern="^finish_edit$")
+            ],
+            TournamentEditStates.EDITING_NAME: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
+            ],
+            TournamentEditStates.EDITING_DATE: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
+            ],
+            TournamentEditStates.EDITING_LOCATION: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
+            ],
+            TournamentEditStates.EDITING_FORMAT: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
+            ],
+            TournamentEditStates.EDITING_ENTRY_FEE: [  
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
+            ],
+            TournamentEditStates.EDITING_DESCRIPTION: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_field_edit)
+            ]
+        },
+        fallbacks=[
+            CallbackQueryHandler(cancel_field_edit, pattern="^cancel_field_edit$"),
+            CallbackQueryHandler(cancel_tournament_creation_callback, pattern="^admin_panel_return$")
+        ],
+        per_message=False,
+        name="tournament_edit",
+        persistent=True
+    )
+    
+    # ===============================
+    # НОВЫЙ ConversationHandler для редактирования пользователей
+    # ===============================
+    user_edit_handler = ConversationHandler(
+        entry_points=[
+            CallbackQueryHandler(start_user_edit, pattern="^edit_user$")
+        ],
+        states={
+            UserEditStates.WAITING_TELEGRAM_ID: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, find_user_by_id)
+            ],
+            UserEditStates.SHOWING_USER_CARD: [
+                CallbackQueryHandler(start_edit_name, pattern="^edit_user_name$"),
+                CallbackQueryHandler(start_edit_level, pattern="^edit_user_level$"),
+                CallbackQueryHandler(show_user_card_callback, pattern="^show_user_card_return$"),
+                CallbackQueryHandler(start_user_edit, pattern="^edit_user$")  # ← ДОБАВИТЬ ЭТУ СТРОКУ
+            ],
+            UserEditStates.EDITING_NAME: [
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_user_new_name)
+            ],
+            UserEditStates.SELECTING_CATEGORY: [
+                CallbackQueryHandler(select_level_category, pattern="^select_category_"),
+                CallbackQueryHandler(reset_user_level, pattern="^reset_level$")
+            ],
+            UserEditStates.SELECTING_LEVEL: [
+                CallbackQueryHandler(save_selected_level, pattern="^set_level_"),
+                CallbackQueryHandler(start_edit_level, pattern="^edit_user_level$")
+            ]
+        },
+        fallbacks=[
+            CallbackQueryHandler(cancel_user_edit, pattern="^cancel_user_edit$"),
+            CallbackQueryHandler(cancel_user_edit, pattern="^admin_panel_return$")
+        ],
+        per_message=False,
+        name="user_edit",
+        persistent=True
+    )
+    
+    # ===============================
+    # Добавляем обработчики в правильном порядке
+    # ===============================
+    
+    # 1. Команды
+    application.add_handler(CommandHandler("start", start_command))
+    application.add_handler(CommandHandler("admin", admin_panel))
+    application.add_handler(CommandHandler("tournaments", show_tournaments_list))
+    
+    # 2. ConversationHandler-ы (ВАЖНО: добавляем ПЕРЕД callback обработчиками)
+    application.add_handler(registration_handler)
+    application.add_handler(tournament_creation_handler)
+    application.add_handler(profile_edit_handler)
+    application.add_handler(tournament_edit_handler)
+    application.add_handler(user_edit_handler)  # ← НОВЫЙ HANDLER!
+    
+    # 3. Кнопки вне диалогов: один роутер, обработчик выбирается по действию из callback_data
+    router = CallbackRouter()
+    
+    # Турниры
+    router.add("tournament", show_tournament_details)
+    router.add("back_to_tournaments", back_to_tournaments)
+    router.add("my_tournaments", show_eligible_tournaments)
+    router.add("join", join_tournament)
+    router.add("leave", leave_tournament)
+    router.add("confirm_leave", confirm_leave_tournament)
+    router.add("cancel_leave", cancel_leave_tournament)
+    
+    # Участие
+    router.add("confirmed", handle_confirmed_status)
+    router.add("pending", handle_pending_status)
+    
+    # Админские обработчики
+    router.add("admin_moderation", show_moderation_menu)
+    router.add("moderate", show_tournament_moderation)
+    router.add("participant", show_participant_moderation)
+    router.add("approve", approve_participant)
+    router.add("reject", reject_participant)
+    router.add("admin_tournaments", show_admin_tournaments)
+    router.add("admin_tournament", show_tournament_management)
+    router.add("admin_archive", show_archived_tournaments)
+    router.add("archive", archive_tournament)
+    
+    # Управление участниками турниров
+    router.add("export", export_participants)
+    router.add("participants_list", show_participants_list)
+    router.add("manage_participant", manage_participant)
+    router.add("remove_participant", remove_participant)
+    
+    # Экспорт пользователей
+    router.add("export_all_users", export_all_users)
+    router.add("users_export", export_all_users)
+    
+    # Профиль
+    router.add("save_profile", save_profile)
+    router.add("cancel_edit", cancel_edit)
+    router.add("enter_cabinet", enter_cabinet)
+    
+    # Общие admin обработчики
+    router.add("admin_panel_return", return_to_admin_panel)
+    
+    application.add_handler(router)
+    
+    # 4. Обработчик текстовых сообщений (ДОЛЖЕН БЫТЬ ПОСЛЕДНИМ)
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_menu_buttons))
+    
+    # Необработанные исключения: в лог и в метрики
+    application.add_error_handler(handle_error)
+    
+    return application
+
+def main():
+    """Главная функция запуска бота"""
+    try:
+        if not BOT_TOKEN:
+            logger.error("BOT_TOKEN не найден в .env файле!")
+            return
         
-        # 9. Общие admin обработчики (в конце)
-        application.add_handler(CallbackQueryHandler(return_to_admin_panel, pattern="^admin_panel_return$"))
+        logger.info("Инициализация бота...")
         
-        # 10. Обработчик текстовых сообщений (ДОЛЖЕН БЫТЬ ПОСЛЕДНИМ)
-        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_menu_buttons))
+        application = build_application()
         
         logger.info("Бот запущен! Нажмите Ctrl+C для остановки.")
         
-        application.run_polling(allowed_updates=["message", "callback_query"])
+        if BOT_MODE == 'webhook':
+            from utils.webhook_server import serve_webhook
+            asyncio.run(serve_webhook(application, ALLOWED_UPDATES))
+        else:
+            application.run_polling(allowed_updates=ALLOWED_UPDATES)
         
     except Exception as e:
         logger.error(f"Критическая ошибка при запуске бота: {e}")
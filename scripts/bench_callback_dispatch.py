@@ -0,0 +1,126 @@
+"""
+Стоимость выбора обработчика нажатия кнопки: CallbackRouter против цепочки regex
+
+Прежде каждая кнопка проверялась по очереди регулярными выражениями ~30
+CallbackQueryHandler (порядок из main.py до перехода на роутер). Теперь
+CallbackRouter разбирает callback_data один раз и выбирает обработчик по
+словарю. Замеряется только выбор обработчика (check_update) для набора
+типичных кнопок; ConversationHandler-ы стоят перед обоими вариантами
+одинаково и в замер не входят.
+
+Пример:
+    python scripts/bench_callback_dispatch.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Шаблоны CallbackQueryHandler верхнего уровня в порядке регистрации до CallbackRouter
+LEGACY_PATTERNS = (
+    "^tournament_", "^back_to_tournaments$", "^join_", "^leave_", "^confirm_leave_", "^cancel_leave_",
+    "^confirmed_", "^pending_",
+    "^admin_moderation$", "^moderate_", "^participant_", "^approve_", "^reject_",
+    "^admin_tournaments$", "^admin_tournament_", "^archive_",
+    "^export_[0-9]+$", "^participants_list_", "^manage_participant_", "^remove_participant_",
+    "^export_all_users$", "^users_export$",
+    "^save_profile$", "^cancel_edit$", "^enter_cabinet$",
+    "^admin_panel_return$",
+)
+
+# Типичные нажатия: от первых шаблонов цепочки до последних
+SAMPLE_CALLBACKS = (
+    "tournament_12", "join_12", "leave_12", "confirm_leave_12", "pending_12",
+    "approve_345", "admin_tournament_12", "participants_list_12",
+    "manage_participant_12_7", "remove_participant_12_7", "export_all_users", "admin_panel_return",
+)
+
+
+def prepare_environment():
+    """Временная БД и переменные окружения до импорта модулей бота"""
+    workdir = tempfile.mkdtemp(prefix='bench_callback_dispatch_')
+    os.chdir(workdir)
+    os.makedirs('logs', exist_ok=True)
+    os.environ.update({
+        'BOT_TOKEN': '123456:BENCHMARK',
+        'DATABASE_PATH': os.path.join(workdir, 'tournament.db'),
+        'METRICS_PORT': '0'
+    })
+    sys.path.insert(0, REPO_ROOT)
+    return workdir
+
+
+def callback_update(bot, data: str):
+    from telegram import Update
+
+    user = {'id': 1000000, 'is_bot': False, 'first_name': 'Bench'}
+    return Update.de_json({
+        'update_id': 1,
+        'callback_query': {
+            'id': '1',
+            'from': user,
+            'chat_instance': '1',
+            'data': data,
+            'message': {'message_id': 1, 'date': 0, 'chat': {'id': 1000000, 'type': 'private'}, 'text': ''}
+        }
+    }, bot)
+
+
+def dispatch_chain(handlers, update):
+    """Как Application: первый обработчик, чей check_update вернул не None/False"""
+    for handler in handlers:
+        check = handler.check_update(update)
+        if check is not None and check is not False:
+            return handler
+    return None
+
+
+def measure(dispatch, updates, iterations: int) -> float:
+    """Среднее время выбора обработчика на одно обновление, мкс"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for update in updates:
+            dispatch(update)
+    return (time.perf_counter() - started) / (iterations * len(updates)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Выбор обработчика кнопки: CallbackRouter и цепочка regex")
+    parser.add_argument('--iterations', type=int, default=20000, help="сколько раз прогнать набор кнопок")
+    args = parser.parse_args()
+
+    prepare_environment()
+
+    from telegram.ext import CallbackQueryHandler
+    import main as bot_main
+    from utils.callback_router import CallbackRouter
+
+    application = bot_main.build_application()
+    router = next(handler for handler in application.handlers[0] if isinstance(handler, CallbackRouter))
+
+    async def noop(update, context):
+        pass
+
+    chain = [CallbackQueryHandler(noop, pattern=pattern) for pattern in LEGACY_PATTERNS]
+    updates = [callback_update(application.bot, data) for data in SAMPLE_CALLBACKS]
+
+    # Оба варианта должны находить обработчик для каждой кнопки
+    assert all(router.check_update(update) for update in updates)
+    assert all(dispatch_chain(chain, update) for update in updates)
+
+    chain_us = measure(lambda update: dispatch_chain(chain, update), updates, args.iterations)
+    router_us = measure(router.check_update, updates, args.iterations)
+
+    print(f"Кнопок в наборе: {len(updates)}, прогонов: {args.iterations}, шаблонов в цепочке: {len(chain)}")
+    print()
+    print(f"{'вариант':<16}{'мкс/обновление':>16}")
+    print(f"{'regex-цепочка':<16}{chain_us:>16.2f}")
+    print(f"{'CallbackRouter':<16}{router_us:>16.2f}")
+    print(f"Ускорение: x{chain_us / router_us:.1f}")
+
+
+if __name__ == '__main__':
+    main()
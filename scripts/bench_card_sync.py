@@ -0,0 +1,154 @@
+"""
+Пропускная способность обновления карточки турнира у всех, кто её смотрит
+
+Карточку турнира открыли N синтетических пользователей (по умолчанию 10 000),
+часть из них записана на турнир. Сравниваются два способа обновить карточку
+после изменения состава:
+    per-viewer - как было раньше: запрос статуса записи и своя клавиатура для
+                 каждого получателя, сообщения редактируются по одному;
+    sync       - SyncService.update_tournament_for_all: статусы одним запросом,
+                 клавиатура на каждый статус, конкурентная отправка через
+                 общий ограничитель скорости.
+
+Bot API заменён заглушкой с задержкой ответа --api-latency. Лимит Telegram
+(BROADCAST_GLOBAL_RATE) на время замера заменяется на --rate, чтобы мерить
+работу самого бота, а не ожидание лимита.
+
+Пример:
+    python scripts/bench_card_sync.py --viewers 10000 --api-latency 0.005
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_USER_ID = 1000000
+
+
+def prepare_environment():
+    """Временная БД и переменные окружения до импорта модулей бота"""
+    workdir = tempfile.mkdtemp(prefix='bench_card_sync_')
+    os.chdir(workdir)
+    os.environ.update({
+        'BOT_TOKEN': '123456:BENCHMARK',
+        'DATABASE_PATH': os.path.join(workdir, 'tournament.db'),
+        'METRICS_PORT': '0'
+    })
+    sys.path.insert(0, REPO_ROOT)
+    return workdir
+
+
+class FakeBot:
+    """Заглушка бота: editMessageText отвечает через latency секунд"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.edits = 0
+
+    async def edit_message_text(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.edits += 1
+
+
+def populate(viewers: int, registered: int) -> int:
+    """Создать турнир, его зрителей и записавшихся; вернуть ID турнира"""
+    from database.connection import db
+    from services.tournament_service import TournamentService
+
+    tournament_id = TournamentService.create_tournament_with_levels(
+        name='Bench Cup', date='01.01', location='Court', format_info='Americano',
+        entry_fee='5000', description='Benchmark', created_by=0
+    )
+    user_ids = range(FIRST_USER_ID, FIRST_USER_ID + viewers)
+    now = datetime.now()
+
+    with db.get_connection() as conn:
+        conn.executemany("""
+            INSERT INTO tournament_views (user_id, tournament_id, chat_id, message_id, viewed_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(user_id, tournament_id, user_id, 1, now) for user_id in user_ids])
+        conn.executemany("""
+            INSERT INTO participations (user_id, tournament_id, status) VALUES (?, ?, ?)
+        """, [(user_id, tournament_id, 'confirmed' if i % 2 else 'pending')
+              for i, user_id in enumerate(user_ids[:registered])])
+        conn.commit()
+
+    return tournament_id
+
+
+async def sync_per_viewer(bot, tournament_id: int):
+    """Прежний способ: запрос и клавиатура на каждого получателя, отправка по одному"""
+    from services.card_service import CardService
+    from services.participation_service import AsyncParticipationService
+    from services.viewer_service import AsyncViewerService
+    from utils.tournament_card import get_tournament_card_keyboard
+
+    viewers = await AsyncViewerService.get_viewers(tournament_id)
+    card = await CardService.get_card(tournament_id)
+
+    for view in viewers:
+        participation = await AsyncParticipationService.get_user_participation_status(view['user_id'], tournament_id)
+        await bot.edit_message_text(
+            chat_id=view['chat_id'],
+            message_id=view['message_id'],
+            text=card['text'],
+            reply_markup=get_tournament_card_keyboard(tournament_id, card['counts'], participation)
+        )
+
+
+def query_count() -> int:
+    from utils.metrics import db_query_duration
+    return sum(db_query_duration.count(*labels) for labels in db_query_duration.label_values())
+
+
+async def run(args):
+    workdir = prepare_environment()
+
+    from services import broadcast_service
+    from services.broadcast_service import RateLimiter
+    from services.sync_service import SyncService
+
+    broadcast_service.rate_limiter = RateLimiter(args.rate, 0)
+    tournament_id = populate(args.viewers, args.registered)
+
+    print(f"Зрителей карточки: {args.viewers}, записано: {args.registered}, "
+          f"задержка Bot API: {args.api_latency * 1000:.0f} мс, лимит: {args.rate:.0f} сообщений/с")
+    print()
+    print(f"{'способ':<12}{'время, с':>10}{'сообщений/с':>14}{'SQL-запросов':>14}")
+
+    modes = [('sync', lambda bot: SyncService.update_tournament_for_all(SimpleNamespace(bot=bot), tournament_id))]
+    if not args.skip_baseline:
+        modes.insert(0, ('per-viewer', lambda bot: sync_per_viewer(bot, tournament_id)))
+
+    for mode, sync in modes:
+        bot = FakeBot(args.api_latency)
+        queries = query_count()
+        started = time.perf_counter()
+        await sync(bot)
+        elapsed = time.perf_counter() - started
+        print(f"{mode:<12}{elapsed:>10.2f}{bot.edits / elapsed:>14.0f}{query_count() - queries:>14}")
+
+    print()
+    print(f"Рабочий каталог: {workdir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Обновление карточки турнира у всех зрителей")
+    parser.add_argument('--viewers', type=int, default=10000, help="сколько пользователей смотрят карточку")
+    parser.add_argument('--registered', type=int, default=18, help="сколько из них записаны на турнир")
+    parser.add_argument('--api-latency', type=float, default=0.005, help="задержка ответа Bot API, секунд")
+    parser.add_argument('--rate', type=float, default=100000, help="лимит отправки на время замера, сообщений/с")
+    parser.add_argument('--skip-baseline', action='store_true', help="не замерять прежний способ (per-viewer)")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
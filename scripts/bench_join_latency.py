@@ -0,0 +1,140 @@
+"""
+Задержка обработки кнопки записи (join_) при одновременных нажатиях
+
+Одновременные нажатия «Записаться» (по умолчанию 500) обрабатываются в одном
+event loop двумя способами:
+    blocking - запросы к SQLite выполняются прямо в корутине, как до переноса
+               работы с БД в отдельные потоки: пока идёт запрос, event loop стоит;
+    executor - запросы идут через db.run, как в обработчиках бота.
+
+Каждое нажатие повторяет запросы обработчика join_tournament: пользователь,
+турнир, текущая запись, запись со статусом pending. Параллельно работает
+«лёгкий» обработчик, который просыпается каждую миллисекунду, - его опоздание
+показывает, насколько заблокирован event loop для остальных пользователей.
+
+Пример:
+    python scripts/bench_join_latency.py --callbacks 500 --tournaments 10
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from bot_load_test import percentiles
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_USER_ID = 1000000
+TICK_SECONDS = 0.001
+
+
+def prepare_environment():
+    """Временная БД и переменные окружения до импорта модулей бота"""
+    workdir = tempfile.mkdtemp(prefix='bench_join_latency_')
+    os.chdir(workdir)
+    os.environ.update({
+        'BOT_TOKEN': '123456:BENCHMARK',
+        'DATABASE_PATH': os.path.join(workdir, 'tournament.db'),
+        'METRICS_PORT': '0'
+    })
+    sys.path.insert(0, REPO_ROOT)
+    return workdir
+
+
+async def run_mode(mode, user_ids, tournament_ids):
+    """Обработать нажатия одним способом, вернуть задержки нажатий и опоздания лёгкого обработчика"""
+    from database.connection import db
+    from services.participation_service import ParticipationService
+    from services.tournament_service import TournamentService
+    from services.user_service import UserService
+
+    async def call(func, *args):
+        if mode == 'blocking':
+            return func(*args)
+        return await db.run(func, *args)
+
+    async def join(user_id, tournament_id, arrived):
+        await call(UserService.get_user_by_telegram_id, user_id)
+        await call(TournamentService.get_tournament_by_id, tournament_id)
+        await call(ParticipationService.get_user_participation_status, user_id, tournament_id)
+        await call(ParticipationService.add_participant_pending, user_id, tournament_id)
+        # Задержка от момента, когда все нажатия пришли, до ответа
+        return time.perf_counter() - arrived
+
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(time.perf_counter() - started - TICK_SECONDS)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK_SECONDS)
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(
+        join(user_id, tournament_ids[i % len(tournament_ids)], started)
+        for i, user_id in enumerate(user_ids)
+    ))
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    await ticker_task
+    return latencies, lags, elapsed
+
+
+async def run(args):
+    workdir = prepare_environment()
+
+    from config import DB_EXECUTOR_WORKERS
+    from database.connection import db
+    from services.tournament_service import TournamentService
+    from services.user_service import UserService
+
+    for i in range(args.callbacks * 2):
+        user_id = FIRST_USER_ID + i
+        UserService.register_user(user_id, f'Bench User {user_id}', f'+7{user_id}', '3.0', 'adult')
+
+    print(f"Нажатий: {args.callbacks} одновременно, турниров: {args.tournaments}, потоков БД: {DB_EXECUTOR_WORKERS}")
+    print()
+    print(f"{'режим':<10}{'всего, с':>10}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}"
+          f"{'лаг p99, мс':>14}{'лаг max, мс':>14}")
+
+    for offset, mode in enumerate(('blocking', 'executor')):
+        # Каждому режиму - свои турниры и пользователи, чтобы условия записи совпадали
+        tournament_ids = [
+            TournamentService.create_tournament_with_levels(
+                name=f'Bench Cup {mode} {i + 1}', date='01.01', location='Court', format_info='Americano',
+                entry_fee='5000', description='Benchmark', created_by=0
+            )
+            for i in range(args.tournaments)
+        ]
+        first = FIRST_USER_ID + offset * args.callbacks
+        user_ids = list(range(first, first + args.callbacks))
+
+        latencies, lags, elapsed = await run_mode(mode, user_ids, tournament_ids)
+        p50, p95, p99 = percentiles(latencies)
+        lag_p99 = percentiles(lags)[2]
+        print(f"{mode:<10}{elapsed:>10.2f}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}"
+              f"{lag_p99 * 1000:>14.1f}{max(lags) * 1000:>14.1f}")
+
+    db.shutdown()
+    print()
+    print(f"Рабочий каталог: {workdir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка кнопки записи: запросы в event loop и через потоки БД")
+    parser.add_argument('--callbacks', type=int, default=500, help="сколько одновременных нажатий «Записаться»")
+    parser.add_argument('--tournaments', type=int, default=10, help="между сколькими турнирами распределить нажатия")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Накладные расходы SQLitePersistence на одно обновление
+
+Синтетические пользователи проходят короткий диалог ConversationHandler
+(команда → имя → телефон), обработчики меняют context.user_data. Одни и те же
+обновления обрабатываются Application без persistence и с SQLitePersistence;
+в замер с persistence входит запись накопленных изменений в БД
+(update_persistence + flush), которую в работе бот делает раз в
+PERSISTENCE_UPDATE_INTERVAL секунд.
+
+Сеть не используется: запросы к Bot API (только getMe при инициализации)
+обслуживает заглушка в памяти.
+
+Пример:
+    python scripts/bench_persistence.py --users 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEST_TOKEN = '123456:BENCHMARK'
+FIRST_USER_ID = 1000000
+NAME, PHONE = range(2)
+
+
+def prepare_environment():
+    """Временная БД и переменные окружения до импорта модулей бота"""
+    workdir = tempfile.mkdtemp(prefix='bench_persistence_')
+    os.chdir(workdir)
+    os.environ.update({
+        'BOT_TOKEN': TEST_TOKEN,
+        'DATABASE_PATH': os.path.join(workdir, 'tournament.db'),
+        'METRICS_PORT': '0'
+    })
+    sys.path.insert(0, REPO_ROOT)
+    return workdir
+
+
+def offline_request():
+    """Заглушка HTTP-клиента бота: отвечает только на getMe"""
+    from telegram.request import BaseRequest
+
+    class OfflineRequest(BaseRequest):
+        async def initialize(self):
+            pass
+
+        async def shutdown(self):
+            pass
+
+        async def do_request(self, url, method, request_data=None, read_timeout=None,
+                             write_timeout=None, connect_timeout=None, pool_timeout=None):
+            result = {'id': int(TEST_TOKEN.split(':')[0]), 'is_bot': True,
+                      'first_name': 'Benchmark Bot', 'username': 'benchmark_bot'}
+            return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+    return OfflineRequest()
+
+
+def build_application(persistence):
+    from telegram.ext import Application, CommandHandler, ConversationHandler, MessageHandler, filters
+
+    async def start(update, context):
+        context.user_data['step'] = 'name'
+        return NAME
+
+    async def name(update, context):
+        context.user_data['full_name'] = update.message.text
+        return PHONE
+
+    async def phone(update, context):
+        context.user_data['phone_number'] = update.message.text
+        context.user_data.pop('step', None)
+        return ConversationHandler.END
+
+    builder = (
+        Application.builder()
+        .token(TEST_TOKEN)
+        .request(offline_request())
+        .get_updates_request(offline_request())
+    )
+    if persistence is not None:
+        builder = builder.persistence(persistence)
+    application = builder.build()
+
+    application.add_handler(ConversationHandler(
+        entry_points=[CommandHandler('start', start)],
+        states={
+            NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, name)],
+            PHONE: [MessageHandler(filters.TEXT & ~filters.COMMAND, phone)],
+        },
+        fallbacks=[],
+        name='bench_registration',
+        persistent=persistence is not None
+    ))
+    return application
+
+
+def make_updates(bot, users: int):
+    """Обновления диалога для всех пользователей, перемешанные по шагам"""
+    from telegram import Update
+
+    updates = []
+    for step, text in enumerate(('/start', 'Игрок Тестовый', '+77000000000')):
+        for i in range(users):
+            user_id = FIRST_USER_ID + i
+            message = {
+                'message_id': step + 1,
+                'date': 0,
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': {'id': user_id, 'is_bot': False, 'first_name': 'Bench'},
+                'text': text
+            }
+            if text.startswith('/'):
+                message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+            updates.append(Update.de_json({'update_id': len(updates) + 1, 'message': message}, bot))
+    return updates
+
+
+async def measure(persistence, users: int):
+    """Время обработки всех обновлений и время записи persistence, секунд"""
+    application = build_application(persistence)
+    await application.initialize()
+    updates = make_updates(application.bot, users)
+
+    started = time.perf_counter()
+    for update in updates:
+        await application.process_update(update)
+    processing = time.perf_counter() - started
+
+    flushing = 0.0
+    if persistence is not None:
+        started = time.perf_counter()
+        await application.update_persistence()
+        await persistence.flush()
+        flushing = time.perf_counter() - started
+
+    await application.shutdown()
+    return len(updates), processing, flushing
+
+
+async def run(args):
+    workdir = prepare_environment()
+
+    from database.persistence import SQLitePersistence
+
+    # Прогрев: первый проход платит за импорты и кэши регулярных выражений
+    await measure(None, args.users)
+
+    # Варианты чередуются, берётся медиана - так меньше влияние шума
+    baselines, processings, flushings = [], [], []
+    for _ in range(args.rounds):
+        count, baseline, _ = await measure(None, args.users)
+        persistence = SQLitePersistence()
+        _, processing, flushing = await measure(persistence, args.users)
+        baselines.append(baseline)
+        processings.append(processing)
+        flushings.append(flushing)
+
+    baseline = statistics.median(baselines)
+    processing = statistics.median(processings)
+    flushing = statistics.median(flushings)
+
+    def per_update(seconds):
+        return seconds / count * 1e6
+
+    print(f"Пользователей: {args.users}, обновлений: {count}, повторов: {args.rounds} (медиана)")
+    print()
+    print(f"{'вариант':<26}{'всего, мс':>12}{'мкс/обновление':>16}")
+    print(f"{'без persistence':<26}{baseline * 1000:>12.1f}{per_update(baseline):>16.1f}")
+    print(f"{'SQLitePersistence':<26}{processing * 1000:>12.1f}{per_update(processing):>16.1f}")
+    print(f"{'  запись в БД (flush)':<26}{flushing * 1000:>12.1f}{per_update(flushing):>16.1f}")
+    print(f"Накладные расходы: {per_update(processing + flushing - baseline):.1f} мкс на обновление")
+    print(f"Статистика записи (последний повтор): {persistence.stats()}")
+    print(f"Рабочий каталог: {workdir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Накладные расходы SQLitePersistence на обновление")
+    parser.add_argument('--users', type=int, default=2000, help="сколько пользователей проходят диалог")
+    parser.add_argument('--rounds', type=int, default=5, help="сколько раз повторить замер каждого варианта")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
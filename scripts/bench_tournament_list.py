@@ -0,0 +1,115 @@
+"""
+Время построения списка турниров при большом количестве активных турниров
+
+Создаётся N активных турниров (по умолчанию 200) с участниками, после чего
+список «🏆 Турниры» строится двумя способами:
+    per-tournament - как было раньше: get_all_tournaments() и отдельный
+                     get_participants_count() на каждый турнир;
+    grouped        - get_active_tournaments_with_counts(): турниры и количество
+                     участников одним запросом с GROUP BY.
+В замер входит построение клавиатуры списка (get_tournaments_list_keyboard).
+
+Пример:
+    python scripts/bench_tournament_list.py --tournaments 200 --repeat 50
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bot_load_test import percentiles
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_USER_ID = 1000000
+
+
+def prepare_environment():
+    """Временная БД и переменные окружения до импорта модулей бота"""
+    workdir = tempfile.mkdtemp(prefix='bench_tournament_list_')
+    os.chdir(workdir)
+    os.environ.update({
+        'BOT_TOKEN': '123456:BENCHMARK',
+        'DATABASE_PATH': os.path.join(workdir, 'tournament.db'),
+        'METRICS_PORT': '0'
+    })
+    sys.path.insert(0, REPO_ROOT)
+    return workdir
+
+
+def populate(tournaments: int):
+    """Активные турниры с разной заполненностью"""
+    from config import MAX_MAIN_PARTICIPANTS, MAX_RESERVE_PARTICIPANTS
+    from database.connection import db
+    from services.tournament_service import TournamentService
+
+    rows = []
+    for i in range(tournaments):
+        tournament_id = TournamentService.create_tournament_with_levels(
+            name=f'Bench Cup {i + 1}', date=f'{i % 28 + 1:02d}.12', location='Court',
+            format_info='Americano', entry_fee='5000', description='Benchmark', created_by=0
+        )
+        taken = random.randint(0, MAX_MAIN_PARTICIPANTS + MAX_RESERVE_PARTICIPANTS)
+        rows += [
+            (FIRST_USER_ID + n, tournament_id, random.choice(('confirmed', 'pending')))
+            for n in range(taken)
+        ]
+
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO participations (user_id, tournament_id, status) VALUES (?, ?, ?)", rows)
+        conn.commit()
+    return len(rows)
+
+
+def list_per_tournament():
+    """Прежний способ: список турниров и запрос количества участников на каждый"""
+    from services.participation_service import ParticipationService
+    from services.tournament_service import TournamentService
+    from utils.tournament_card import get_tournaments_list_keyboard
+
+    tournaments = [
+        dict(tournament, counts=ParticipationService.get_participants_count(tournament['id']))
+        for tournament in TournamentService.get_all_tournaments()
+    ]
+    return get_tournaments_list_keyboard(tournaments)
+
+
+def list_grouped():
+    from services.tournament_service import TournamentService
+    from utils.tournament_card import get_tournaments_list_keyboard
+
+    return get_tournaments_list_keyboard(TournamentService.get_active_tournaments_with_counts())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Построение списка турниров: запрос на турнир и один GROUP BY")
+    parser.add_argument('--tournaments', type=int, default=200, help="сколько активных турниров создать")
+    parser.add_argument('--repeat', type=int, default=50, help="сколько раз построить список каждым способом")
+    args = parser.parse_args()
+
+    workdir = prepare_environment()
+    participants = populate(args.tournaments)
+
+    print(f"Активных турниров: {args.tournaments}, записей: {participants}, повторов: {args.repeat}")
+    print()
+    print(f"{'способ':<16}{'p50, мс':>10}{'p95, мс':>10}{'max, мс':>10}")
+
+    for name, build in (('per-tournament', list_per_tournament), ('grouped', list_grouped)):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            keyboard = build()
+            timings.append(time.perf_counter() - started)
+
+        assert len(keyboard.inline_keyboard) == args.tournaments + 1
+        p50, p95, _ = percentiles(timings)
+        print(f"{name:<16}{p50 * 1000:>10.2f}{p95 * 1000:>10.2f}{max(timings) * 1000:>10.2f}")
+
+    print()
+    print(f"Рабочий каталог: {workdir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Пиковая память (RSS) и время выгрузки всех пользователей в Excel
+
+В БД создаётся N пользователей (по умолчанию 100 000), затем каждая выгрузка
+выполняется в отдельном процессе, чтобы пиковый RSS одного способа не влиял
+на другой:
+    fetchall  - как было раньше: get_all_users() читает таблицу целиком,
+                книга xlsxwriter в обычном режиме (все ячейки в памяти);
+    streaming - ExportService.write_users_xlsx: чтение порциями fetchmany,
+                режим constant_memory, запись в SpooledTemporaryFile.
+
+В отчёте: RSS процесса до выгрузки, пиковый RSS (ru_maxrss), прирост и время.
+
+Пример:
+    python scripts/bench_users_export.py --users 100000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_USER_ID = 1000000
+MODES = ('fetchall', 'streaming')
+
+
+def prepare_environment(database: str):
+    """Переменные окружения до импорта модулей бота"""
+    os.environ.update({
+        'BOT_TOKEN': '123456:BENCHMARK',
+        'DATABASE_PATH': database,
+        'METRICS_PORT': '0'
+    })
+    sys.path.insert(0, REPO_ROOT)
+
+
+def current_rss_kb() -> int:
+    """Текущий RSS процесса, КБ (Linux)"""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+def populate(users: int):
+    """Пользователи с уровнями и без"""
+    from database.connection import db
+    from levels import LEVELS
+
+    level_codes = list(LEVELS) + [None]
+    with db.get_connection() as conn:
+        conn.executemany("""
+            INSERT INTO users (telegram_id, full_name, phone_number, skill_level, age_category, player_level)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (FIRST_USER_ID + i, f'Игрок Тестовый {i}', f'+7700{i:07d}', '3.0', 'adult',
+             level_codes[i % len(level_codes)])
+            for i in range(users)
+        ])
+        conn.commit()
+
+
+def export_fetchall(output) -> int:
+    """Прежний способ: вся таблица в памяти и книга без constant_memory"""
+    import xlsxwriter
+    from services.user_service import UserService
+
+    users = UserService.get_all_users()
+    workbook = xlsxwriter.Workbook(output)
+    worksheet = workbook.add_worksheet('Пользователи')
+    worksheet.write_row(0, 0, ['Telegram ID', 'ФИО', 'Телефон', 'Уровень игры', 'Дата регистрации'])
+    for row, user in enumerate(users, 1):
+        worksheet.write_row(row, 0, [
+            user['telegram_id'], user['full_name'], user['phone_number'],
+            user['player_level'] or 'Не установлен', user['created_at']
+        ])
+    workbook.close()
+    return len(users)
+
+
+def run_child(mode: str, database: str):
+    """Выполнить одну выгрузку и напечатать результат в JSON"""
+    prepare_environment(database)
+
+    from config import EXPORT_SPOOL_MAX_BYTES
+    from services.export_service import ExportService
+
+    rss_before = current_rss_kb()
+    started = time.perf_counter()
+
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES) as output:
+        if mode == 'streaming':
+            count = ExportService.write_users_xlsx(output)
+        else:
+            count = export_fetchall(output)
+        size = output.seek(0, os.SEEK_END)
+
+    print(json.dumps({
+        'count': count,
+        'size': size,
+        'elapsed': time.perf_counter() - started,
+        'rss_before': rss_before,
+        # На Linux ru_maxrss - в КБ
+        'rss_peak': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пиковая память и время выгрузки пользователей в Excel")
+    parser.add_argument('--users', type=int, default=100000, help="сколько пользователей создать")
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.database)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='bench_users_export_')
+    database = os.path.join(workdir, 'tournament.db')
+    prepare_environment(database)
+    populate(args.users)
+
+    print(f"Пользователей: {args.users}")
+    print()
+    print(f"{'способ':<12}{'RSS до, МБ':>12}{'пик, МБ':>10}{'прирост, МБ':>14}{'время, с':>10}{'файл, МБ':>10}")
+
+    for mode in MODES:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', mode, '--database', database],
+            cwd=workdir, capture_output=True, text=True, check=True
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        assert result['count'] == args.users, result
+
+        print(f"{mode:<12}{result['rss_before'] / 1024:>12.1f}{result['rss_peak'] / 1024:>10.1f}"
+              f"{(result['rss_peak'] - result['rss_before']) / 1024:>14.1f}"
+              f"{result['elapsed']:>10.2f}{result['size'] / 1024 / 1024:>10.1f}")
+
+    print()
+    print(f"Рабочий каталог: {workdir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+"""
+Нагрузочный тест бота целиком без Telegram
+
+Запускает настоящий граф обработчиков из main.build_application() в режиме
+polling против локальной заглушки Bot API (getUpdates, sendMessage,
+editMessageText, answerCallbackQuery, sendDocument и др.) на временной БД.
+Синтетические пользователи проходят сценарий регистрационного дня:
+/start → регистрация (ФИО, контакт) → список турниров → карточка →
+запись → отмена записи.
+
+Задержка шага - от появления обновления в getUpdates до ответа бота в чат
+пользователя (sendMessage или editMessageText). В отчёте: пропускная
+способность, p50/p95/p99 по шагам, ожидание потока БД и время BEGIN IMMEDIATE
+(ожидание блокировки записи SQLite).
+
+Пример:
+    python scripts/bot_load_test.py --users 500 --concurrency 100 --tournaments 5
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from aiohttp import web
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEST_TOKEN = '123456:LOAD-TEST'
+FIRST_USER_ID = 1000000
+
+# Шаги сценария в порядке прохождения
+STEPS = ('start', 'register', 'full_name', 'phone', 'browse', 'card', 'join', 'leave', 'confirm_leave')
+
+
+class FakeBotAPI:
+    """Заглушка Bot API: отдаёт обновления через getUpdates и принимает ответы бота"""
+
+    def __init__(self):
+        self._updates = collections.deque()
+        self._new_updates = asyncio.Event()
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        # chat_id -> очередь (время ответа, сообщение) для ожидающего пользователя
+        self.responses = {}
+        self.calls = collections.Counter()
+
+    def push(self, update: dict) -> float:
+        """Поставить обновление в очередь getUpdates, вернуть момент постановки"""
+        update['update_id'] = next(self._update_ids)
+        self._updates.append(update)
+        self._new_updates.set()
+        return time.perf_counter()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.calls[method] += 1
+
+        if request.content_type == 'application/json':
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+
+        handler = getattr(self, f"_api_{method}", None)
+        result = await handler(params) if handler else True
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _api_getMe(self, params):
+        return {'id': int(TEST_TOKEN.split(':')[0]), 'is_bot': True,
+                'first_name': 'Load Test Bot', 'username': 'load_test_bot'}
+
+    async def _api_getUpdates(self, params):
+        offset = int(params.get('offset') or 0)
+        deadline = time.monotonic() + float(params.get('timeout') or 0)
+        limit = int(params.get('limit') or 100)
+
+        while True:
+            while self._updates and self._updates[0]['update_id'] < offset:
+                self._updates.popleft()
+
+            if self._updates or time.monotonic() >= deadline:
+                return list(itertools.islice(self._updates, limit))
+
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                pass
+
+    def _message(self, params, message_id=None):
+        chat_id = int(params['chat_id'])
+        message = {
+            'message_id': int(message_id or next(self._message_ids)),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': params.get('text') or params.get('caption') or ''
+        }
+        queue = self.responses.get(chat_id)
+        if queue is not None:
+            queue.put_nowait((time.perf_counter(), message))
+        return message
+
+    async def _api_sendMessage(self, params):
+        return self._message(params)
+
+    async def _api_editMessageText(self, params):
+        return self._message(params, params.get('message_id'))
+
+    async def _api_editMessageReplyMarkup(self, params):
+        return self._message(params, params.get('message_id'))
+
+    async def _api_sendDocument(self, params):
+        message = self._message(params)
+        message['document'] = {'file_id': f"doc{message['message_id']}", 'file_unique_id': str(message['message_id'])}
+        return message
+
+
+def _user(user_id):
+    return {'id': user_id, 'is_bot': False, 'first_name': f'Load{user_id}'}
+
+
+def message_update(user_id, text=None, contact=None):
+    message = {
+        'message_id': random.randint(1, 2 ** 31),
+        'date': int(time.time()),
+        'chat': {'id': user_id, 'type': 'private'},
+        'from': _user(user_id)
+    }
+    if text is not None:
+        message['text'] = text
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    if contact is not None:
+        message['contact'] = contact
+    return {'message': message}
+
+
+def callback_update(user_id, data, message_id):
+    return {
+        'callback_query': {
+            'id': str(random.getrandbits(63)),
+            'from': _user(user_id),
+            'chat_instance': str(user_id),
+            'data': data,
+            'message': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'text': ''
+            }
+        }
+    }
+
+
+async def run_user(api, user_id, tournament_ids, think_time, timeout, latencies, errors):
+    """Провести одного пользователя по сценарию, замеряя задержку каждого шага"""
+    queue = api.responses[user_id] = asyncio.Queue()
+    tournament_id = random.choice(tournament_ids)
+    last_message_id = None
+
+    def make_update(step):
+        if step == 'start':
+            return message_update(user_id, '/start')
+        if step == 'register':
+            return callback_update(user_id, 'start_registration', last_message_id)
+        if step == 'full_name':
+            return message_update(user_id, f'Load User {user_id}')
+        if step == 'phone':
+            return message_update(user_id, contact={'phone_number': f'+7{user_id}',
+                                                    'first_name': f'Load{user_id}', 'user_id': user_id})
+        if step == 'browse':
+            return message_update(user_id, '🏆 Турниры')
+        if step == 'card':
+            return callback_update(user_id, f'tournament_{tournament_id}', last_message_id)
+        return callback_update(user_id, f'{step}_{tournament_id}', last_message_id)
+
+    try:
+        for step in STEPS:
+            # Ответы, пришедшие после предыдущего шага (второе сообщение, обновление карточки)
+            while not queue.empty():
+                queue.get_nowait()
+
+            sent_at = api.push(make_update(step))
+            try:
+                answered_at, message = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                errors[step] += 1
+                return
+
+            latencies[step].append(answered_at - sent_at)
+            last_message_id = message['message_id']
+
+            if think_time:
+                await asyncio.sleep(random.uniform(0, think_time))
+    finally:
+        del api.responses[user_id]
+
+
+def percentiles(values):
+    if len(values) < 2:
+        value = values[0] if values else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return cuts[49], cuts[94], cuts[98]
+
+
+def prepare_environment(args, api_port):
+    """Временный каталог, БД и переменные окружения до импорта модулей бота"""
+    workdir = tempfile.mkdtemp(prefix='bot_load_test_')
+    os.makedirs(os.path.join(workdir, 'logs'), exist_ok=True)
+    os.chdir(workdir)
+
+    os.environ.update({
+        'BOT_TOKEN': TEST_TOKEN,
+        'BOT_API_BASE_URL': f'http://127.0.0.1:{api_port}',
+        'BOT_MODE': 'polling',
+        'DATABASE_PATH': args.database or os.path.join(workdir, 'tournament.db'),
+        'METRICS_PORT': '0'
+    })
+    sys.path.insert(0, REPO_ROOT)
+    return workdir
+
+
+async def run(args):
+    api = FakeBotAPI()
+    api_app = web.Application()
+    api_app.router.add_route('*', '/bot{token}/{method}', api.handle)
+    runner = web.AppRunner(api_app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', args.api_port).start()
+
+    workdir = prepare_environment(args, args.api_port)
+
+    import main as bot_main
+    from services.tournament_service import TournamentService
+    from utils.metrics import db_executor_wait, db_query_duration, handler_errors
+
+    tournament_ids = [
+        TournamentService.create_tournament_with_levels(
+            name=f'Load Test Cup {i + 1}', date='01.01', location='Court', format_info='Americano',
+            entry_fee='5000', description='Load test', created_by=0
+        )
+        for i in range(args.tournaments)
+    ]
+
+    application = bot_main.build_application()
+    await application.initialize()
+    await application.post_init(application)
+    await application.updater.start_polling(poll_interval=0, timeout=10, allowed_updates=bot_main.ALLOWED_UPDATES)
+    await application.start()
+
+    latencies = collections.defaultdict(list)
+    errors = collections.Counter()
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def limited(user_id):
+        async with slots:
+            await run_user(api, user_id, tournament_ids, args.think_time, args.timeout, latencies, errors)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited(FIRST_USER_ID + i) for i in range(args.users)))
+    elapsed = time.perf_counter() - started
+
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+    await application.post_shutdown(application)
+    await runner.cleanup()
+
+    # ===============================
+    # Отчёт
+    # ===============================
+
+    all_latencies = [value for step in STEPS for value in latencies[step]]
+    print(f"Пользователей:       {args.users} (одновременно до {args.concurrency})")
+    print(f"Обработано шагов:    {len(all_latencies)} за {elapsed:.1f} с")
+    print(f"Пропускная способн.: {len(all_latencies) / elapsed:.0f} обновлений/с")
+    print(f"Таймауты:            {sum(errors.values())} {dict(errors) if errors else ''}")
+    print()
+    print(f"{'шаг':<15}{'кол-во':>8}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}")
+    for step in STEPS + ('всего',):
+        values = all_latencies if step == 'всего' else latencies[step]
+        p50, p95, p99 = percentiles(values)
+        print(f"{step:<15}{len(values):>8}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}")
+    print()
+
+    waits = db_executor_wait.count()
+    print(f"Ожидание потока БД:  {db_executor_wait.total():.2f} с всего, "
+          f"{db_executor_wait.total() / waits * 1000 if waits else 0:.2f} мс в среднем на {waits} вызовов")
+    begins = db_query_duration.count('BEGIN')
+    print(f"BEGIN IMMEDIATE:     {db_query_duration.total('BEGIN') * 1000:.1f} мс всего на {begins} транзакций")
+    print(f"Ошибки обработчиков: {handler_errors.total():.0f}")
+    print(f"Вызовы Bot API:      {dict(api.calls.most_common())}")
+    print(f"Рабочий каталог:     {workdir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест бота с заглушкой Telegram Bot API")
+    parser.add_argument('--users', type=int, default=200, help="сколько пользователей пройдут сценарий")
+    parser.add_argument('--concurrency', type=int, default=50, help="сколько пользователей активны одновременно")
+    parser.add_argument('--tournaments', type=int, default=3, help="сколько активных турниров создать")
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help="пауза пользователя между шагами, до N секунд")
+    parser.add_argument('--timeout', type=float, default=30.0, help="сколько ждать ответа бота на шаг, секунд")
+    parser.add_argument('--api-port', type=int, default=18081, help="порт заглушки Bot API")
+    parser.add_argument('--database', help="путь к БД (по умолчанию - новая БД во временном каталоге)")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
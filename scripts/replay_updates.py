@@ -0,0 +1,193 @@
+"""
+Воспроизведение записанного потока обновлений через приложение бота
+
+Записи делает UpdateRecorder (UPDATE_RECORD_PATH): строки {"ts": ..., "update": {...}}.
+Обновления подаются в настоящий граф обработчиков через getUpdates заглушки
+Bot API из bot_load_test.py - с исходными интервалами (--speed 1), ускоренно
+(--speed 10) или без пауз (--speed max).
+
+Обработчики смотрят в БД, поэтому для реалистичного прогона передайте копию
+рабочей БД (--database): она копируется во временный каталог и не изменяется.
+ID в записи обезличены, так что пользователи записи в БД будут новыми.
+
+Итог - пропускная способность и время обработки по обработчикам; --json-out
+сохраняет его для сравнения прогонов до и после изменений.
+
+Пример:
+    python scripts/replay_updates.py logs/updates.jsonl --speed 10 --database database/tournament.db
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bot_load_test import FakeBotAPI, prepare_environment  # noqa: E402
+from aiohttp import web  # noqa: E402
+
+
+def capture_files(paths):
+    """Файлы записи в хронологическом порядке: для base.jsonl - base.jsonl.N ... base.jsonl.1, base.jsonl"""
+    files = []
+    for path in paths:
+        rotated = [p for p in glob.glob(f"{glob.escape(path)}.*") if p.rsplit('.', 1)[-1].isdigit()]
+        rotated.sort(key=lambda p: int(p.rsplit('.', 1)[-1]), reverse=True)
+        files.extend(rotated)
+        files.append(path)
+    return files
+
+
+def load_capture(paths, limit=None):
+    records = []
+    for path in capture_files(paths):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    records.append((record.get('ts', 0.0), record.get('update', record)))
+    records.sort(key=lambda record: record[0])
+    return records[:limit] if limit else records
+
+
+async def feed(api, records, speed):
+    """Подать обновления с исходными интервалами, делёнными на speed (None - без пауз)"""
+    started = time.perf_counter()
+    first_ts = records[0][0]
+    max_lag = 0.0
+
+    for received_at, update in records:
+        if speed:
+            target = (received_at - first_ts) / speed
+            delay = target - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+        api.push(dict(update))
+
+    return max_lag
+
+
+async def run(args):
+    records = load_capture(args.capture, args.limit)
+    if not records:
+        print("Нет обновлений для воспроизведения")
+        return
+    speed = None if args.speed == 'max' else float(args.speed)
+
+    api = FakeBotAPI()
+    api_app = web.Application()
+    api_app.router.add_route('*', '/bot{token}/{method}', api.handle)
+    runner = web.AppRunner(api_app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', args.api_port).start()
+
+    if args.database:
+        snapshot = os.path.join(tempfile.mkdtemp(prefix='bot_replay_db_'), 'tournament.db')
+        shutil.copy(args.database, snapshot)
+        args.database = snapshot
+    # Воспроизведение не должно записывать само себя
+    os.environ['UPDATE_RECORD_PATH'] = ''
+    workdir = prepare_environment(args, args.api_port)
+
+    import main as bot_main
+    from utils.metrics import update_duration, update_wait, db_executor_wait, handler_errors
+
+    application = bot_main.build_application()
+    await application.initialize()
+    await application.post_init(application)
+    await application.updater.start_polling(poll_interval=0, timeout=10, allowed_updates=bot_main.ALLOWED_UPDATES)
+    await application.start()
+
+    processor = application.update_processor
+    started = time.perf_counter()
+    max_lag = await feed(api, records, speed)
+
+    deadline = time.monotonic() + args.drain_timeout
+    while processor.processed < len(records) and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+    await application.post_shutdown(application)
+    await runner.cleanup()
+
+    # ===============================
+    # Отчёт
+    # ===============================
+
+    capture_span = records[-1][0] - records[0][0]
+    handlers = []
+    for (label,) in update_duration.label_values():
+        count = update_duration.count(label)
+        handlers.append({
+            'handler': label,
+            'count': count,
+            'avg_ms': update_duration.total(label) / count * 1000,
+            'p95_ms': update_duration.quantile(0.95, label) * 1000
+        })
+    handlers.sort(key=lambda item: item['count'], reverse=True)
+
+    summary = {
+        'updates': len(records),
+        'processed': processor.processed,
+        'speed': args.speed,
+        'capture_span_s': capture_span,
+        'elapsed_s': elapsed,
+        'updates_per_s': processor.processed / elapsed if elapsed else 0.0,
+        'max_feed_lag_s': max_lag,
+        'queue_wait_p95_ms': update_wait.quantile(0.95) * 1000,
+        'db_wait_avg_ms': db_executor_wait.total() / db_executor_wait.count() * 1000 if db_executor_wait.count() else 0.0,
+        'handler_errors': handler_errors.total(),
+        'handlers': handlers
+    }
+
+    print(f"Обновлений:          {summary['processed']}/{summary['updates']} (скорость {args.speed if speed is None else f'{speed:g}x'})")
+    print(f"Длительность записи: {capture_span:.1f} с, воспроизведение: {elapsed:.1f} с")
+    print(f"Пропускная способн.: {summary['updates_per_s']:.0f} обновлений/с")
+    print(f"Отставание подачи:   {max_lag * 1000:.0f} мс максимум")
+    print(f"Ожидание в очереди:  p95 {summary['queue_wait_p95_ms']:.1f} мс")
+    print(f"Ожидание потока БД:  {summary['db_wait_avg_ms']:.2f} мс в среднем")
+    print(f"Ошибки обработчиков: {summary['handler_errors']:.0f}")
+    print()
+    print(f"{'обработчик':<32}{'кол-во':>8}{'сред., мс':>11}{'p95, мс':>10}")
+    for item in handlers:
+        print(f"{item['handler']:<32}{item['count']:>8}{item['avg_ms']:>11.1f}{item['p95_ms']:>10.1f}")
+    print(f"\nРабочий каталог:     {workdir}")
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение записанных обновлений через приложение бота")
+    parser.add_argument('capture', nargs='+', help="файлы записи JSONL (ротированные .1, .2 ... подхватываются)")
+    parser.add_argument('--speed', default='1', help="ускорение: 1, 10, ... или max")
+    parser.add_argument('--limit', type=int, help="воспроизвести только первые N обновлений")
+    parser.add_argument('--database', help="БД, копия которой используется при воспроизведении")
+    parser.add_argument('--api-port', type=int, default=18081, help="порт заглушки Bot API")
+    parser.add_argument('--drain-timeout', type=float, default=60.0,
+                        help="сколько ждать обработки после подачи последнего обновления, секунд")
+    parser.add_argument('--json-out', help="сохранить итог в JSON")
+    args = parser.parse_args()
+
+    if args.json_out:
+        args.json_out = os.path.abspath(args.json_out)
+    args.capture = [os.path.abspath(path) for path in args.capture]
+    if args.database:
+        args.database = os.path.abspath(args.database)
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Нагрузочный тест вебхука: отправляет обновления на локальный сервер бота
+и измеряет пропускную способность (обновлений в секунду) и задержку ответа.
+
+Обновления берутся из JSONL-файла (по одному обновлению в строке, допускается
+обёртка {"update": {...}}) или генерируются синтетически - нажатия кнопок турниров.
+
+Пример:
+    BOT_MODE=webhook python main.py
+    python scripts/webhook_load_test.py --url http://127.0.0.1:8080/telegram \\
+        --secret $WEBHOOK_SECRET_TOKEN --total 5000 --concurrency 50
+
+Сервер отвечает сразу после постановки обновления в очередь, поэтому тест
+измеряет приём обновлений. Чтобы обработчики не обращались к настоящему
+Telegram, запускайте бота с тестовым токеном.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import time
+import aiohttp
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def load_updates(path):
+    """Прочитать записанные обновления из JSONL"""
+    updates = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            updates.append(record.get('update', record))
+    return updates
+
+
+def synthetic_update(index):
+    """Нажатие кнопки карточки турнира от одного из 1000 пользователей"""
+    user_id = 100000 + index % 1000
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'Load{user_id}'}
+    return {
+        'update_id': index,
+        'callback_query': {
+            'id': str(index),
+            'from': user,
+            'chat_instance': str(user_id),
+            'data': f"tournament_{index % 5 + 1}",
+            'message': {
+                'message_id': index,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'text': 'load test'
+            }
+        }
+    }
+
+
+async def run(url, secret, updates, total, concurrency):
+    headers = {SECRET_TOKEN_HEADER: secret} if secret else {}
+    source = itertools.cycle(updates) if updates else None
+    counter = itertools.count(1)
+    latencies = []
+    statuses = {}
+    
+    async def worker(session):
+        while True:
+            index = next(counter)
+            if index > total:
+                return
+            
+            update = dict(next(source)) if source else synthetic_update(index)
+            # Уникальный update_id, чтобы повторы из файла не выглядели дубликатами
+            update['update_id'] = index
+            
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=update, headers=headers) as response:
+                    await response.read()
+                    status = response.status
+            except aiohttp.ClientError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    print(f"Отправлено:        {len(latencies)} за {elapsed:.2f} с")
+    print(f"Обновлений в сек.: {len(latencies) / elapsed:.0f}")
+    print(f"Задержка p50:      {statistics.median(latencies) * 1000:.1f} мс")
+    print(f"Задержка p95:      {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} мс")
+    print(f"Задержка max:      {latencies[-1] * 1000:.1f} мс")
+    print(f"Ответы:            {statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест вебхука бота")
+    parser.add_argument('--url', default='http://127.0.0.1:8080/telegram')
+    parser.add_argument('--secret', default=os.getenv('WEBHOOK_SECRET_TOKEN'),
+                        help="значение WEBHOOK_SECRET_TOKEN (по умолчанию - из окружения)")
+    parser.add_argument('--updates', default=None, help="JSONL-файл с записанными обновлениями")
+    parser.add_argument('--total', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+    
+    updates = load_updates(args.updates) if args.updates else []
+    asyncio.run(run(args.url, args.secret, updates, args.total, args.concurrency))
+
+
+if __name__ == '__main__':
+    main()
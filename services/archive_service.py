@@ -0,0 +1,80 @@
+import logging
+from datetime import datetime, timedelta
+from telegram.ext import Application, ContextTypes
+from services.tournament_service import AsyncTournamentService
+from services.expiry_service import ExpiryService
+from config import (
+    TOURNAMENT_ARCHIVE_AFTER_HOURS, TOURNAMENT_ARCHIVE_CHECK_SECONDS, TOURNAMENT_ARCHIVE_UNDATED_AFTER_DAYS,
+    TOURNAMENT_ARCHIVE_RETRY_MIN_SECONDS, TOURNAMENT_ARCHIVE_RETRY_MAX_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+class ArchiveService:
+    """Автоматическая архивация прошедших турниров по дате начала (starts_at)"""
+    
+    JOB_NAME = 'tournament_archive'
+    
+    # Пауза перед повтором, пока просроченные турниры не удаётся заархивировать
+    _retry_delay = 0.0
+    
+    @staticmethod
+    async def schedule(application: Application, after_run: bool = False):
+        """
+        Запланировать архивацию на момент, когда завершится ближайший турнир (заменяет прежнюю)
+        
+        Новый турнир может начаться раньше запланированного момента, поэтому
+        пауза не превышает TOURNAMENT_ARCHIVE_CHECK_SECONDS. Этой же периодической
+        проверкой архивируются турниры без даты начала.
+        
+        Если после запуска (after_run) срок архивации всё ещё в прошлом, архивация
+        не удалась - следующий запуск откладывается с нарастающей паузой.
+        """
+        job_queue = application.job_queue
+        
+        if job_queue is None:
+            logger.warning("JobQueue is not available, finished tournaments will not be archived automatically")
+            return
+        
+        next_start = await AsyncTournamentService.get_next_start_time()
+        
+        for job in job_queue.get_jobs_by_name(ArchiveService.JOB_NAME):
+            job.schedule_removal()
+        
+        delay = TOURNAMENT_ARCHIVE_CHECK_SECONDS
+        if next_start is not None:
+            due = next_start + timedelta(hours=TOURNAMENT_ARCHIVE_AFTER_HOURS)
+            delay = min(delay, max(0.0, (due - datetime.now()).total_seconds()))
+        
+        if delay == 0 and after_run:
+            ArchiveService._retry_delay = min(
+                max(ArchiveService._retry_delay * 2, TOURNAMENT_ARCHIVE_RETRY_MIN_SECONDS),
+                TOURNAMENT_ARCHIVE_RETRY_MAX_SECONDS
+            )
+            logger.warning(f"Finished tournaments are still not archived, retrying in {ArchiveService._retry_delay:.0f}s")
+        elif after_run:
+            ArchiveService._retry_delay = 0.0
+        
+        if delay == 0:
+            delay = ArchiveService._retry_delay
+        
+        job_queue.run_once(ArchiveService._archive_job, when=delay, name=ArchiveService.JOB_NAME)
+        logger.info(f"Next tournament archive check scheduled in {delay:.0f}s")
+    
+    @staticmethod
+    async def _archive_job(context: ContextTypes.DEFAULT_TYPE):
+        """Заархивировать завершившиеся турниры и запланировать следующий запуск"""
+        try:
+            now = datetime.now()
+            archived = await AsyncTournamentService.archive_finished_tournaments(
+                now - timedelta(hours=TOURNAMENT_ARCHIVE_AFTER_HOURS),
+                now - timedelta(days=TOURNAMENT_ARCHIVE_UNDATED_AFTER_DAYS)
+            )
+            
+            # Неоплаченные заявки архивных турниров больше не ждут снятия
+            if archived:
+                await ExpiryService.schedule(context.application)
+        except Exception as e:
+            logger.error(f"Error archiving finished tournaments: {e}")
+        finally:
+            await ArchiveService.schedule(context.application, after_run=True)
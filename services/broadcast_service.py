@@ -0,0 +1,278 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+from config import (
+    BROADCAST_GLOBAL_RATE, BROADCAST_PER_CHAT_INTERVAL, BROADCAST_CONCURRENCY,
+    BROADCAST_MAX_RETRIES, BROADCAST_RETRY_BACKOFF, BROADCAST_PROGRESS_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+# Ошибки BadRequest, после которых в чат больше нет смысла писать
+PERMANENT_CHAT_ERRORS = (
+    'chat not found',
+    'user is deactivated',
+    'bot was blocked by the user',
+    'peer_id_invalid',
+)
+
+
+class TokenBucket:
+    """Асинхронный token bucket: не больше rate операций в секунду с запасом capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Дождаться и забрать один токен"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class RateLimiter:
+    """Ограничитель исходящих сообщений: глобальный лимит бота и интервал для каждого чата"""
+
+    # При таком размере таблицы чатов удаляем устаревшие записи
+    _CHAT_TABLE_PRUNE_SIZE = 10000
+
+    def __init__(self, global_rate: float, per_chat_interval: float):
+        self._bucket = TokenBucket(global_rate, global_rate)
+        self._per_chat_interval = per_chat_interval
+        self._chat_next_slot: Dict[int, float] = {}
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float):
+        """Приостановить все отправки (после RetryAfter от Telegram)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def wait(self, chat_id: int):
+        """Дождаться разрешения на отправку сообщения в чат"""
+        now = time.monotonic()
+        slot = max(now, self._chat_next_slot.get(chat_id, 0.0))
+        self._chat_next_slot[chat_id] = slot + self._per_chat_interval
+
+        if len(self._chat_next_slot) > self._CHAT_TABLE_PRUNE_SIZE:
+            self._prune(now)
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+        await self._bucket.acquire()
+
+    def _prune(self, now: float):
+        """Удалить чаты, для которых ограничение уже не действует"""
+        self._chat_next_slot = {
+            chat_id: slot for chat_id, slot in self._chat_next_slot.items() if slot > now
+        }
+
+
+# Общий ограничитель для всех массовых отправок бота
+rate_limiter = RateLimiter(BROADCAST_GLOBAL_RATE, BROADCAST_PER_CHAT_INTERVAL)
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    """Получить задержку из RetryAfter (int или timedelta в зависимости от версии PTB)"""
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class BroadcastService:
+
+    SENT = 'sent'
+    FAILED = 'failed'
+    BLOCKED = 'blocked'
+
+    @staticmethod
+    async def send_with_retry(send: Callable, chat_id: int) -> str:
+        """
+        Выполнить отправку в чат с учётом лимитов и повторов
+
+        Args:
+            send: корутина-функция send(chat_id), выполняющая запрос к Bot API
+            chat_id (int): ID чата
+
+        Returns:
+            str: SENT, FAILED или BLOCKED (чат недоступен навсегда)
+        """
+        attempt = 0
+
+        while attempt <= BROADCAST_MAX_RETRIES:
+            await rate_limiter.wait(chat_id)
+
+            try:
+                await send(chat_id)
+                return BroadcastService.SENT
+            except RetryAfter as e:
+                # Flood control: останавливаем все отправки, попытку не считаем
+                delay = _retry_after_seconds(e)
+                logger.warning(f"Flood control hit, pausing broadcasts for {delay}s")
+                rate_limiter.pause(delay)
+                continue
+            except Forbidden as e:
+                logger.info(f"Chat {chat_id} is unavailable: {e}")
+                return BroadcastService.BLOCKED
+            except BadRequest as e:
+                if any(reason in str(e).lower() for reason in PERMANENT_CHAT_ERRORS):
+                    logger.info(f"Chat {chat_id} is unavailable: {e}")
+                    return BroadcastService.BLOCKED
+                logger.error(f"Failed to send message to {chat_id}: {e}")
+                return BroadcastService.FAILED
+            except (TimedOut, NetworkError) as e:
+                attempt += 1
+                if attempt > BROADCAST_MAX_RETRIES:
+                    logger.error(f"Failed to send message to {chat_id} after retries: {e}")
+                    break
+                await asyncio.sleep(BROADCAST_RETRY_BACKOFF * 2 ** (attempt - 1))
+            except Exception as e:
+                logger.error(f"Failed to send message to {chat_id}: {e}")
+                return BroadcastService.FAILED
+
+        return BroadcastService.FAILED
+
+    @staticmethod
+    async def run(chat_ids: Iterable[int], send: Callable,
+                  on_progress: Optional[Callable] = None) -> Dict:
+        """
+        Разослать сообщения по списку чатов конкурентно с ограничением скорости
+
+        Args:
+            chat_ids: ID чатов получателей
+            send: корутина-функция send(chat_id)
+            on_progress: корутина-функция on_progress(stats), вызывается периодически
+
+        Returns:
+            dict: статистика {'total', 'sent', 'failed', 'blocked', 'blocked_ids', 'elapsed'}
+        """
+        chat_ids = list(chat_ids)
+        stats = {
+            'total': len(chat_ids),
+            'sent': 0,
+            'failed': 0,
+            'blocked': 0,
+            'blocked_ids': [],
+            'elapsed': 0.0
+        }
+        started = time.monotonic()
+
+        queue = asyncio.Queue()
+        for chat_id in chat_ids:
+            queue.put_nowait(chat_id)
+
+        async def worker():
+            while True:
+                try:
+                    chat_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                result = await BroadcastService.send_with_retry(send, chat_id)
+                stats[result] += 1
+                if result == BroadcastService.BLOCKED:
+                    stats['blocked_ids'].append(chat_id)
+
+        async def reporter():
+            while True:
+                await asyncio.sleep(BROADCAST_PROGRESS_INTERVAL)
+                stats['elapsed'] = time.monotonic() - started
+                try:
+                    await on_progress(stats)
+                except Exception as e:
+                    logger.error(f"Error in broadcast progress callback: {e}")
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(BROADCAST_CONCURRENCY, len(chat_ids)))]
+        reporter_task = asyncio.create_task(reporter()) if on_progress else None
+
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            if reporter_task:
+                reporter_task.cancel()
+
+        stats['elapsed'] = time.monotonic() - started
+
+        if stats['blocked_ids']:
+            from services.user_service import AsyncUserService
+            await AsyncUserService.mark_users_blocked(stats['blocked_ids'])
+
+        logger.info(
+            f"Broadcast finished: sent={stats['sent']}, failed={stats['failed']}, "
+            f"blocked={stats['blocked']}, total={stats['total']}, elapsed={stats['elapsed']:.1f}s"
+        )
+        return stats
+
+    @staticmethod
+    async def broadcast_message(bot: Bot, chat_ids: List[int], text: str, reply_markup=None,
+                                admin_chat_id: Optional[int] = None, title: str = "Рассылка") -> Dict:
+        """
+        Разослать одинаковое сообщение всем чатам с отчётом о ходе рассылки администратору
+
+        Args:
+            bot: экземпляр бота
+            chat_ids: ID получателей
+            text: текст сообщения
+            reply_markup: клавиатура сообщения
+            admin_chat_id: чат администратора для прогресса и итогового отчёта
+            title: заголовок отчёта
+        """
+        async def send(chat_id):
+            await bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
+
+        progress_message = None
+        if admin_chat_id:
+            try:
+                progress_message = await bot.send_message(
+                    chat_id=admin_chat_id,
+                    text=f"📣 {title}: 0/{len(chat_ids)}"
+                )
+            except Exception as e:
+                logger.error(f"Failed to send broadcast progress message: {e}")
+
+        async def on_progress(stats):
+            done = stats['sent'] + stats['failed'] + stats['blocked']
+            await progress_message.edit_text(
+                f"📣 {title}: {done}/{stats['total']}\n"
+                f"✅ Доставлено: {stats['sent']}"
+            )
+
+        stats = await BroadcastService.run(
+            chat_ids, send, on_progress=on_progress if progress_message else None
+        )
+
+        if progress_message:
+            summary = (
+                f"📣 {title} завершена\n\n"
+                f"Всего получателей: {stats['total']}\n"
+                f"✅ Доставлено: {stats['sent']}\n"
+                f"🚫 Заблокировали бота: {stats['blocked']}\n"
+                f"❌ Ошибки: {stats['failed']}\n"
+                f"⏱ Время: {stats['elapsed']:.0f} сек"
+            )
+            try:
+                await progress_message.edit_text(summary)
+            except Exception as e:
+                logger.error(f"Failed to send broadcast summary: {e}")
+
+        return stats
@@ -0,0 +1,100 @@
+import logging
+import threading
+from typing import Dict, List, Optional
+from config import TOURNAMENT_CARD_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+class TournamentCardCache:
+    """
+    Кэш отрендеренных карточек турниров
+    
+    У каждого турнира есть счётчик версий, который увеличивается при любом изменении
+    турнира или его участников. Запись кэша хранит версию, с которой она была
+    построена, и считается устаревшей, если версия турнира с тех пор изменилась.
+    Методы вызываются и из event loop, и из потоков БД, поэтому защищены блокировкой.
+    """
+    
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._entries: Dict[int, tuple] = {}
+        self._versions: Dict[int, int] = {}
+        # Общая эпоха увеличивается при сбросе всего кэша
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def _current_version(self, tournament_id: int) -> tuple:
+        return (self._epoch, self._versions.get(tournament_id, 0))
+    
+    def version(self, tournament_id: int) -> tuple:
+        """Текущая версия данных турнира"""
+        with self._lock:
+            return self._current_version(tournament_id)
+    
+    def versions(self, tournament_ids: List[int]) -> List[tuple]:
+        """Текущие версии нескольких турниров (одна блокировка на все)"""
+        with self._lock:
+            return [self._current_version(tournament_id) for tournament_id in tournament_ids]
+    
+    def get(self, tournament_id: int) -> Optional[Dict]:
+        """Получить карточку, если она построена по актуальной версии"""
+        with self._lock:
+            cached = self._entries.get(tournament_id)
+            
+            if cached and cached[0] == self._current_version(tournament_id):
+                self.hits += 1
+                return cached[1]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, tournament_id: int, version: tuple, card: Dict):
+        """
+        Сохранить карточку, построенную по версии version
+        
+        Версию нужно получить до чтения данных из БД: если турнир изменился
+        во время рендеринга, запись сразу окажется устаревшей.
+        """
+        with self._lock:
+            if version != self._current_version(tournament_id):
+                return
+            
+            self._entries.pop(tournament_id, None)
+            self._entries[tournament_id] = (version, card)
+            
+            # Вытесняем самые старые записи
+            while len(self._entries) > self._max_size:
+                del self._entries[next(iter(self._entries))]
+    
+    def invalidate(self, tournament_id: int):
+        """Отметить данные турнира изменёнными"""
+        with self._lock:
+            self._versions[tournament_id] = self._versions.get(tournament_id, 0) + 1
+            self._entries.pop(tournament_id, None)
+            self.invalidations += 1
+    
+    def invalidate_all(self):
+        """Сбросить все карточки (например, после смены имени участника)"""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self.invalidations += 1
+    
+    def stats(self) -> Dict:
+        """Метрики кэша: попадания, промахи, доля попаданий, размер"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'invalidations': self.invalidations,
+                'size': len(self._entries)
+            }
+
+
+# Общий кэш карточек турниров
+card_cache = TournamentCardCache(TOURNAMENT_CARD_CACHE_SIZE)
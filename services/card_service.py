@@ -0,0 +1,43 @@
+import logging
+from typing import Dict, Optional
+from services.tournament_service import AsyncTournamentService
+from services.participation_service import AsyncParticipationService
+from services.card_cache import card_cache
+from utils.tournament_card import build_tournament_text
+
+logger = logging.getLogger(__name__)
+
+class CardService:
+    
+    @staticmethod
+    async def get_card(tournament_id: int) -> Optional[Dict]:
+        """
+        Получить общую часть карточки турнира (из кэша или построить заново)
+        
+        Returns:
+            dict: {'tournament', 'counts', 'text'} или None, если турнир не найден
+        """
+        card = card_cache.get(tournament_id)
+        
+        if card:
+            return card
+        
+        # Версию фиксируем до чтения: изменения во время рендеринга не попадут в кэш
+        version = card_cache.version(tournament_id)
+        
+        tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
+        
+        if not tournament:
+            return None
+        
+        counts = await AsyncParticipationService.get_participants_count(tournament_id)
+        participants = await AsyncParticipationService.get_tournament_participants(tournament_id)
+        
+        card = {
+            'tournament': tournament,
+            'counts': counts,
+            'text': build_tournament_text(tournament, counts, participants)
+        }
+        card_cache.put(tournament_id, version, card)
+        
+        return card
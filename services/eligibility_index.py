@@ -0,0 +1,225 @@
+import bisect
+import logging
+import threading
+from typing import Dict, List, Optional
+from database.connection import db
+from services.card_cache import card_cache
+from services.participation_service import ParticipationService
+from levels import LEVELS
+
+logger = logging.getLogger(__name__)
+
+class TournamentEligibilityIndex:
+    """
+    Индекс активных турниров по уровню игрока ("турниры для меня")
+
+    Уровней в справочнике немного, поэтому диапазон [min_level, max_level] турнира
+    раскладывается по корзинам уровней: в корзине каждого уровня лежат турниры,
+    на которые игрок этого уровня может записаться, отсортированные как общий список
+    (по дате начала). Открытые турниры есть во всех корзинах, в том числе в корзине игроков
+    без уровня. Запрос - выбор одной корзины, без перебора турниров.
+
+    Индекс строится из БД при первом обращении и дальше обновляется точечно:
+    TournamentService вызывает refresh() при создании, изменении и архивации турнира.
+    Количество участников хранится с версией из card_cache и перечитывается только
+    для турниров, у которых версия изменилась.
+    Методы вызываются из потоков БД, поэтому защищены блокировкой.
+    """
+
+    # Корзина игроков без уровня (после всех уровней справочника)
+    UNLEVELED = len(LEVELS)
+
+    def __init__(self):
+        # ID турнира -> данные для списка и ключ сортировки
+        self._tournaments: Dict[int, Dict] = {}
+        # Корзина уровня -> отсортированные ключи (starts_at, id) турниров
+        self._buckets: List[list] = [[] for _ in range(len(LEVELS) + 1)]
+        # ID турнира -> (версия card_cache, количество мест из split_counts)
+        self._counts: Dict[int, tuple] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+        self.count_refreshes = 0
+
+    @staticmethod
+    def _bucket_range(level_restriction: str, min_level: Optional[str], max_level: Optional[str]) -> range:
+        """Корзины, в которые попадает турнир"""
+        if level_restriction != 'restricted':
+            # Открытый турнир доступен всем
+            return range(len(LEVELS) + 1)
+
+        low = LEVELS.get(min_level)
+        high = LEVELS.get(max_level)
+        if not low or not high:
+            # Как и check_level_in_range при записи: с неизвестными границами не подходит никому
+            return range(0)
+        return range(low.ordinal, high.ordinal + 1)
+
+    def _add(self, row: tuple):
+        tournament_id, name, date, location, entry_fee, level_restriction, min_level, max_level, starts_at = row
+        # Порядок как в общем списке: ORDER BY starts_at (NULL - в начале)
+        key = (starts_at or '', tournament_id)
+        buckets = self._bucket_range(level_restriction, min_level, max_level)
+
+        self._tournaments[tournament_id] = {
+            'key': key,
+            'buckets': buckets,
+            'tournament': {
+                'id': tournament_id,
+                'name': name,
+                'date': date,
+                'location': location,
+                'entry_fee': entry_fee
+            }
+        }
+        for bucket in buckets:
+            bisect.insort(self._buckets[bucket], key)
+
+    def _remove(self, tournament_id: int):
+        entry = self._tournaments.pop(tournament_id, None)
+        if not entry:
+            return
+
+        for bucket in entry['buckets']:
+            keys = self._buckets[bucket]
+            index = bisect.bisect_left(keys, entry['key'])
+            if index < len(keys) and keys[index] == entry['key']:
+                del keys[index]
+        self._counts.pop(tournament_id, None)
+
+    @staticmethod
+    def _select_active(cursor, tournament_id: Optional[int] = None) -> list:
+        query = """
+            SELECT id, name, date, location, entry_fee, level_restriction, min_level, max_level, starts_at
+            FROM tournaments WHERE status = 'active'
+        """
+        if tournament_id is None:
+            cursor.execute(query)
+        else:
+            cursor.execute(query + " AND id = ?", (tournament_id,))
+        return cursor.fetchall()
+
+    def _ensure_loaded(self):
+        """Построить индекс из БД при первом обращении (вызывается под блокировкой)"""
+        if self._loaded:
+            return
+
+        with db.get_connection() as conn:
+            rows = self._select_active(conn.cursor())
+
+        for row in rows:
+            self._add(row)
+        self._loaded = True
+        self.rebuilds += 1
+        logger.info(f"Eligibility index built: {len(rows)} active tournaments")
+
+    def refresh(self, tournament_id: int):
+        """Перечитать один турнир: добавить, обновить или убрать (если он больше не активен)"""
+        try:
+            with self._lock:
+                if not self._loaded:
+                    # Турнир попадёт в индекс при первом построении
+                    return
+
+                with db.get_connection() as conn:
+                    rows = self._select_active(conn.cursor(), tournament_id)
+
+                self._remove(tournament_id)
+                if rows:
+                    self._add(rows[0])
+        except Exception as e:
+            logger.error(f"Error refreshing eligibility index for tournament {tournament_id}: {e}")
+            self.reset()
+
+    def reset(self):
+        """Сбросить индекс: он будет построен заново при следующем обращении"""
+        with self._lock:
+            self._tournaments.clear()
+            self._counts.clear()
+            for keys in self._buckets:
+                keys.clear()
+            self._loaded = False
+
+    def eligible_ids(self, level_code: Optional[str]) -> List[int]:
+        """ID активных турниров, на которые может записаться игрок уровня level_code (по дате)"""
+        level = LEVELS.get(level_code)
+        bucket = level.ordinal if level else self.UNLEVELED
+
+        with self._lock:
+            self._ensure_loaded()
+            return [tournament_id for _, tournament_id in self._buckets[bucket]]
+
+    def get_eligible_tournaments(self, level_code: Optional[str]) -> List[Dict]:
+        """
+        Турниры для игрока: подходят по уровню и в них есть свободные места
+
+        Returns:
+            list: Турниры в формате get_active_tournaments_with_counts
+        """
+        try:
+            tournament_ids = self.eligible_ids(level_code)
+            if not tournament_ids:
+                return []
+
+            # Версии фиксируем до чтения: изменения во время запроса сделают запись устаревшей
+            versions = card_cache.versions(tournament_ids)
+            with self._lock:
+                stale = {
+                    tournament_id: version
+                    for tournament_id, version in zip(tournament_ids, versions)
+                    if self._counts.get(tournament_id, (None,))[0] != version
+                }
+
+            if stale:
+                taken = self._count_participants(list(stale))
+                with self._lock:
+                    for tournament_id, version in stale.items():
+                        if tournament_id in self._tournaments:
+                            counts = ParticipationService.split_counts(taken.get(tournament_id, 0))
+                            self._counts[tournament_id] = (version, counts)
+                    self.count_refreshes += 1
+
+            tournaments = []
+            with self._lock:
+                for tournament_id in tournament_ids:
+                    entry = self._tournaments.get(tournament_id)
+                    cached = self._counts.get(tournament_id)
+                    if not entry or not cached:
+                        continue
+
+                    counts = cached[1]
+                    if counts['available_main'] + counts['available_reserve'] <= 0:
+                        continue
+
+                    tournaments.append(dict(entry['tournament'], counts=counts))
+
+            return tournaments
+        except Exception as e:
+            logger.error(f"Error getting eligible tournaments: {e}")
+            return []
+
+    @staticmethod
+    def _count_participants(tournament_ids: List[int]) -> Dict[int, int]:
+        """Занятые места (confirmed + pending) для нескольких турниров одним запросом"""
+        placeholders = ','.join('?' * len(tournament_ids))
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT tournament_id, COUNT(*) FROM participations
+                WHERE tournament_id IN ({placeholders}) AND status IN ('confirmed', 'pending')
+                GROUP BY tournament_id
+            """, tournament_ids)
+            return dict(cursor.fetchall())
+
+    def stats(self) -> Dict:
+        """Метрики индекса: турниров, построений, перечитываний количества мест"""
+        with self._lock:
+            return {
+                'tournaments': len(self._tournaments),
+                'rebuilds': self.rebuilds,
+                'count_refreshes': self.count_refreshes
+            }
+
+
+# Общий индекс турниров по уровням
+eligibility_index = TournamentEligibilityIndex()
@@ -0,0 +1,102 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from telegram.ext import Application, ContextTypes
+from services.participation_service import AsyncParticipationService
+from services.broadcast_service import BroadcastService
+from services.sync_service import SyncService
+from config import EXPIRY_RETRY_MIN_SECONDS, EXPIRY_RETRY_MAX_SECONDS
+
+logger = logging.getLogger(__name__)
+
+class ExpiryService:
+    """Снятие неоплаченных заявок точно в момент истечения срока оплаты"""
+    
+    JOB_NAME = 'payment_expiry'
+    
+    # Пауза перед повтором, пока просроченные заявки не удаётся снять
+    _retry_delay = 0.0
+    
+    @staticmethod
+    async def schedule(application: Application, after_run: bool = False):
+        """
+        Запланировать пробуждение на ближайший дедлайн оплаты (заменяет прежнее)
+        
+        Если после запуска (after_run) ближайший дедлайн всё ещё в прошлом, заявки
+        снять не удалось - следующий запуск откладывается с нарастающей паузой,
+        иначе задача перезапускалась бы без задержки.
+        """
+        job_queue = application.job_queue
+        
+        if job_queue is None:
+            logger.warning("JobQueue is not available, expired participations will not be released")
+            return
+        
+        deadline = await AsyncParticipationService.get_next_payment_deadline()
+        
+        # Между снятием старой задачи и постановкой новой нет await - расписание не раздвоится
+        for job in job_queue.get_jobs_by_name(ExpiryService.JOB_NAME):
+            job.schedule_removal()
+        
+        if deadline is None:
+            return
+        
+        delay = max(0.0, (deadline - datetime.now()).total_seconds())
+        
+        if delay == 0 and after_run:
+            ExpiryService._retry_delay = min(
+                max(ExpiryService._retry_delay * 2, EXPIRY_RETRY_MIN_SECONDS), EXPIRY_RETRY_MAX_SECONDS
+            )
+            logger.warning(f"Expired participations are still pending, retrying in {ExpiryService._retry_delay:.0f}s")
+        elif after_run:
+            ExpiryService._retry_delay = 0.0
+        
+        # Новые записи во время серии неудач не отменяют паузу
+        if delay == 0:
+            delay = ExpiryService._retry_delay
+        
+        job_queue.run_once(ExpiryService._expire_job, when=delay, name=ExpiryService.JOB_NAME)
+        logger.info(f"Next payment expiry check scheduled in {delay:.0f}s")
+    
+    @staticmethod
+    async def _expire_job(context: ContextTypes.DEFAULT_TYPE):
+        """Снять просроченные заявки, уведомить игроков и запланировать следующий запуск"""
+        try:
+            result = await AsyncParticipationService.cleanup_expired_participations()
+            
+            if result['expired'] or result['promoted']:
+                await ExpiryService._notify_users(context.bot, result)
+                
+                tournament_ids = {item['tournament_id'] for item in result['expired']}
+                for tournament_id in tournament_ids:
+                    await SyncService.update_tournament_for_all(context.application, tournament_id)
+        except Exception as e:
+            logger.error(f"Error expiring participations: {e}")
+        finally:
+            await ExpiryService.schedule(context.application, after_run=True)
+    
+    @staticmethod
+    async def _notify_users(bot, result):
+        """Разослать уведомления об отмене заявок и переводе из резерва"""
+        messages = defaultdict(list)
+        
+        for item in result['expired']:
+            messages[item['user_id']].append(
+                f"⏰ Время на оплату участия в турнире «{item['tournament_name']}» истекло, "
+                f"заявка отменена.\n"
+                f"Если места ещё есть, вы можете записаться снова."
+            )
+        
+        for item in result['promoted']:
+            messages[item['user_id']].append(
+                f"🎉 В турнире «{item['tournament_name']}» освободилось место - "
+                f"вы переведены из резерва в основной состав!"
+            )
+        
+        # Системные участники (отрицательные ID) не являются чатами Telegram
+        chat_ids = [user_id for user_id in messages if user_id > 0]
+        
+        async def send(chat_id):
+            await bot.send_message(chat_id=chat_id, text="\n\n".join(messages[chat_id]))
+        
+        await BroadcastService.run(chat_ids, send)
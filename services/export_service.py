@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List
+import xlsxwriter
+from telegram import Bot
+from config import EXPORT_BATCH_SIZE, EXPORT_SPOOL_MAX_BYTES, EXPORT_CONCURRENT_JOBS
+from levels import get_level_name, get_category_by_level
+from services.user_service import UserService
+from services.tournament_service import AsyncTournamentService
+from services.participation_service import AsyncParticipationService
+from services.card_cache import card_cache
+
+logger = logging.getLogger(__name__)
+
+# Отправленные выгрузки участников: tournament_id -> (версия данных турнира, file_id, подпись).
+# Версия та же, что у кэша карточек: меняется при любом изменении состава или турнира.
+_participants_exports: Dict[int, tuple] = {}
+
+# Очередь фоновых выгрузок
+_export_jobs = asyncio.Semaphore(EXPORT_CONCURRENT_JOBS)
+
+HEADER_FORMAT = {
+    'bold': True,
+    'bg_color': '#366092',
+    'font_color': 'white',
+    'align': 'center'
+}
+
+class ExportService:
+    """Построение Excel-выгрузок. Методы write_* блокирующие - вызывать в отдельном потоке"""
+    
+    @staticmethod
+    def write_users_xlsx(output) -> int:
+        """
+        Записать всех пользователей в xlsx, не держа таблицу в памяти целиком
+        
+        Строки читаются из БД порциями и сразу пишутся в режиме constant_memory,
+        поэтому память не растёт с числом пользователей.
+        
+        Args:
+            output: файловый объект для записи книги
+        
+        Returns:
+            int: количество выгруженных пользователей
+        """
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        worksheet = workbook.add_worksheet('Пользователи')
+        
+        header_format = workbook.add_format(HEADER_FORMAT)
+        cell_format = workbook.add_format({'bg_color': '#F8F9FA'})
+        
+        # В режиме constant_memory ширину колонок задаём до записи строк
+        worksheet.set_column('A:A', 12)  # Telegram ID
+        worksheet.set_column('B:B', 25)  # ФИО
+        worksheet.set_column('C:C', 15)  # Телефон
+        worksheet.set_column('D:D', 20)  # Уровень игры
+        worksheet.set_column('E:E', 15)  # Категория
+        worksheet.set_column('F:F', 15)  # Дата регистрации
+        
+        headers = ['Telegram ID', 'ФИО', 'Телефон', 'Уровень игры', 'Категория', 'Дата регистрации']
+        worksheet.write_row(0, 0, headers, header_format)
+        
+        count = 0
+        
+        for count, user in enumerate(UserService.iter_all_users(EXPORT_BATCH_SIZE), 1):
+            player_level = user['player_level']
+            created_at = user['created_at']
+            
+            # Форматируем дату регистрации
+            try:
+                formatted_date = datetime.fromisoformat(created_at).strftime('%d.%m.%Y')
+            except (TypeError, ValueError):
+                formatted_date = created_at[:10] if created_at else ''
+            
+            # Получаем название уровня и категорию
+            if player_level:
+                level_display = f"{player_level} ({get_level_name(player_level)})"
+                category = get_category_by_level(player_level)
+                category_display = f"Категория {category}" if category else ""
+            else:
+                level_display = "Не установлен"
+                category_display = ""
+            
+            worksheet.write_row(count, 0, [
+                user['telegram_id'],
+                user['full_name'],
+                user['phone_number'],
+                level_display,
+                category_display,
+                formatted_date
+            ], cell_format)
+        
+        workbook.close()
+        logger.info(f"Exported {count} users to xlsx")
+        return count
+    
+    @staticmethod
+    def write_participants_xlsx(output, participants: List[Dict]):
+        """
+        Записать участников турнира в xlsx
+        
+        Args:
+            output: файловый объект для записи книги
+            participants: участники из get_tournament_participants
+        """
+        workbook = xlsxwriter.Workbook(output)
+        worksheet = workbook.add_worksheet('Участники')
+        
+        # Форматы
+        header_format = workbook.add_format(HEADER_FORMAT)
+        main_format = workbook.add_format({'bg_color': '#E8F4FD'})
+        reserve_format = workbook.add_format({'bg_color': '#FFF2CC'})
+        pending_format = workbook.add_format({'bg_color': '#FFE6E6'})
+        
+        # Заголовки
+        headers = ['№', 'ФИО', 'Телефон', 'Статус', 'Тип участия', 'Время регистрации']
+        for col, header in enumerate(headers):
+            worksheet.write(0, col, header, header_format)
+        
+        # Данные участников
+        for row, participant in enumerate(participants, 1):
+            # Выбираем формат в зависимости от типа и статуса
+            if participant['status'] == 'pending':
+                cell_format = pending_format
+            elif participant['type'] == 'основной':
+                cell_format = main_format
+            else:
+                cell_format = reserve_format
+            
+            worksheet.write(row, 0, participant['position'], cell_format)
+            worksheet.write(row, 1, participant['name'], cell_format)
+            worksheet.write(row, 2, participant['phone'], cell_format)
+            worksheet.write(row, 3, participant['status_text'], cell_format)
+            worksheet.write(row, 4, participant['type'], cell_format)
+            worksheet.write(row, 5, participant['registration_time'][:16], cell_format)
+        
+        # Автоподбор ширины колонок
+        worksheet.set_column('A:A', 5)
+        worksheet.set_column('B:B', 25)
+        worksheet.set_column('C:C', 15)
+        worksheet.set_column('D:D', 12)
+        worksheet.set_column('E:E', 12)
+        worksheet.set_column('F:F', 18)
+        
+        workbook.close()
+    
+    @staticmethod
+    async def send_participants_export(bot: Bot, chat_id: int, tournament_id: int,
+                                       on_progress: Callable) -> bool:
+        """
+        Отправить выгрузку участников турнира (фоновая задача)
+        
+        Если состав турнира не менялся с прошлой выгрузки, файл повторно
+        отправляется по сохранённому file_id без построения и загрузки.
+        
+        Args:
+            bot: экземпляр бота
+            chat_id (int): чат, куда отправить файл
+            tournament_id (int): ID турнира
+            on_progress: корутина-функция on_progress(text) для отчёта о ходе выгрузки
+        
+        Returns:
+            bool: True если файл отправлен, False если турнир не найден или участников нет
+        """
+        async with _export_jobs:
+            # Версию фиксируем до чтения данных: изменения во время выгрузки сбросят кэш
+            version = card_cache.version(tournament_id)
+            cached = _participants_exports.get(tournament_id)
+            
+            if cached and cached[0] == version:
+                logger.info(f"Participants export for tournament {tournament_id} served from cache")
+                await bot.send_document(chat_id=chat_id, document=cached[1], caption=cached[2])
+                return True
+            
+            await on_progress("⏳ Загружаем участников...")
+            
+            tournament = await AsyncTournamentService.get_tournament_by_id(tournament_id)
+            participants = await AsyncParticipationService.get_tournament_participants(tournament_id)
+            
+            if not tournament or not participants:
+                return False
+            
+            await on_progress(f"⏳ Формируем файл...\nУчастников: {len(participants)}")
+            
+            with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES) as output:
+                await asyncio.to_thread(ExportService.write_participants_xlsx, output, participants)
+                output.seek(0)
+                
+                await on_progress("📤 Отправляем файл...")
+                
+                filename = f"participants_{tournament['name']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+                caption = (
+                    f"📊 Участники турнира: {tournament['name']}\n"
+                    f"Всего участников: {len(participants)}"
+                )
+                
+                message = await bot.send_document(
+                    chat_id=chat_id,
+                    document=output,
+                    filename=filename,
+                    caption=caption
+                )
+            
+            _participants_exports[tournament_id] = (version, message.document.file_id, caption)
+            return True
@@ -1,7 +1,12 @@
 import logging
+from typing import Optional
 from database.connection import db
 from telegram.ext import Application
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from services.broadcast_service import BroadcastService
+from levels import get_level_number
+from utils.callback_router import encode_callback
+from config import BROADCAST_INCLUDE_UNLEVELED
 
 logger = logging.getLogger(__name__)
 
@@ -13,18 +18,69 @@ class NotificationService:
         try:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
-                # Исключаем системных пользователей с отрицательными ID
-                cursor.execute("SELECT telegram_id FROM users WHERE telegram_id > 0")
+                # Исключаем системных пользователей с отрицательными ID и заблокировавших бота
+                cursor.execute("SELECT telegram_id FROM users WHERE telegram_id > 0 AND is_blocked = 0")
                 return [row[0] for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"Error getting users: {e}")
             return []
     
     @staticmethod
-    async def notify_new_tournament(application: Application, tournament: dict):
-        """Уведомить всех о новом турнире"""
+    def get_users_by_level_range(min_level: str, max_level: str,
+                                 include_unleveled: bool = BROADCAST_INCLUDE_UNLEVELED):
+        """
+        Получить пользователей, чей уровень входит в диапазон турнира
+        
+        Args:
+            min_level (str): Минимальный уровень, например "3.0"
+            max_level (str): Максимальный уровень, например "4.5"
+            include_unleveled (bool): Добавить игроков, которым уровень ещё не установлен
+        
+        Returns:
+            list: Telegram ID получателей
+        """
+        min_num = get_level_number(min_level)
+        max_num = get_level_number(max_level)
+        if min_num is None or max_num is None:
+            return NotificationService.get_all_registered_users()
+        
         try:
-            user_ids = NotificationService.get_all_registered_users()
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                # Обе выборки идут по индексу idx_users_level_num (с OR SQLite берёт индекс по telegram_id)
+                cursor.execute("""
+                    SELECT telegram_id FROM users
+                    WHERE telegram_id > 0 AND is_blocked = 0
+                      AND player_level_num BETWEEN ? AND ?
+                """, (min_num, max_num))
+                user_ids = [row[0] for row in cursor.fetchall()]
+                
+                if include_unleveled:
+                    cursor.execute("""
+                        SELECT telegram_id FROM users
+                        WHERE telegram_id > 0 AND is_blocked = 0
+                          AND player_level_num IS NULL
+                    """)
+                    user_ids.extend(row[0] for row in cursor.fetchall())
+                
+                return user_ids
+        except Exception as e:
+            logger.error(f"Error getting users by level range: {e}")
+            return []
+    
+    @staticmethod
+    def get_tournament_audience(tournament: dict):
+        """Получатели анонса турнира: с ограничением по уровню - только подходящие игроки"""
+        if tournament.get('level_restriction') == 'restricted' and tournament.get('min_level') and tournament.get('max_level'):
+            return NotificationService.get_users_by_level_range(tournament['min_level'], tournament['max_level'])
+        return NotificationService.get_all_registered_users()
+    
+    @staticmethod
+    async def notify_new_tournament(application: Application, tournament: dict,
+                                    admin_chat_id: Optional[int] = None):
+        """Уведомить о новом турнире подходящих по уровню игроков (запускать фоновой задачей через application.create_task)"""
+        try:
+            user_ids = await db.run(NotificationService.get_tournament_audience, tournament)
             
             text = (
                 f"🎾 Новый турнир!\n\n"
@@ -52,25 +108,22 @@ class NotificationService:
             keyboard = [
                 [InlineKeyboardButton(
                     "📋 Подробнее о турнире", 
-                    callback_data=f"tournament_{tournament['id']}"
+                    callback_data=encode_callback("tournament", tournament['id'])
                 )]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
-            success_count = 0
-            for user_id in user_ids:
-                try:
-                    await application.bot.send_message(
-                        chat_id=user_id,
-                        text=text,
-                        reply_markup=reply_markup
-                    )
-                    success_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to send notification to {user_id}: {e}")
+            stats = await BroadcastService.broadcast_message(
+                application.bot,
+                user_ids,
+                text,
+                reply_markup=reply_markup,
+                admin_chat_id=admin_chat_id,
+                title=f"Рассылка о турнире «{tournament['name']}»"
+            )
             
-            logger.info(f"Tournament notification sent to {success_count}/{len(user_ids)} users")
-            return success_count
+            logger.info(f"Tournament notification sent to {stats['sent']}/{len(user_ids)} users")
+            return stats['sent']
             
         except Exception as e:
             logger.error(f"Error in notify_new_tournament: {e}")
@@ -1,6 +1,7 @@
 import sqlite3
 import logging
-from database.connection import db
+from database.connection import db, AsyncService
+from services.card_cache import card_cache
 from typing import Optional, List, Dict
 from config import MAX_MAIN_PARTICIPANTS, MAX_RESERVE_PARTICIPANTS
 
@@ -8,6 +9,20 @@ logger = logging.getLogger(__name__)
 
 class ParticipationService:
     
+    @staticmethod
+    def split_counts(total_count: int) -> Dict[str, int]:
+        """Разделить количество занятых мест на основные и резерв"""
+        main_count = min(total_count, MAX_MAIN_PARTICIPANTS)
+        reserve_count = max(0, total_count - MAX_MAIN_PARTICIPANTS)
+        
+        return {
+            'total': total_count,
+            'main': main_count,
+            'reserve': reserve_count,
+            'available_main': MAX_MAIN_PARTICIPANTS - main_count,
+            'available_reserve': MAX_RESERVE_PARTICIPANTS - reserve_count
+        }
+    
     @staticmethod
     def get_participants_count(tournament_id: int) -> Dict[str, int]:
         """Получить количество участников турнира"""
@@ -22,20 +37,32 @@ class ParticipationService:
                 
                 total_count = cursor.fetchone()[0]
                 
-                main_count = min(total_count, MAX_MAIN_PARTICIPANTS)
-                reserve_count = max(0, total_count - MAX_MAIN_PARTICIPANTS)
-                
-                return {
-                    'total': total_count,
-                    'main': main_count,
-                    'reserve': reserve_count,
-                    'available_main': MAX_MAIN_PARTICIPANTS - main_count,
-                    'available_reserve': MAX_RESERVE_PARTICIPANTS - reserve_count
-                }
+                return ParticipationService.split_counts(total_count)
         except Exception as e:
             logger.error(f"Error getting participants count: {e}")
             return {'total': 0, 'main': 0, 'reserve': 0, 'available_main': 16, 'available_reserve': 5}
     
+    @staticmethod
+    def _insert_if_slot_available(cursor, user_id: int, tournament_id: int, status: str, deadline=None) -> bool:
+        """
+        Занять место в турнире, если оно ещё есть
+        
+        Проверка и вставка выполняются одним запросом внутри BEGIN IMMEDIATE,
+        поэтому одновременные записи не могут превысить лимит мест.
+        """
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            INSERT INTO participations (user_id, tournament_id, status, payment_deadline)
+            SELECT ?, ?, ?, ?
+            WHERE (
+                SELECT COUNT(*) FROM participations
+                WHERE tournament_id = ? AND status IN ('confirmed', 'pending')
+            ) < ?
+        """, (user_id, tournament_id, status, deadline,
+              tournament_id, MAX_MAIN_PARTICIPANTS + MAX_RESERVE_PARTICIPANTS))
+        
+        return cursor.rowcount > 0
+    
     @staticmethod
     def add_participant(user_id: int, tournament_id: int) -> bool:
         """Добавить участника в турнир"""
@@ -43,21 +70,15 @@ class ParticipationService:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Проверяем, есть ли свободные места
-                counts = ParticipationService.get_participants_count(tournament_id)
-                total_available = counts['available_main'] + counts['available_reserve']
-                
-                if total_available <= 0:
-                    return False
-                
-                cursor.execute("""
-                    INSERT INTO participations (user_id, tournament_id, status)
-                    VALUES (?, ?, 'confirmed')
-                """, (user_id, tournament_id))
-                
+                added = ParticipationService._insert_if_slot_available(
+                    cursor, user_id, tournament_id, 'confirmed'
+                )
                 conn.commit()
-                logger.info(f"User {user_id} added to tournament {tournament_id}")
-                return True
+                
+                if added:
+                    card_cache.invalidate(tournament_id)
+                    logger.info(f"User {user_id} added to tournament {tournament_id}")
+                return added
         except sqlite3.IntegrityError:
             # Пользователь уже зарегистрирован
             logger.warning(f"User {user_id} already registered for tournament {tournament_id}")
@@ -78,7 +99,11 @@ class ParticipationService:
                 """, (user_id, tournament_id))
                 
                 conn.commit()
-                return cursor.rowcount > 0
+                
+                if cursor.rowcount > 0:
+                    card_cache.invalidate(tournament_id)
+                    return True
+                return False
         except Exception as e:
             logger.error(f"Error removing participant: {e}")
             return False
@@ -99,19 +124,52 @@ class ParticipationService:
             logger.error(f"Error checking user registration: {e}")
             return False
     
+    @staticmethod
+    def get_participation_statuses(tournament_id: int) -> Dict[int, Dict]:
+        """
+        Получить участие всех записавшихся на турнир одним запросом
+        
+        Returns:
+            dict: {user_id: {'status', 'payment_deadline'}} - как в get_user_participation_status
+        """
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT user_id, status, payment_deadline FROM participations WHERE tournament_id = ?
+                """, (tournament_id,))
+                
+                return {
+                    row[0]: {'status': row[1], 'payment_deadline': row[2]}
+                    for row in cursor.fetchall()
+                }
+        except Exception as e:
+            logger.error(f"Error getting participation statuses: {e}")
+            return {}
+    
     @staticmethod
     def get_tournament_participants(tournament_id: int) -> List[Dict]:
-        """Получить список участников турнира с цветовой индикацией"""
+        """
+        Получить список участников турнира с цветовой индикацией
+        
+        Участия архивных турниров лежат в participations_archive, поэтому
+        состав читается из обеих таблиц (у турнира записи есть только в одной из них).
+        """
         try:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT u.full_name, u.phone_number, p.registration_time, p.status
-                    FROM participations p
+                    SELECT u.full_name, u.phone_number, p.registration_time, p.status, p.user_id
+                    FROM (
+                        SELECT user_id, registration_time, status FROM participations
+                        WHERE tournament_id = ?
+                        UNION ALL
+                        SELECT user_id, registration_time, status FROM participations_archive
+                        WHERE tournament_id = ?
+                    ) p
                     JOIN users u ON p.user_id = u.telegram_id
-                    WHERE p.tournament_id = ?
                     ORDER BY p.registration_time ASC
-                """, (tournament_id,))
+                """, (tournament_id, tournament_id))
                 
                 results = cursor.fetchall()
                 participants = []
@@ -135,7 +193,8 @@ class ParticipationService:
                         'status': row[3],
                         'type': participant_type,
                         'status_icon': status_icon,
-                        'status_text': status_text
+                        'status_text': status_text,
+                        'user_id': row[4]
                     })
                 
                 return participants
@@ -153,27 +212,19 @@ class ParticipationService:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Проверяем, есть ли свободные места (включая pending)
-                cursor.execute("""
-                    SELECT COUNT(*) FROM participations 
-                    WHERE tournament_id = ? AND status IN ('confirmed', 'pending')
-                """, (tournament_id,))
-                
-                current_count = cursor.fetchone()[0]
-                max_total = MAX_MAIN_PARTICIPANTS + MAX_RESERVE_PARTICIPANTS
-                
-                if current_count >= max_total:
-                    return False
-                
                 # Устанавливаем дедлайн
                 deadline = datetime.now() + timedelta(minutes=PAYMENT_TIMEOUT_MINUTES)
                 
-                cursor.execute("""
-                    INSERT INTO participations (user_id, tournament_id, status, payment_deadline)
-                    VALUES (?, ?, 'pending', ?)
-                """, (user_id, tournament_id, deadline))
-                
+                # Проверяем свободные места (включая pending) и записываем атомарно
+                added = ParticipationService._insert_if_slot_available(
+                    cursor, user_id, tournament_id, 'pending', deadline
+                )
                 conn.commit()
+                
+                if not added:
+                    return False
+                
+                card_cache.invalidate(tournament_id)
                 logger.info(f"User {user_id} added to tournament {tournament_id} as pending")
                 return True
         except sqlite3.IntegrityError:
@@ -214,12 +265,53 @@ class ParticipationService:
             logger.error(f"Error getting pending participations: {e}")
             return []
 
+    @staticmethod
+    def get_participation_details(participation_id: int) -> Optional[Dict]:
+        """Получить заявку вместе с данными пользователя и турнира"""
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT p.id, p.user_id, u.full_name, u.phone_number, p.registration_time,
+                           p.payment_deadline, t.name, p.tournament_id
+                    FROM participations p
+                    LEFT JOIN users u ON p.user_id = u.telegram_id
+                    JOIN tournaments t ON p.tournament_id = t.id
+                    WHERE p.id = ?
+                """, (participation_id,))
+                
+                result = cursor.fetchone()
+                if result:
+                    return {
+                        'participation_id': result[0],
+                        'user_id': result[1],
+                        'name': result[2],
+                        'phone': result[3],
+                        'registration_time': result[4],
+                        'payment_deadline': result[5],
+                        'tournament_name': result[6],
+                        'tournament_id': result[7]
+                    }
+                return None
+        except Exception as e:
+            logger.error(f"Error getting participation details: {e}")
+            return None
+
+    @staticmethod
+    def _get_tournament_id(cursor, participation_id: int) -> Optional[int]:
+        """ID турнира, к которому относится заявка"""
+        cursor.execute("SELECT tournament_id FROM participations WHERE id = ?", (participation_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
     @staticmethod
     def approve_participation(participation_id: int) -> bool:
         """Одобрить участие"""
         try:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
+                tournament_id = ParticipationService._get_tournament_id(cursor, participation_id)
+                
                 cursor.execute("""
                     UPDATE participations 
                     SET status = 'confirmed', payment_deadline = NULL
@@ -227,7 +319,11 @@ class ParticipationService:
                 """, (participation_id,))
                 
                 conn.commit()
-                return cursor.rowcount > 0
+                
+                if cursor.rowcount > 0:
+                    card_cache.invalidate(tournament_id)
+                    return True
+                return False
         except Exception as e:
             logger.error(f"Error approving participation: {e}")
             return False
@@ -238,39 +334,132 @@ class ParticipationService:
         try:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
+                tournament_id = ParticipationService._get_tournament_id(cursor, participation_id)
+                
                 cursor.execute("""
                     DELETE FROM participations WHERE id = ?
                 """, (participation_id,))
                 
                 conn.commit()
-                return cursor.rowcount > 0
+                
+                if cursor.rowcount > 0:
+                    card_cache.invalidate(tournament_id)
+                    return True
+                return False
         except Exception as e:
             logger.error(f"Error rejecting participation: {e}")
             return False
 
     @staticmethod
-    def cleanup_expired_participations():
-        """Удалить просроченные заявки"""
+    def _get_main_user_ids(cursor, tournament_id: int) -> set:
+        """ID игроков, занимающих основные места турнира"""
+        cursor.execute("""
+            SELECT user_id FROM participations
+            WHERE tournament_id = ? AND status IN ('confirmed', 'pending')
+            ORDER BY registration_time ASC
+            LIMIT ?
+        """, (tournament_id, MAX_MAIN_PARTICIPANTS))
+        
+        return {row[0] for row in cursor.fetchall()}
+    
+    @staticmethod
+    def cleanup_expired_participations() -> Dict[str, List[Dict]]:
+        """
+        Удалить просроченные заявки одной транзакцией
+        
+        Позиция участника определяется временем регистрации, поэтому освободившиеся
+        основные места сразу занимают игроки из резерва - их тоже возвращаем,
+        чтобы уведомить о переводе в основной состав.
+        
+        Returns:
+            dict: {'expired': [...], 'promoted': [...]},
+                  элементы - словари {'user_id', 'tournament_id', 'tournament_name'}
+        """
+        result = {'expired': [], 'promoted': []}
+        
         try:
             from datetime import datetime
             
             with db.get_connection() as conn:
                 cursor = conn.cursor()
+                # Блокируем запись сразу, чтобы состав не изменился между чтением и удалением
+                cursor.execute("BEGIN IMMEDIATE")
+                
                 cursor.execute("""
-                    DELETE FROM participations 
-                    WHERE status = 'pending' AND payment_deadline < ?
+                    SELECT p.id, p.user_id, p.tournament_id, t.name
+                    FROM participations p
+                    JOIN tournaments t ON p.tournament_id = t.id
+                    WHERE p.status = 'pending' AND p.payment_deadline <= ?
                 """, (datetime.now(),))
                 
-                deleted_count = cursor.rowcount
+                expired_rows = cursor.fetchall()
+                
+                if not expired_rows:
+                    conn.commit()
+                    return result
+                
+                tournament_names = {row[2]: row[3] for row in expired_rows}
+                main_before = {
+                    tournament_id: ParticipationService._get_main_user_ids(cursor, tournament_id)
+                    for tournament_id in tournament_names
+                }
+                
+                cursor.executemany(
+                    "DELETE FROM participations WHERE id = ?",
+                    [(row[0],) for row in expired_rows]
+                )
+                
+                for tournament_id, tournament_name in tournament_names.items():
+                    main_after = ParticipationService._get_main_user_ids(cursor, tournament_id)
+                    for user_id in main_after - main_before[tournament_id]:
+                        result['promoted'].append({
+                            'user_id': user_id,
+                            'tournament_id': tournament_id,
+                            'tournament_name': tournament_name
+                        })
+                
                 conn.commit()
                 
-                if deleted_count > 0:
-                    logger.info(f"Cleaned up {deleted_count} expired participations")
+                for tournament_id in tournament_names:
+                    card_cache.invalidate(tournament_id)
+                
+                result['expired'] = [
+                    {'user_id': row[1], 'tournament_id': row[2], 'tournament_name': row[3]}
+                    for row in expired_rows
+                ]
                 
-                return deleted_count
+                logger.info(
+                    f"Cleaned up {len(result['expired'])} expired participations, "
+                    f"promoted {len(result['promoted'])} from reserve"
+                )
+                return result
         except Exception as e:
             logger.error(f"Error cleaning expired participations: {e}")
-            return 0
+            return {'expired': [], 'promoted': []}
+    
+    @staticmethod
+    def get_next_payment_deadline():
+        """
+        Ближайший дедлайн оплаты среди заявок в статусе pending
+        
+        Returns:
+            datetime или None, если неоплаченных заявок нет
+        """
+        try:
+            from datetime import datetime
+            
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT MIN(payment_deadline) FROM participations
+                    WHERE status = 'pending'
+                """)
+                
+                deadline = cursor.fetchone()[0]
+                return datetime.fromisoformat(deadline) if deadline else None
+        except Exception as e:
+            logger.error(f"Error getting next payment deadline: {e}")
+            return None
             
     @staticmethod
     def get_user_participation_status(user_id: int, tournament_id: int) -> Optional[Dict]:
@@ -294,4 +483,8 @@ class ParticipationService:
                 return None
         except Exception as e:
             logger.error(f"Error getting user participation status: {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+# Awaitable-версия сервиса для вызова из обработчиков
+AsyncParticipationService = AsyncService(ParticipationService)
@@ -1,8 +1,13 @@
 import sqlite3
 import logging
-from database.connection import db
+from datetime import datetime
+from database.connection import db, AsyncService
+from services.card_cache import card_cache
+from services.eligibility_index import eligibility_index
 from typing import Optional, List, Dict
 from config import MAX_MAIN_PARTICIPANTS, MAX_RESERVE_PARTICIPANTS
+from services.participation_service import ParticipationService
+from utils.tournament_dates import parse_tournament_start, to_starts_at
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +20,23 @@ class TournamentService:
                          level_restriction: str = 'open',
                          min_level: str = None,
                          max_level: str = None) -> Optional[int]:
-        """Создать турнир с ограничениями по уровню"""
+        """Создать турнир с ограничениями по уровню (starts_at разбирается из текста date)"""
         try:
+            starts_at = to_starts_at(parse_tournament_start(date))
+            
             with db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    INSERT INTO tournaments (name, date, location, format_info, entry_fee, 
+                    INSERT INTO tournaments (name, date, starts_at, location, format_info, entry_fee, 
                                            description, created_by, tournament_type,
                                            level_restriction, min_level, max_level)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (name, date, location, format_info, entry_fee, description, created_by, 
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (name, date, starts_at, location, format_info, entry_fee, description, created_by, 
                       tournament_type, level_restriction, min_level, max_level))
                 
                 new_tournament_id = cursor.lastrowid
                 conn.commit()
+                eligibility_index.refresh(new_tournament_id)
                 logger.info(f"Tournament created with levels: {name} (ID: {new_tournament_id}), restriction: {level_restriction}, range: {min_level}-{max_level}")
                 return new_tournament_id
         except Exception as e:
@@ -44,7 +52,7 @@ class TournamentService:
                 cursor.execute("""
                     SELECT id, name, date, location, format_info, entry_fee, description, status, created_at
                     FROM tournaments WHERE status = 'active'
-                    ORDER BY date ASC
+                    ORDER BY starts_at ASC, id ASC
                 """)
                 
                 results = cursor.fetchall()
@@ -68,6 +76,49 @@ class TournamentService:
             logger.error(f"Error getting tournaments: {e}")
             return []
     
+    @staticmethod
+    def get_active_tournaments_with_counts() -> List[Dict]:
+        """Получить активные турниры вместе с количеством участников одним запросом"""
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT t.id, t.name, t.date, t.location, t.entry_fee,
+                           COALESCE(SUM(p.status = 'confirmed'), 0) AS confirmed_count,
+                           COALESCE(SUM(p.status = 'pending'), 0) AS pending_count
+                    FROM tournaments t
+                    LEFT JOIN participations p ON p.tournament_id = t.id
+                    WHERE t.status = 'active'
+                    GROUP BY t.id
+                    ORDER BY t.starts_at ASC, t.id ASC
+                """)
+                
+                tournaments = []
+                
+                for row in cursor.fetchall():
+                    counts = ParticipationService.split_counts(row[5] + row[6])
+                    counts['confirmed'] = row[5]
+                    counts['pending'] = row[6]
+                    
+                    tournaments.append({
+                        'id': row[0],
+                        'name': row[1],
+                        'date': row[2],
+                        'location': row[3],
+                        'entry_fee': row[4],
+                        'counts': counts
+                    })
+                
+                return tournaments
+        except Exception as e:
+            logger.error(f"Error getting tournaments with counts: {e}")
+            return []
+    
+    @staticmethod
+    def get_eligible_tournaments(player_level: Optional[str]) -> List[Dict]:
+        """Активные турниры со свободными местами, на которые может записаться игрок этого уровня"""
+        return eligibility_index.get_eligible_tournaments(player_level)
+    
     @staticmethod
     def get_tournament_by_id(tournament_id: int) -> Optional[Dict]:
         """Получить турнир по ID"""
@@ -76,7 +127,7 @@ class TournamentService:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT id, name, date, location, format_info, entry_fee, description, 
-                           status, created_at, level_restriction, min_level, max_level
+                           status, created_at, level_restriction, min_level, max_level, starts_at
                     FROM tournaments WHERE id = ?
                 """, (tournament_id,))
                 
@@ -94,31 +145,145 @@ class TournamentService:
                         'created_at': result[8],
                         'level_restriction': result[9],  # ← ДОБАВИЛИ
                         'min_level': result[10],         # ← ДОБАВИЛИ
-                        'max_level': result[11]          # ← ДОБАВИЛИ
+                        'max_level': result[11],         # ← ДОБАВИЛИ
+                        'starts_at': result[12]
                     }
                 return None
         except Exception as e:
             logger.error(f"Error getting tournament: {e}")
             return None
             
+    @staticmethod
+    def _move_to_archive(cursor, tournament_ids: List[int]):
+        """
+        Перенести участия архивных турниров в participations_archive
+        
+        Горячие таблицы хранят только активные турниры, поэтому их размер
+        не растёт с историей. Просмотры карточек архивных турниров больше не нужны.
+        """
+        params = [(tournament_id,) for tournament_id in tournament_ids]
+        archived_at = datetime.now()
+        
+        cursor.executemany("""
+            INSERT INTO participations_archive
+                (id, user_id, tournament_id, status, registration_time, payment_deadline, archived_at)
+            SELECT id, user_id, tournament_id, status, registration_time, payment_deadline, ?
+            FROM participations WHERE tournament_id = ?
+        """, [(archived_at, tournament_id) for tournament_id in tournament_ids])
+        cursor.executemany("DELETE FROM participations WHERE tournament_id = ?", params)
+        cursor.executemany("DELETE FROM tournament_views WHERE tournament_id = ?", params)
+    
     @staticmethod
     def archive_tournament(tournament_id: int) -> bool:
         """Переместить турнир в архив"""
         try:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
                 cursor.execute("""
                     UPDATE tournaments 
                     SET status = 'archived'
                     WHERE id = ?
                 """, (tournament_id,))
+                archived = cursor.rowcount > 0
+                
+                if archived:
+                    TournamentService._move_to_archive(cursor, [tournament_id])
                 
                 conn.commit()
+                card_cache.invalidate(tournament_id)
+                eligibility_index.refresh(tournament_id)
                 logger.info(f"Tournament {tournament_id} archived")
-                return cursor.rowcount > 0
+                return archived
         except Exception as e:
             logger.error(f"Error archiving tournament: {e}")
             return False
+    
+    @staticmethod
+    def archive_finished_tournaments(started_before: datetime, created_before: datetime) -> List[int]:
+        """
+        Заархивировать активные турниры, начавшиеся раньше started_before
+        
+        Турниры без разобранной даты начала (starts_at IS NULL) архивируются,
+        если созданы раньше created_before.
+        
+        Returns:
+            list: ID заархивированных турниров
+        """
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                # Блокируем запись сразу, чтобы на турнир не записались между выборкой и переносом
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("""
+                    SELECT id FROM tournaments
+                    WHERE status = 'active' AND starts_at < ?
+                """, (to_starts_at(started_before),))
+                tournament_ids = [row[0] for row in cursor.fetchall()]
+                
+                cursor.execute("""
+                    SELECT id FROM tournaments
+                    WHERE status = 'active' AND starts_at IS NULL AND created_at < ?
+                """, (created_before.strftime('%Y-%m-%d %H:%M:%S'),))
+                tournament_ids += [row[0] for row in cursor.fetchall()]
+                
+                if tournament_ids:
+                    cursor.executemany(
+                        "UPDATE tournaments SET status = 'archived' WHERE id = ?",
+                        [(tournament_id,) for tournament_id in tournament_ids]
+                    )
+                    TournamentService._move_to_archive(cursor, tournament_ids)
+                
+                conn.commit()
+            
+            for tournament_id in tournament_ids:
+                card_cache.invalidate(tournament_id)
+                eligibility_index.refresh(tournament_id)
+            
+            if tournament_ids:
+                logger.info(f"Auto-archived {len(tournament_ids)} finished tournaments: {tournament_ids}")
+            return tournament_ids
+        except Exception as e:
+            logger.error(f"Error archiving finished tournaments: {e}")
+            return []
+    
+    @staticmethod
+    def get_archived_tournaments(limit: int) -> List[Dict]:
+        """Последние архивные турниры (по дате начала, новые первыми)"""
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id, name, date FROM tournaments
+                    WHERE status = 'archived'
+                    ORDER BY starts_at DESC, id DESC
+                    LIMIT ?
+                """, (limit,))
+                
+                return [
+                    {'id': row[0], 'name': row[1], 'date': row[2]}
+                    for row in cursor.fetchall()
+                ]
+        except Exception as e:
+            logger.error(f"Error getting archived tournaments: {e}")
+            return []
+    
+    @staticmethod
+    def get_next_start_time() -> Optional[datetime]:
+        """Самое раннее начало среди активных турниров (для планирования автоархивации)"""
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT MIN(starts_at) FROM tournaments
+                    WHERE status = 'active' AND starts_at IS NOT NULL
+                """)
+                
+                starts_at = cursor.fetchone()[0]
+                return datetime.fromisoformat(starts_at) if starts_at else None
+        except Exception as e:
+            logger.error(f"Error getting next tournament start: {e}")
+            return None
             
     @staticmethod
     def update_tournament(tournament_id: int, updated_fields: dict) -> bool:
@@ -147,6 +312,11 @@ class TournamentService:
                 logger.warning("No valid fields to update")
                 return False
             
+            # Вместе с текстом даты обновляется и дата начала для сортировки
+            if 'date' in updated_fields:
+                set_clauses.append("starts_at = ?")
+                values.append(to_starts_at(parse_tournament_start(updated_fields['date'])))
+            
             values.append(tournament_id)
             
             with db.get_connection() as conn:
@@ -158,6 +328,8 @@ class TournamentService:
                 
                 cursor.execute(query, values)
                 conn.commit()
+                card_cache.invalidate(tournament_id)
+                eligibility_index.refresh(tournament_id)
                 
                 rows_affected = cursor.rowcount
                 logger.info(f"Rows affected: {rows_affected}")
@@ -166,4 +338,8 @@ class TournamentService:
                 
         except Exception as e:
             logger.error(f"Error updating tournament: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+# Awaitable-версия сервиса для вызова из обработчиков
+AsyncTournamentService = AsyncService(TournamentService)
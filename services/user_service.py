@@ -1,29 +1,107 @@
 import sqlite3
 import logging
-from database.connection import db
+import threading
+import time
+from collections import OrderedDict
+from database.connection import db, AsyncService
+from services.card_cache import card_cache
 from typing import Optional, Dict
 from datetime import datetime
+from levels import get_level_number
+from config import USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS
 
 logger = logging.getLogger(__name__)
 
+class UserCache:
+    """
+    LRU-кэш профилей пользователей по telegram_id с ограничением времени жизни
+    
+    Запоминает и отсутствие пользователя (None), чтобы незарегистрированные
+    не обращались к БД на каждом нажатии. Потокобезопасен: используется из потоков БД.
+    
+    Как и в кэше карточек, у пользователя есть счётчик версий, который увеличивается
+    при каждом изменении: профиль, прочитанный до изменения, в кэш не попадает.
+    """
+    
+    # Отличает "нет в кэше" от закэшированного None
+    MISSING = object()
+    
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, telegram_id: int):
+        """Профиль (или None для незарегистрированного), либо MISSING"""
+        with self._lock:
+            entry = self._entries.get(telegram_id)
+            
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(telegram_id, None)
+                self.misses += 1
+                return UserCache.MISSING
+            
+            self._entries.move_to_end(telegram_id)
+            self.hits += 1
+            # Копия, чтобы изменения в обработчиках не портили кэш
+            return dict(entry[1]) if entry[1] is not None else None
+    
+    def version(self, telegram_id: int) -> int:
+        """Текущая версия данных пользователя"""
+        with self._lock:
+            return self._versions.get(telegram_id, 0)
+    
+    def put(self, telegram_id: int, version: int, user: Optional[Dict]):
+        """
+        Сохранить профиль, прочитанный по версии version
+        
+        Версию нужно получить до чтения из БД: если пользователь изменился
+        во время чтения, устаревший профиль не сохраняется.
+        """
+        with self._lock:
+            if version != self._versions.get(telegram_id, 0):
+                return
+            
+            self._entries[telegram_id] = (time.monotonic() + self._ttl, user)
+            self._entries.move_to_end(telegram_id)
+            
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, telegram_id: int):
+        """Отметить данные пользователя изменёнными"""
+        with self._lock:
+            self._versions[telegram_id] = self._versions.get(telegram_id, 0) + 1
+            self._entries.pop(telegram_id, None)
+    
+    def stats(self) -> Dict:
+        """Метрики кэша: попадания, промахи, размер"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
 class UserService:
     
     @staticmethod
     def is_user_registered(telegram_id: int) -> bool:
         """Проверяем, зарегистрирован ли пользователь"""
-        try:
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id FROM users WHERE telegram_id = ?", (telegram_id,))
-                result = cursor.fetchone()
-                return result is not None
-        except Exception as e:
-            logger.error(f"Error checking user registration: {e}")
-            return False
+        return UserService.get_user_by_telegram_id(telegram_id) is not None
     
     @staticmethod
     def get_user_by_telegram_id(telegram_id: int) -> Optional[Dict]:
-        """Получаем пользователя по telegram_id"""
+        """Получаем пользователя по telegram_id (через кэш)"""
+        cached = user_cache.get(telegram_id)
+        if cached is not UserCache.MISSING:
+            return cached
+        
+        version = user_cache.version(telegram_id)
+        
         try:
             with db.get_connection() as conn:
                 cursor = conn.cursor()
@@ -35,8 +113,9 @@ class UserService:
                 """, (telegram_id,))
                 
                 result = cursor.fetchone()
+                user = None
                 if result:
-                    return {
+                    user = {
                         'id': result[0],
                         'telegram_id': result[1],
                         'full_name': result[2],
@@ -48,7 +127,9 @@ class UserService:
                         'player_level_updated_at': result[8],
                         'player_level_updated_by': result[9]
                     }
-                return None
+                
+                user_cache.put(telegram_id, version, user)
+                return dict(user) if user else None
         except Exception as e:
             logger.error(f"Error getting user: {e}")
             return None
@@ -67,6 +148,8 @@ class UserService:
                 """, (telegram_id, full_name, phone_number, skill_level, age_category))
                 
                 conn.commit()
+                # Сбрасываем закэшированное "не зарегистрирован"
+                user_cache.invalidate(telegram_id)
                 logger.info(f"User {telegram_id} registered successfully")
                 return True
         except Exception as e:
@@ -84,6 +167,9 @@ class UserService:
                 """, (new_name, telegram_id))
                 
                 conn.commit()
+                user_cache.invalidate(telegram_id)
+                # Имя участника показывается в карточках турниров
+                card_cache.invalidate_all()
                 logger.info(f"User {telegram_id} name updated to {new_name}")
                 return cursor.rowcount > 0
         except Exception as e:
@@ -113,12 +199,14 @@ class UserService:
                 cursor.execute("""
                     UPDATE users 
                     SET player_level = ?,
+                        player_level_num = ?,
                         player_level_updated_at = ?,
                         player_level_updated_by = ?
                     WHERE telegram_id = ?
-                """, (level_code, datetime.now(), admin_id, telegram_id))
+                """, (level_code, get_level_number(level_code), datetime.now(), admin_id, telegram_id))
                 
                 conn.commit()
+                user_cache.invalidate(telegram_id)
                 
                 if cursor.rowcount > 0:
                     logger.info(f"Player level set: user={telegram_id}, level={level_code}, by_admin={admin_id}")
@@ -174,12 +262,14 @@ class UserService:
                 cursor.execute("""
                     UPDATE users 
                     SET player_level = NULL,
+                        player_level_num = NULL,
                         player_level_updated_at = ?,
                         player_level_updated_by = ?
                     WHERE telegram_id = ?
                 """, (datetime.now(), admin_id, telegram_id))
                 
                 conn.commit()
+                user_cache.invalidate(telegram_id)
                 
                 if cursor.rowcount > 0:
                     logger.info(f"Player level reset: user={telegram_id}, by_admin={admin_id}")
@@ -228,6 +318,96 @@ class UserService:
             logger.error(f"Error getting all users: {e}")
             return []
     
+    @staticmethod
+    def iter_all_users(batch_size: int):
+        """
+        Построчно перебрать всех пользователей, читая из БД порциями
+        
+        Генератор держит курсор открытым, поэтому его нужно полностью
+        обходить в одном потоке и не вызывать через AsyncUserService.
+        Чтение идёт через отдельное соединение, которое закрывается после обхода:
+        выгрузку можно выполнять вне потоков БД.
+        
+        Args:
+            batch_size (int): Сколько строк читать за один fetchmany
+        
+        Yields:
+            dict: Данные пользователя (те же поля, что в get_all_users)
+        """
+        with db.dedicated_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT telegram_id, full_name, phone_number, 
+                       player_level, created_at
+                FROM users
+                WHERE telegram_id > 0
+                ORDER BY created_at DESC
+            """)
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                
+                for row in rows:
+                    yield {
+                        'telegram_id': row[0],
+                        'full_name': row[1],
+                        'phone_number': row[2],
+                        'player_level': row[3],
+                        'created_at': row[4]
+                    }
+    
+    @staticmethod
+    def mark_users_blocked(telegram_ids: list) -> int:
+        """
+        Отметить пользователей, которым невозможно доставить сообщения
+        (заблокировали бота или удалили аккаунт)
+        
+        Args:
+            telegram_ids (list): Telegram ID пользователей
+        
+        Returns:
+            int: Количество обновлённых записей
+        """
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    UPDATE users SET is_blocked = 1 WHERE telegram_id = ?
+                """, [(telegram_id,) for telegram_id in telegram_ids])
+                
+                conn.commit()
+                logger.info(f"Marked {cursor.rowcount} users as blocked")
+                return cursor.rowcount
+        except Exception as e:
+            logger.error(f"Error marking users as blocked: {e}")
+            return 0
+    
+    @staticmethod
+    def mark_user_active(telegram_id: int) -> bool:
+        """
+        Снять отметку о блокировке (пользователь снова написал боту)
+        
+        Args:
+            telegram_id (int): Telegram ID пользователя
+        
+        Returns:
+            bool: True если отметка была снята
+        """
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE users SET is_blocked = 0 WHERE telegram_id = ? AND is_blocked = 1
+                """, (telegram_id,))
+                
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error marking user as active: {e}")
+            return False
+    
     @staticmethod
     def search_user_by_id(telegram_id: int) -> Optional[Dict]:
         """
@@ -240,4 +420,8 @@ class UserService:
         Returns:
             dict: Данные пользователя или None если не найден
         """
-        return UserService.get_user_by_telegram_id(telegram_id)
\ No newline at end of file
+        return UserService.get_user_by_telegram_id(telegram_id)
+
+
+# Awaitable-версия сервиса для вызова из обработчиков
+AsyncUserService = AsyncService(UserService)
@@ -0,0 +1,108 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict
+from database.connection import db, AsyncService
+from config import TOURNAMENT_VIEW_TTL_MINUTES
+
+logger = logging.getLogger(__name__)
+
+class ViewerService:
+    """Отслеживание сообщений с карточками турниров, открытых пользователями"""
+
+    @staticmethod
+    def record_view(user_id: int, tournament_id: int, chat_id: int, message_id: int) -> bool:
+        """
+        Запомнить, что пользователь видит карточку турнира в сообщении
+
+        Args:
+            user_id (int): Telegram ID пользователя
+            tournament_id (int): ID турнира
+            chat_id (int): ID чата с сообщением
+            message_id (int): ID сообщения с карточкой
+
+        Returns:
+            bool: True если успешно
+        """
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                # Сообщение показывает только один экран - сбрасываем прежнюю привязку
+                cursor.execute("""
+                    DELETE FROM tournament_views WHERE chat_id = ? AND message_id = ?
+                """, (chat_id, message_id))
+                cursor.execute("""
+                    INSERT OR REPLACE INTO tournament_views (user_id, tournament_id, chat_id, message_id, viewed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (user_id, tournament_id, chat_id, message_id, datetime.now()))
+
+                conn.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Error recording tournament view: {e}")
+            return False
+
+    @staticmethod
+    def forget_message(chat_id: int, message_id: int) -> bool:
+        """
+        Забыть сообщение - пользователь ушёл с карточки турнира на другой экран
+
+        Args:
+            chat_id (int): ID чата
+            message_id (int): ID сообщения
+
+        Returns:
+            bool: True если привязка была удалена
+        """
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    DELETE FROM tournament_views WHERE chat_id = ? AND message_id = ?
+                """, (chat_id, message_id))
+
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error forgetting tournament view: {e}")
+            return False
+
+    @staticmethod
+    def get_viewers(tournament_id: int) -> List[Dict]:
+        """
+        Получить актуальные просмотры турнира, удалив просроченные
+
+        Args:
+            tournament_id (int): ID турнира
+
+        Returns:
+            list: Словари {'user_id', 'chat_id', 'message_id'}
+        """
+        try:
+            cutoff = datetime.now() - timedelta(minutes=TOURNAMENT_VIEW_TTL_MINUTES)
+
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    DELETE FROM tournament_views WHERE tournament_id = ? AND viewed_at < ?
+                """, (tournament_id, cutoff))
+
+                cursor.execute("""
+                    SELECT user_id, chat_id, message_id
+                    FROM tournament_views
+                    WHERE tournament_id = ?
+                """, (tournament_id,))
+
+                results = cursor.fetchall()
+                conn.commit()
+
+                return [
+                    {'user_id': row[0], 'chat_id': row[1], 'message_id': row[2]}
+                    for row in results
+                ]
+        except Exception as e:
+            logger.error(f"Error getting tournament viewers: {e}")
+            return []
+
+
+# Awaitable-версия сервиса для вызова из обработчиков
+AsyncViewerService = AsyncService(ViewerService)
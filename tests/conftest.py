@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Настройки читаются из окружения при импорте config, поэтому задаются до импорта модулей бота.
+# Тесты работают с отдельной временной БД; несколько потоков БД - чтобы запросы шли параллельно.
+_db_dir = tempfile.mkdtemp(prefix='tournament_bot_tests_')
+os.environ['DATABASE_PATH'] = os.path.join(_db_dir, 'tournament.db')
+os.environ.setdefault('BOT_TOKEN', 'test-token')
+os.environ.setdefault('DB_EXECUTOR_WORKERS', '8')
@@ -0,0 +1,42 @@
+import asyncio
+
+from telegram import Bot, Update
+from telegram.ext import Application
+
+from utils.callback_router import CallbackRouter, encode_callback
+
+
+def callback_update(bot, data):
+    user = {'id': 777, 'is_bot': False, 'first_name': 'Test'}
+    return Update.de_json({
+        'update_id': 1,
+        'callback_query': {
+            'id': '1',
+            'from': user,
+            'chat_instance': '1',
+            'data': data,
+            'message': {'message_id': 1, 'date': 0, 'chat': {'id': 777, 'type': 'private'}, 'text': ''}
+        }
+    }, bot)
+
+
+def test_router_passes_parsed_args_to_handler():
+    application = Application.builder().bot(Bot('123456:TEST')).build()
+    received = []
+
+    async def manage_participant(update, context):
+        received.append(context.args)
+
+    router = CallbackRouter()
+    router.add("manage_participant", manage_participant)
+    update = callback_update(application.bot, encode_callback("manage_participant", 12, 3))
+
+    async def dispatch():
+        check_result = router.check_update(update)
+        context = application.context_types.context.from_update(update, application)
+        await router.handle_update(update, application, check_result, context)
+
+    asyncio.run(dispatch())
+
+    assert received == [[12, 3]]
+    assert router.check_update(callback_update(application.bot, "manage_participant_x")) is None
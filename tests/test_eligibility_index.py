@@ -0,0 +1,13 @@
+from levels import LEVELS, check_level_in_range
+from services.eligibility_index import TournamentEligibilityIndex
+
+
+def test_buckets_match_join_check():
+    bounds = [('open', None, None), ('restricted', '3.0', '4.5'), ('restricted', '3.7', '4.5'), ('restricted', None, None)]
+    players = list(LEVELS) + [None]
+
+    for restriction, min_level, max_level in bounds:
+        buckets = TournamentEligibilityIndex._bucket_range(restriction, min_level, max_level)
+        for bucket, player_level in enumerate(players):
+            can_join = restriction == 'open' or check_level_in_range(player_level, min_level, max_level)
+            assert (bucket in buckets) == can_join, (restriction, min_level, max_level, player_level)
@@ -0,0 +1,44 @@
+import asyncio
+
+from config import MAX_MAIN_PARTICIPANTS, MAX_RESERVE_PARTICIPANTS
+from database.connection import db
+from services.participation_service import ParticipationService
+from services.tournament_service import TournamentService
+
+JOIN_ATTEMPTS = 1000
+
+
+def _create_tournament() -> int:
+    tournament_id = TournamentService.create_tournament_with_levels(
+        name="Нагрузочный турнир",
+        date="30.08 10:00",
+        location="Корт 1",
+        format_info="Американка",
+        entry_fee="1000",
+        description="Проверка лимита мест",
+        created_by=1
+    )
+    assert tournament_id
+    return tournament_id
+
+
+def test_concurrent_joins_do_not_exceed_capacity():
+    """1000 одновременных записей через потоки БД занимают ровно все места турнира"""
+    tournament_id = _create_tournament()
+
+    async def join_all():
+        return await asyncio.gather(*(
+            db.run(ParticipationService.add_participant_pending, user_id, tournament_id)
+            for user_id in range(1, JOIN_ATTEMPTS + 1)
+        ))
+
+    results = asyncio.run(join_all())
+
+    with db.get_connection() as conn:
+        taken = conn.execute(
+            "SELECT COUNT(*) FROM participations WHERE tournament_id = ?", (tournament_id,)
+        ).fetchone()[0]
+
+    capacity = MAX_MAIN_PARTICIPANTS + MAX_RESERVE_PARTICIPANTS
+    assert taken == capacity
+    assert sum(results) == capacity
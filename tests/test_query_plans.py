@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.connection import db
+from services.notification_service import NotificationService
+from services.participation_service import ParticipationService
+from services.tournament_service import TournamentService
+from services.user_service import UserService
+from services.viewer_service import ViewerService
+
+USER_ID = 424242
+
+
+@pytest.fixture(scope='module')
+def tournament_id():
+    tournament_id = TournamentService.create_tournament_with_levels(
+        name="Турнир для планов запросов",
+        date="30.08 10:00",
+        location="Корт 1",
+        format_info="Американка",
+        entry_fee="1000",
+        description="",
+        created_by=1,
+        level_restriction='restricted',
+        min_level='3.0',
+        max_level='4.5'
+    )
+    UserService.register_user(USER_ID, "Игрок", "+70000000000", "3.0", "adult")
+    ParticipationService.add_participant_pending(USER_ID, tournament_id)
+    return tournament_id
+
+
+# Частые запросы бота: SQL берётся из самих сервисов, а не из копии
+HOT_PATHS = {
+    'participants_count': lambda tid: ParticipationService.get_participants_count(tid),
+    'participation_statuses': lambda tid: ParticipationService.get_participation_statuses(tid),
+    'tournament_participants': lambda tid: ParticipationService.get_tournament_participants(tid),
+    'pending_participations': lambda tid: ParticipationService.get_pending_participations(tid),
+    'user_participation': lambda tid: ParticipationService.get_user_participation_status(USER_ID, tid),
+    'next_payment_deadline': lambda tid: ParticipationService.get_next_payment_deadline(),
+    'join': lambda tid: ParticipationService.add_participant_pending(USER_ID + 1, tid),
+    'expired_participations': lambda tid: ParticipationService.cleanup_expired_participations(),
+    'active_tournaments_with_counts': lambda tid: TournamentService.get_active_tournaments_with_counts(),
+    'active_tournaments': lambda tid: TournamentService.get_all_tournaments(),
+    'tournament': lambda tid: TournamentService.get_tournament_by_id(tid),
+    'next_tournament_start': lambda tid: TournamentService.get_next_start_time(),
+    'archived_tournaments': lambda tid: TournamentService.get_archived_tournaments(20),
+    'finished_tournaments': lambda tid: TournamentService.archive_finished_tournaments(
+        datetime(2000, 1, 1), datetime(2000, 1, 1)
+    ),
+    'tournament_viewers': lambda tid: ViewerService.get_viewers(tid),
+    'user': lambda tid: UserService.get_user_by_telegram_id(USER_ID + 2),
+    'level_audience': lambda tid: NotificationService.get_users_by_level_range('3.0', '4.5'),
+}
+
+
+def _executed_statements(call) -> list:
+    """Выполнить вызов сервиса и вернуть запросы, которые он отправил в SQLite (с подставленными параметрами)"""
+    conn = db.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        conn.set_trace_callback(None)
+
+    return [
+        sql for sql in statements
+        if sql.lstrip().split(None, 1)[0].upper() in ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+    ]
+
+
+@pytest.mark.parametrize('name', list(HOT_PATHS))
+def test_hot_queries_use_indexes(name, tournament_id):
+    """Частые запросы обслуживаются индексами: в плане нет SCAN (полного прохода по таблице или индексу)"""
+    if name == 'expired_participations':
+        with db.get_connection() as conn:
+            conn.execute(
+                "UPDATE participations SET payment_deadline = ? WHERE user_id = ?",
+                (datetime.now() - timedelta(minutes=1), USER_ID)
+            )
+
+    statements = _executed_statements(lambda: HOT_PATHS[name](tournament_id))
+    assert statements, f"{name} did not query the database"
+
+    conn = db.get_connection()
+    for sql in statements:
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+        # SCAN CONSTANT ROW - выборка без таблицы (INSERT ... SELECT ? WHERE ...), не проход по данным
+        full_scans = [detail for detail in plan if detail.startswith('SCAN') and detail != 'SCAN CONSTANT ROW']
+        assert not full_scans, f"{name}: {' '.join(sql.split())}\n{plan}"
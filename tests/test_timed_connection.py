@@ -0,0 +1,7 @@
+from database.connection import TimedCursor, db
+
+
+def test_connection_execute_goes_through_timed_cursor():
+    with db.get_connection() as conn:
+        assert isinstance(conn.execute("SELECT 1"), TimedCursor)
+        assert isinstance(conn.executemany("UPDATE users SET full_name = ? WHERE telegram_id = ?", []), TimedCursor)
@@ -0,0 +1,27 @@
+from utils.update_recorder import UpdateRecorder, redact_text
+
+
+def test_redact_text_keeps_buttons_and_commands():
+    assert redact_text("🏆 Турниры") == "🏆 Турниры"
+    assert redact_text("✍️ Ввести вручную") == "✍️ Ввести вручную"
+    assert redact_text("/start") == "/start"
+
+
+def test_anonymize_masks_personal_text(tmp_path):
+    recorder = UpdateRecorder(str(tmp_path / 'updates.jsonl'), 1024, 1, salt='test')
+    update = {
+        'update_id': 1,
+        'message': {
+            'message_id': 5,
+            'from': {'id': 777, 'first_name': 'Иван', 'username': 'ivan'},
+            'chat': {'id': 777, 'type': 'private'},
+            'text': 'Иван Петров, +7 701 123 45 67'
+        }
+    }
+
+    message = recorder.anonymize(update)['message']
+
+    assert message['text'] == 'Xxxx Xxxxxx, +0 000 000 00 00'
+    assert len(message['text']) == len(update['message']['text'])
+    assert message['from']['id'] == message['chat']['id'] != 777
+    assert 'username' not in message['from']
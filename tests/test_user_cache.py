@@ -0,0 +1,14 @@
+from services.user_service import UserCache
+
+
+def test_put_skips_profile_read_before_invalidate():
+    cache = UserCache(10, 60)
+    version = cache.version(777)
+
+    # Профиль изменился, пока шло чтение из БД
+    cache.invalidate(777)
+    cache.put(777, version, {'full_name': 'Старое имя'})
+    assert cache.get(777) is UserCache.MISSING
+
+    cache.put(777, cache.version(777), {'full_name': 'Новое имя'})
+    assert cache.get(777) == {'full_name': 'Новое имя'}
@@ -0,0 +1,97 @@
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+from telegram import Update
+from telegram.ext import BaseHandler
+
+# Telegram ограничивает callback_data 64 байтами
+MAX_CALLBACK_DATA_BYTES = 64
+
+
+class CallbackData(NamedTuple):
+    """Разобранные данные кнопки: действие и числовые аргументы"""
+    action: str
+    args: Tuple[int, ...]
+
+
+def _parse_int(token: str) -> Optional[int]:
+    if token.isdigit() or (token.startswith('-') and token[1:].isdigit()):
+        return int(token)
+    return None
+
+
+def encode_callback(action: str, *args: int) -> str:
+    """
+    Собрать callback_data вида action_arg1_arg2
+    
+    Args:
+        action (str): действие, например "tournament" или "manage_participant"
+        *args (int): числовые аргументы (ID турнира, позиция и т.п.)
+    """
+    data = "_".join([action, *(str(int(arg)) for arg in args)])
+    
+    if len(data.encode('utf-8')) > MAX_CALLBACK_DATA_BYTES:
+        raise ValueError(f"callback_data is longer than {MAX_CALLBACK_DATA_BYTES} bytes: {data}")
+    
+    return data
+
+
+def decode_callback(data: str) -> CallbackData:
+    """
+    Разобрать callback_data: числовые части в конце - аргументы, остальное - действие
+    
+    "manage_participant_5_3" -> CallbackData('manage_participant', (5, 3))
+    "admin_tournaments"      -> CallbackData('admin_tournaments', ())
+    """
+    tokens = data.split("_")
+    args = []
+    
+    while len(tokens) > 1:
+        value = _parse_int(tokens[-1])
+        if value is None:
+            break
+        args.append(value)
+        tokens.pop()
+    
+    args.reverse()
+    return CallbackData("_".join(tokens), tuple(args))
+
+
+class CallbackRouter(BaseHandler):
+    """
+    Один обработчик для всех кнопок вместо цепочки CallbackQueryHandler с regex
+    
+    callback_data разбирается один раз, обработчик выбирается по действию из словаря.
+    Действия сравниваются целиком, поэтому "tournament" не перехватывает "tournament_type".
+    Числовые аргументы кнопки обработчик получает в context.args, как у CommandHandler.
+    """
+    
+    def __init__(self, block: bool = True):
+        super().__init__(self._not_routed, block=block)
+        self._routes: Dict[str, Callable[..., Awaitable]] = {}
+    
+    @staticmethod
+    async def _not_routed(update, context):
+        raise RuntimeError("CallbackRouter dispatches through handle_update")
+    
+    def add(self, action: str, callback: Callable[..., Awaitable]):
+        """Зарегистрировать обработчик для действия"""
+        if action in self._routes:
+            raise ValueError(f"Callback action '{action}' is already routed")
+        self._routes[action] = callback
+    
+    def check_update(self, update: object) -> Optional[CallbackData]:
+        if not isinstance(update, Update) or not update.callback_query:
+            return None
+        
+        data = update.callback_query.data
+        if not isinstance(data, str):
+            return None
+        
+        callback_data = decode_callback(data)
+        return callback_data if callback_data.action in self._routes else None
+    
+    def collect_additional_context(self, context, update, application, check_result: CallbackData):
+        context.args = list(check_result.args)
+    
+    async def handle_update(self, update, application, check_result: CallbackData, context):
+        self.collect_additional_context(context, update, application, check_result)
+        return await self._routes[check_result.action](update, context)
@@ -0,0 +1,26 @@
+import time
+from typing import Optional, Tuple
+from telegram.request import HTTPXRequest, RequestData
+from utils.metrics import telegram_api_duration, telegram_api_errors
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest, замеряющий время и ошибки каждого запроса к Bot API по методам"""
+    
+    async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None,
+                         *args, **kwargs) -> Tuple[int, bytes]:
+        # url заканчивается именем метода Bot API: .../bot<token>/sendMessage
+        api_method = url.rsplit('/', 1)[-1]
+        started = time.perf_counter()
+        
+        try:
+            code, payload = await super().do_request(url, method, request_data, *args, **kwargs)
+        except Exception as e:
+            telegram_api_errors.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            telegram_api_duration.observe(time.perf_counter() - started, api_method)
+        
+        if code >= 400:
+            telegram_api_errors.inc(api_method, str(code))
+        return code, payload
@@ -0,0 +1,248 @@
+import bisect
+import functools
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+from telegram import Update
+from utils.callback_router import decode_callback
+
+# Границы корзин гистограмм, секунд
+HANDLER_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Счётчик с метками (значения меток передаются позиционно)"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def total(self) -> float:
+        """Сумма по всем меткам"""
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = HANDLER_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # метки -> [счётчики корзин (последняя - +Inf), сумма, количество]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def total(self, *label_values: str) -> float:
+        series = self._series.get(label_values)
+        return series[1] if series else 0.0
+
+    def label_values(self) -> List[Tuple[str, ...]]:
+        with self._lock:
+            return sorted(self._series)
+
+    def quantile(self, q: float, *label_values: str) -> float:
+        """Оценка квантиля по корзинам (линейная интерполяция, как histogram_quantile)"""
+        with self._lock:
+            series = self._series.get(label_values)
+            if not series or not series[2]:
+                return 0.0
+            bucket_counts, count = list(series[0]), series[2]
+
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for bound, bucket_count in zip(self.buckets, bucket_counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound
+        # Значение в корзине +Inf - известна только нижняя граница
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+
+        for label_values, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                labels = _format_labels(self.labels, label_values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {repr(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Набор метрик бота и вывод в текстовом формате Prometheus
+
+    Кроме счётчиков и гистограмм можно зарегистрировать коллектор - функцию,
+    которая в момент запроса метрик возвращает текущие значения {имя: число}
+    (размер очереди обновлений, заполненность кэшей и т.п.).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, float]]]] = []
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = HANDLER_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, prefix: str, collect: Callable[[], Dict[str, float]]):
+        """Зарегистрировать функцию, значения которой выводятся как gauge с префиксом"""
+        self._collectors.append((prefix, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        for prefix, collect in self._collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                lines.append(f"# collector {prefix} failed: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def update_label(update: object) -> str:
+    """Метка обработчика для обновления: действие кнопки, команда или тип сообщения"""
+    if not isinstance(update, Update):
+        return 'other'
+    if update.callback_query:
+        data = update.callback_query.data
+        return f"callback:{decode_callback(data).action}" if isinstance(data, str) else 'callback'
+    if update.message:
+        text = update.message.text
+        if text and text.startswith('/'):
+            return f"command:{text.split()[0][1:].split('@')[0]}"
+        if update.message.contact:
+            return 'contact'
+        return 'message'
+    return 'other'
+
+
+@functools.lru_cache(maxsize=1024)
+def statement_label(sql: str) -> str:
+    """Метка SQL-запроса: операция и основная таблица ("SELECT participations")
+
+    Тексты запросов в сервисах постоянные, поэтому разбор кешируется.
+    """
+    tokens = sql.split()
+    if not tokens:
+        return 'EMPTY'
+
+    operation = tokens[0].upper()
+    upper = [token.upper() for token in tokens]
+    # Таблица - после первого из ключевых слов (INSERT ... SELECT ... FROM относится к INTO)
+    for index, token in enumerate(upper):
+        if token in ('FROM', 'INTO', 'UPDATE', 'TABLE', 'ON'):
+            index += 1
+            # INSERT OR REPLACE INTO / CREATE TABLE IF NOT EXISTS
+            while index < len(tokens) and upper[index] in ('OR', 'REPLACE', 'IGNORE', 'IF', 'NOT', 'EXISTS'):
+                index += 1
+            if index < len(tokens):
+                table = tokens[index].strip('(),;"')
+                return f"{operation} {table}"
+            break
+    return operation
+
+
+# Общий реестр метрик бота
+metrics = MetricsRegistry()
+
+update_duration = metrics.histogram(
+    'bot_update_duration_seconds', 'Время обработки обновления по обработчикам', ('handler',)
+)
+update_wait = metrics.histogram(
+    'bot_update_wait_seconds', 'Время ожидания обновления в очереди своего чата'
+)
+handler_errors = metrics.counter(
+    'bot_handler_errors_total', 'Необработанные исключения в обработчиках', ('handler', 'error')
+)
+db_query_duration = metrics.histogram(
+    'bot_db_query_duration_seconds', 'Время выполнения SQL-запросов', ('statement',), DB_BUCKETS
+)
+db_executor_wait = metrics.histogram(
+    'bot_db_executor_wait_seconds', 'Ожидание свободного потока БД перед выполнением запроса', (), DB_BUCKETS
+)
+db_slow_queries = metrics.counter(
+    'bot_db_slow_queries_total', 'SQL-запросы дольше порога медленного запроса', ('statement',)
+)
+telegram_api_duration = metrics.histogram(
+    'bot_telegram_api_duration_seconds', 'Время запросов к Telegram Bot API', ('method',)
+)
+telegram_api_errors = metrics.counter(
+    'bot_telegram_api_errors_total', 'Ошибки запросов к Telegram Bot API', ('method', 'error')
+)
@@ -0,0 +1,42 @@
+import logging
+from typing import Optional
+from aiohttp import web
+from config import METRICS_LISTEN, METRICS_PORT
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_runner: Optional[web.AppRunner] = None
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """Метрики в текстовом формате Prometheus"""
+    return web.Response(body=metrics.render().encode('utf-8'), headers={'Content-Type': PROMETHEUS_CONTENT_TYPE})
+
+
+async def start_metrics_server():
+    """Запустить HTTP-сервер метрик на локальном порту (METRICS_PORT = 0 - выключен)"""
+    global _runner
+    
+    if not METRICS_PORT or _runner is not None:
+        return
+    
+    web_app = web.Application()
+    web_app.router.add_get('/metrics', handle_metrics)
+    
+    runner = web.AppRunner(web_app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, METRICS_LISTEN, METRICS_PORT).start()
+    _runner = runner
+    logger.info(f"Metrics server listening on {METRICS_LISTEN}:{METRICS_PORT}/metrics")
+
+
+async def stop_metrics_server():
+    """Остановить сервер метрик"""
+    global _runner
+    
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
@@ -0,0 +1,151 @@
+from datetime import datetime
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from config import MAX_MAIN_PARTICIPANTS, MAX_RESERVE_PARTICIPANTS
+from levels import get_level_name
+from utils.callback_router import encode_callback
+
+def build_tournament_text(tournament, counts, participants):
+    """Текст карточки турнира (общая часть для всех пользователей)"""
+    text = f"🏆 {tournament['name']}\n\n"
+    text += f"📅 {tournament['date']}\n"
+    text += f"📍 {tournament['location']}\n"
+    text += f"✅ {tournament['format_info']}\n"
+    text += f"💳 {tournament['entry_fee']}\n\n"
+    text += f"👥 Участники: {counts['main']}/{MAX_MAIN_PARTICIPANTS} основных\n"
+    text += f"📋 Резерв: {counts['reserve']}/{MAX_RESERVE_PARTICIPANTS}\n\n"
+
+    if tournament.get('level_restriction') == 'restricted' and tournament.get('min_level') and tournament.get('max_level'):
+        min_level = tournament['min_level']
+        max_level = tournament['max_level']
+        min_name = get_level_name(min_level)
+        max_name = get_level_name(max_level)
+
+        text += f"⭐ Уровень участников: {min_level} - {max_level}\n"
+        text += f"   ({min_name} - {max_name})\n\n"
+    elif tournament.get('level_restriction') == 'open':
+        text += "⭐ Открытый турнир (любой уровень)\n\n"
+
+    # Разделяем участников на основных и резерв
+    main_participants = [p for p in participants if p['position'] <= MAX_MAIN_PARTICIPANTS]
+    reserve_participants = [p for p in participants if p['position'] > MAX_MAIN_PARTICIPANTS]
+
+    # Основные участники
+    if main_participants:
+        text += "👥 УЧАСТНИКИ:\n"
+        for participant in main_participants:
+            text += f"{participant['status_icon']} {participant['position']}. {participant['name']}\n"
+        text += "\n"
+    else:
+        text += "👥 УЧАСТНИКИ:\nПока никого нет\n\n"
+
+    # Резервные участники
+    if reserve_participants:
+        text += "📋 РЕЗЕРВ:\n"
+        for participant in reserve_participants:
+            text += f"{participant['status_icon']} {participant['position']}. {participant['name']}\n"
+        text += "\n"
+    else:
+        text += "📋 РЕЗЕРВ:\nПока никого нет\n\n"
+
+    text += f"📝 ОПИСАНИЕ:\n{tournament['description']}\n\n"
+    return text
+
+def build_payment_timer_text(user_participation):
+    """Таймер оплаты для заявки в статусе pending"""
+    deadline = datetime.fromisoformat(user_participation['payment_deadline'])
+    current_time = datetime.now()
+
+    text = f"⏰ ВАША ЗАЯВКА: Оплатите до {deadline.strftime('%H:%M:%S')}\n"
+    text += f"📱 Сейчас: {current_time.strftime('%H:%M:%S')}\n"
+
+    # Считаем оставшееся время
+    remaining = deadline - current_time
+    if remaining.total_seconds() > 0:
+        minutes = int(remaining.total_seconds() // 60)
+        seconds = int(remaining.total_seconds() % 60)
+        text += f"⏳ Осталось: {minutes} мин {seconds} сек\n\n"
+    else:
+        text += "❌ Время истекло\n\n"
+
+    return text
+
+def get_join_button(tournament_id, counts):
+    """Кнопка записи на турнир в зависимости от свободных мест"""
+    total_available = counts['available_main'] + counts['available_reserve']
+
+    if total_available > 0:
+        if counts['available_main'] > 0:
+            button_text = "🟢 УЧАСТВОВАТЬ В ТУРНИРЕ"
+        else:
+            button_text = "🟡 УЧАСТВОВАТЬ (в резерв)"
+        button_callback = encode_callback("join", tournament_id)
+    else:
+        button_text = "🔴 МЕСТ НЕТ"
+        button_callback = encode_callback("no_slots", tournament_id)
+
+    return InlineKeyboardButton(button_text, callback_data=button_callback)
+
+def get_tournament_card_keyboard(tournament_id, counts, user_participation):
+    """Клавиатура карточки турнира для конкретного пользователя"""
+    back_button = [InlineKeyboardButton("← Назад к списку", callback_data="back_to_tournaments")]
+
+    if user_participation:
+        if user_participation['status'] == 'confirmed':
+            keyboard = [
+                [InlineKeyboardButton("✅ ВЫ ЗАПИСАНЫ", callback_data=encode_callback("confirmed", tournament_id))],
+                [InlineKeyboardButton("❌ Отменить участие", callback_data=encode_callback("leave", tournament_id))],
+                back_button
+            ]
+        elif user_participation['status'] == 'pending':
+            keyboard = [
+                [InlineKeyboardButton("🟡 ОЖИДАЕТ ОПЛАТЫ", callback_data=encode_callback("pending", tournament_id))],
+                [InlineKeyboardButton("💳 Оплата Kaspi", url="https://pay.kaspi.kz/pay/g6b21oa4")],
+                [InlineKeyboardButton("❌ Отменить участие", callback_data=encode_callback("leave", tournament_id))],
+                back_button
+            ]
+        else:
+            keyboard = [
+                [InlineKeyboardButton("❌ ОТМЕНИТЬ УЧАСТИЕ", callback_data=encode_callback("leave", tournament_id))],
+                back_button
+            ]
+    else:
+        keyboard = [
+            [get_join_button(tournament_id, counts)],
+            back_button
+        ]
+
+    return InlineKeyboardMarkup(keyboard)
+
+def get_tournaments_list_keyboard(tournaments, eligible_only=False):
+    """Клавиатура списка турниров с индикатором свободных мест и переключателем «все / для меня»"""
+    keyboard = []
+
+    for tournament in tournaments:
+        counts = tournament['counts']
+        available_spots = counts['available_main'] + counts['available_reserve']
+
+        # Формируем текст кнопки с индикаторами
+        button_text = f"🏆 {tournament['name']}"
+
+        # Добавляем индикатор заполненности
+        if available_spots == 0:
+            button_text += " 🔴"  # Мест нет
+        elif counts['available_main'] == 0:
+            button_text += " 🟡"  # Только резерв
+        else:
+            button_text += " 🟢"  # Есть основные места
+
+        keyboard.append([
+            InlineKeyboardButton(
+                button_text,
+                callback_data=encode_callback("tournament", tournament['id'])
+            )
+        ])
+
+    # Переключение между всеми турнирами и подходящими по уровню
+    if eligible_only:
+        keyboard.append([InlineKeyboardButton("📋 Все турниры", callback_data="back_to_tournaments")])
+    else:
+        keyboard.append([InlineKeyboardButton("🎯 Подходящие мне", callback_data="my_tournaments")])
+
+    return InlineKeyboardMarkup(keyboard)
@@ -0,0 +1,105 @@
+import re
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Начало месяца в названии: "августа", "авг", "Август"
+MONTHS = {
+    'янв': 1, 'фев': 2, 'мар': 3, 'апр': 4, 'мая': 5, 'май': 5,
+    'июн': 6, 'июл': 7, 'авг': 8, 'сен': 9, 'окт': 10, 'ноя': 11, 'дек': 12
+}
+
+# 30.08, 30/08/2025, 30-08-25 (месяц - две цифры, чтобы не путать с уровнями "3.5");
+# не начинается внутри более длинной записи вроде 2025-11-05
+NUMERIC_DATE = re.compile(r'(?<![\d:.])(?<!\d[/-])(\d{1,2})([./-])(\d{2})(?:\2(\d{4}|\d{2}))?(?![\d:])')
+# 2025-11-05, 2025.11.05, 2025/11/05 (год впереди)
+ISO_DATE = re.compile(r'(?<![\d:./-])(\d{4})([./-])(\d{1,2})\2(\d{1,2})(?!\d)')
+# 30 августа, 30 и 31 августа, 30-31 авг 2025 (берётся первый день)
+TEXT_DATE = re.compile(r'(?<!\d)(\d{1,2})(?:\s*(?:и|-|–|,)\s*\d{1,2})*\s+([а-яё]{3,})\.?(?:\s+(\d{4}))?', re.IGNORECASE)
+# 19:00, 9:30
+TIME = re.compile(r'(?<!\d)([01]?\d|2[0-3]):([0-5]\d)(?!\d)')
+
+# Дата без года, прошедшая больше чем на столько дней, относится к следующему году
+PAST_DAYS_SAME_YEAR = 30
+
+
+def parse_tournament_start(text: str, reference: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Разобрать дату начала турнира из текста, который ввёл админ
+
+    Берётся первая дата в тексте (числом или с названием месяца) и время вида ЧЧ:ММ,
+    если оно есть. Год без явного указания - ближайший к reference: дата, прошедшая
+    больше чем на PAST_DAYS_SAME_YEAR дней, считается датой следующего года.
+
+    Args:
+        text (str): Дата в свободной форме, например "⏰ 30 и 31 августа, 10:00"
+        reference (datetime): Момент ввода даты (по умолчанию - сейчас)
+
+    Returns:
+        datetime: Начало турнира или None, если дату не удалось распознать
+
+    Examples:
+        >>> parse_tournament_start("30 и 31 августа, 10:00", datetime(2025, 8, 1))
+        datetime.datetime(2025, 8, 30, 10, 0)
+        >>> parse_tournament_start("05.01", datetime(2025, 12, 20))
+        datetime.datetime(2026, 1, 5, 0, 0)
+        >>> parse_tournament_start("10-11 декабря", datetime(2026, 10, 17))
+        datetime.datetime(2026, 12, 10, 0, 0)
+        >>> parse_tournament_start("05-06 октября", datetime(2026, 10, 17))
+        datetime.datetime(2026, 10, 5, 0, 0)
+        >>> parse_tournament_start("2025-11-05", datetime(2025, 10, 1))
+        datetime.datetime(2025, 11, 5, 0, 0)
+        >>> parse_tournament_start("2025-11-05 10:00", datetime(2025, 10, 1))
+        datetime.datetime(2025, 11, 5, 10, 0)
+        >>> parse_tournament_start("в выходные") is None
+        True
+    """
+    if not text:
+        return None
+    reference = reference or datetime.now()
+
+    candidates = []
+
+    match = ISO_DATE.search(text)
+    if match:
+        candidates.append((match.start(), int(match.group(4)), int(match.group(3)), match.group(1)))
+
+    for match in NUMERIC_DATE.finditer(text):
+        # "10-11 декабря" - это диапазон дней, а не 10 ноября: после чисел идёт название месяца
+        text_match = TEXT_DATE.match(text, match.start())
+        if text_match and MONTHS.get(text_match.group(2)[:3].lower()):
+            continue
+        if 1 <= int(match.group(3)) <= 12:
+            candidates.append((match.start(), int(match.group(1)), int(match.group(3)), match.group(4)))
+            break
+
+    for match in TEXT_DATE.finditer(text):
+        month = MONTHS.get(match.group(2)[:3].lower())
+        if month:
+            candidates.append((match.start(), int(match.group(1)), month, match.group(3)))
+            break
+
+    if not candidates:
+        return None
+
+    _, day, month, year = min(candidates, key=lambda candidate: candidate[0])
+
+    time_match = TIME.search(text)
+    hour, minute = (int(time_match.group(1)), int(time_match.group(2))) if time_match else (0, 0)
+
+    try:
+        if year:
+            year = int(year)
+            return datetime(year + 2000 if year < 100 else year, month, day, hour, minute)
+
+        starts_at = datetime(reference.year, month, day, hour, minute)
+        if starts_at < reference - timedelta(days=PAST_DAYS_SAME_YEAR):
+            starts_at = starts_at.replace(year=reference.year + 1)
+        return starts_at
+    except ValueError:
+        # 31.02, 29.02 не в високосный год и т.п.
+        return None
+
+
+def to_starts_at(value: Optional[datetime]) -> Optional[str]:
+    """Значение для колонки tournaments.starts_at: "ГГГГ-ММ-ДД ЧЧ:ММ" (сортируется как строка)"""
+    return value.isoformat(sep=' ', timespec='minutes') if value else None
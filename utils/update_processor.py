@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from config import UPDATE_WAIT_WARN_SECONDS
+from utils.metrics import update_duration, update_label, update_wait
+
+logger = logging.getLogger(__name__)
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Параллельная обработка обновлений с сохранением порядка внутри чата
+    
+    Обновления разных чатов выполняются одновременно (не больше concurrency),
+    обновления одного чата - строго по очереди, поэтому состояния
+    ConversationHandler не ломаются. Ограничение PTB (max_pending) действует
+    до ожидания очереди чата, поэтому задаём его с запасом, а число
+    выполняемых обработчиков ограничиваем своим семафором уже после
+    блокировки чата - иначе обновления, ждущие свой чат, занимали бы слоты.
+    """
+    
+    def __init__(self, concurrency: int, max_pending: int):
+        super().__init__(max(concurrency, max_pending))
+        self._running_slots = asyncio.Semaphore(concurrency)
+        # chat_id -> [блокировка, сколько обновлений чата ждут или выполняются]
+        self._chat_locks: Dict[int, list] = {}
+        
+        # Метрики
+        self.waiting = 0
+        self.running = 0
+        self.max_waiting = 0
+        self.processed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    @staticmethod
+    def _chat_key(update: object) -> Optional[int]:
+        """Ключ очереди: чат, а для inline-сообщений без чата - пользователь"""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat:
+            return update.effective_chat.id
+        if update.effective_user:
+            return update.effective_user.id
+        return None
+    
+    @asynccontextmanager
+    async def _chat_lock(self, key: Optional[int]):
+        if key is None:
+            yield
+            return
+        
+        entry = self._chat_locks.get(key)
+        if entry is None:
+            entry = self._chat_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[key]
+    
+    async def do_process_update(self, update: object, coroutine) -> None:
+        queued_at = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        started = False
+        
+        try:
+            async with self._chat_lock(self._chat_key(update)):
+                async with self._running_slots:
+                    started = True
+                    self.waiting -= 1
+                    self._record_wait(update, time.monotonic() - queued_at)
+                    
+                    self.running += 1
+                    handling_started = time.perf_counter()
+                    try:
+                        await coroutine
+                    finally:
+                        update_duration.observe(time.perf_counter() - handling_started, update_label(update))
+                        self.running -= 1
+                        self.processed += 1
+        finally:
+            if not started:
+                self.waiting -= 1
+                # Корутина так и не была запущена - закрываем, чтобы не было предупреждений
+                coroutine.close()
+    
+    def _record_wait(self, update: object, wait: float):
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        update_wait.observe(wait)
+        
+        if wait > UPDATE_WAIT_WARN_SECONDS:
+            update_id = update.update_id if isinstance(update, Update) else None
+            logger.warning(
+                f"Update {update_id} waited {wait:.2f}s before processing "
+                f"(waiting={self.waiting}, running={self.running})"
+            )
+    
+    def stats(self) -> Dict:
+        """Глубина очереди и время ожидания обновлений"""
+        return {
+            'waiting': self.waiting,
+            'running': self.running,
+            'max_waiting': self.max_waiting,
+            'active_chats': len(self._chat_locks),
+            'processed': self.processed,
+            'avg_wait': self.total_wait / self.processed if self.processed else 0.0,
+            'max_wait': self.max_wait
+        }
+    
+    async def initialize(self) -> None:
+        pass
+    
+    async def shutdown(self) -> None:
+        if self.processed:
+            logger.info(f"Update processor stats: {self.stats()}")
@@ -0,0 +1,207 @@
+import hashlib
+import hmac
+import json
+import logging
+import queue
+import secrets
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional, Tuple
+from telegram.request import HTTPXRequest, RequestData
+from config import UPDATE_RECORD_PATH, UPDATE_RECORD_MAX_BYTES, UPDATE_RECORD_BACKUPS, UPDATE_RECORD_SALT
+from utils.keyboards import get_main_menu_keyboard, get_phone_keyboard
+
+logger = logging.getLogger(__name__)
+
+# Объекты, в которых лежат данные пользователя или чата
+IDENTITY_KEYS = ('from', 'chat', 'user', 'sender_chat', 'contact')
+# Поля, которые не попадают в запись (имя и телефон заменяются в _anonymize_identity)
+PERSONAL_FIELDS = ('username', 'last_name', 'bio', 'vcard')
+# Поля с текстом, который ввёл пользователь (или бот - в сообщении под кнопкой)
+TEXT_FIELDS = ('text', 'caption')
+# Тексты reply-кнопок бота: по ним выбираются обработчики, личных данных в них нет
+BUTTON_TEXTS = frozenset(
+    button.text
+    for markup in (get_main_menu_keyboard(), get_phone_keyboard())
+    for row in markup.keyboard
+    for button in row
+)
+
+
+def _mask_char(char: str) -> str:
+    if char.isdigit():
+        return '0'
+    if char.isalpha():
+        return 'X' if char.isupper() else 'x'
+    return char
+
+
+def redact_text(text: str) -> str:
+    """
+    Обезличить текст сообщения, сохранив его форму
+
+    Кнопки меню и имя команды остаются как есть. В остальном тексте (ФИО, телефон,
+    аргументы команды) буквы заменяются на x/X, цифры - на 0, поэтому длина и
+    смещения entities не меняются, а проверки длины при воспроизведении проходят.
+
+    >>> redact_text("Иван Петров +7 701 123-45-67")
+    'Xxxx Xxxxxx +0 000 000-00-00'
+    >>> redact_text("/start ref42")
+    '/start xxx00'
+    """
+    if text in BUTTON_TEXTS:
+        return text
+
+    command, separator, rest = text.partition(' ') if text.startswith('/') else ('', '', text)
+    return command + separator + ''.join(_mask_char(char) for char in rest)
+
+
+class _RecordFormatter(logging.Formatter):
+    """Разбор, обезличивание и сериализация записи - выполняется в потоке записи"""
+
+    def __init__(self, recorder: 'UpdateRecorder'):
+        super().__init__()
+        self._recorder = recorder
+
+    def format(self, record: logging.LogRecord) -> str:
+        # RotatingFileHandler форматирует запись дважды: для проверки размера и для записи
+        formatted = getattr(record, 'formatted_updates', None)
+        if formatted is not None:
+            return formatted
+
+        received_at, data = record.msg
+        # Ответ getUpdates целиком или одно обновление из вебхука
+        updates = json.loads(data)['result'] if isinstance(data, bytes) else [data]
+
+        lines = [
+            json.dumps({'ts': received_at, 'update': self._recorder.anonymize(update)},
+                       ensure_ascii=False, separators=(',', ':'))
+            for update in updates
+        ]
+        self._recorder.recorded += len(lines)
+        record.formatted_updates = '\n'.join(lines)
+        return record.formatted_updates
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler без форматирования в вызывающем потоке"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class UpdateRecorder:
+    """
+    Запись входящих обновлений в ротируемый JSONL для последующего воспроизведения
+
+    Строка файла: {"ts": время получения (unix), "update": обновление}. ID пользователей
+    и чатов заменяются стабильными псевдонимами (HMAC с солью), имена и телефоны -
+    заглушками, username удаляется. Текст сообщений маскируется (redact_text): кнопки
+    меню и команды, по которым выбираются обработчики, сохраняются.
+
+    Записываются исходные данные от Telegram (тело ответа getUpdates или запроса
+    вебхука): event loop только кладёт их в очередь, а разбор, обезличивание и запись
+    на диск выполняет отдельный поток. Update.to_dict() для этого слишком дорог.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int, salt: Optional[str] = None):
+        self._salt = (salt or secrets.token_hex(16)).encode('utf-8')
+        self._queue = queue.SimpleQueue()
+
+        file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        file_handler.setFormatter(_RecordFormatter(self))
+        self._listener = QueueListener(self._queue, file_handler)
+
+        # Отдельный логгер без распространения в общий лог бота
+        self._logger = logging.Logger(f"{__name__}.file")
+        self._logger.addHandler(_DeferredQueueHandler(self._queue))
+        self.recorded = 0
+
+    def start(self):
+        self._listener.start()
+
+    def stop(self):
+        """Дописать очередь на диск и остановить поток записи"""
+        self._listener.stop()
+
+    def submit(self, data):
+        """Поставить в очередь ответ getUpdates (bytes) или одно обновление (dict)"""
+        self._logger.info((time.time(), data))
+
+    def pseudonym(self, value: int) -> int:
+        """Стабильный псевдоним ID (знак сохраняется: у групп ID отрицательные)"""
+        digest = hmac.new(self._salt, str(abs(value)).encode('utf-8'), hashlib.sha256).digest()
+        alias = int.from_bytes(digest[:6], 'big') % 10 ** 12 + 1
+        return -alias if value < 0 else alias
+
+    def anonymize(self, data):
+        if isinstance(data, list):
+            return [self.anonymize(item) for item in data]
+        if not isinstance(data, dict):
+            return data
+
+        result = {}
+        for key, value in data.items():
+            if key in PERSONAL_FIELDS:
+                continue
+            if key in IDENTITY_KEYS and isinstance(value, dict):
+                value = self._anonymize_identity(value)
+            elif key in TEXT_FIELDS and isinstance(value, str):
+                value = redact_text(value)
+            result[key] = self.anonymize(value)
+        return result
+
+    def _anonymize_identity(self, identity: dict) -> dict:
+        identity = dict(identity)
+        for key in ('id', 'user_id'):
+            if isinstance(identity.get(key), int):
+                identity[key] = self.pseudonym(identity[key])
+        if 'first_name' in identity:
+            identity['first_name'] = f"User{abs(identity.get('id') or identity.get('user_id') or 0) % 100000}"
+        if 'phone_number' in identity:
+            # Регистрации нужен какой-то номер - подставляем фиктивный
+            identity['phone_number'] = '+70000000000'
+        return identity
+
+
+class RecordingRequest(HTTPXRequest):
+    """Запросы getUpdates: тело успешного ответа с обновлениями отдаётся в запись"""
+
+    async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None,
+                         *args, **kwargs) -> Tuple[int, bytes]:
+        code, payload = await super().do_request(url, method, request_data, *args, **kwargs)
+
+        if _recorder is not None and code == 200 and b'"update_id"' in payload:
+            _recorder.submit(payload)
+        return code, payload
+
+
+_recorder: Optional[UpdateRecorder] = None
+
+
+def record_update(data: dict):
+    """Записать обновление, принятое вебхуком (если запись включена)"""
+    if _recorder is not None:
+        _recorder.submit(data)
+
+
+def start_recording():
+    """Включить запись обновлений, если задан UPDATE_RECORD_PATH"""
+    global _recorder
+
+    if not UPDATE_RECORD_PATH or _recorder is not None:
+        return
+
+    _recorder = UpdateRecorder(UPDATE_RECORD_PATH, UPDATE_RECORD_MAX_BYTES, UPDATE_RECORD_BACKUPS, UPDATE_RECORD_SALT)
+    _recorder.start()
+    logger.info(f"Recording incoming updates to {UPDATE_RECORD_PATH}")
+
+
+def stop_recording():
+    """Дописать записанные обновления и остановить запись"""
+    global _recorder
+
+    if _recorder is not None:
+        recorder, _recorder = _recorder, None
+        recorder.stop()
+        logger.info(f"Recorded {recorder.recorded} updates")
@@ -0,0 +1,130 @@
+import asyncio
+import hmac
+import json
+import logging
+import signal
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+from config import (
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEBHOOK_LISTEN, WEBHOOK_PORT
+)
+from database.connection import db
+from utils.update_recorder import record_update
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+# Ключ приложения бота в aiohttp-приложении
+APPLICATION_KEY = 'application'
+
+
+async def handle_update(request: web.Request) -> web.Response:
+    """Принять обновление от Telegram и поставить его в очередь приложения"""
+    application: Application = request.app[APPLICATION_KEY]
+    
+    token = request.headers.get(SECRET_TOKEN_HEADER, '')
+    if not hmac.compare_digest(token, WEBHOOK_SECRET_TOKEN):
+        logger.warning(f"Rejected webhook request with invalid secret token from {request.remote}")
+        return web.Response(status=403)
+    
+    try:
+        data = await request.json()
+        update = Update.de_json(data, application.bot)
+    except (json.JSONDecodeError, TypeError, ValueError, KeyError) as e:
+        logger.warning(f"Rejected malformed webhook update: {e}")
+        return web.Response(status=400)
+    
+    record_update(data)
+    
+    # Обработка идёт в фоне, Telegram сразу получает ответ
+    await application.update_queue.put(update)
+    return web.Response()
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    """Liveness: процесс жив и HTTP-сервер отвечает"""
+    return web.json_response({'status': 'ok'})
+
+
+async def handle_ready(request: web.Request) -> web.Response:
+    """Readiness: приложение запущено и БД отвечает"""
+    application: Application = request.app[APPLICATION_KEY]
+    
+    checks = {
+        'application': application.running,
+        # Проверка ходит в каждое соединение - выполняем её в потоке БД, не в event loop
+        'database': await db.run(db.check_health)
+    }
+    status = 200 if all(checks.values()) else 503
+    
+    return web.json_response({'status': 'ok' if status == 200 else 'unavailable', 'checks': checks}, status=status)
+
+
+def create_web_app(application: Application) -> web.Application:
+    """HTTP-приложение с вебхуком и проверками состояния"""
+    web_app = web.Application()
+    web_app[APPLICATION_KEY] = application
+    
+    web_app.router.add_post(WEBHOOK_PATH, handle_update)
+    web_app.router.add_get('/healthz', handle_health)
+    web_app.router.add_get('/readyz', handle_ready)
+    
+    return web_app
+
+
+async def serve_webhook(application: Application, allowed_updates: list):
+    """
+    Запустить бота в режиме вебхука со встроенным HTTP-сервером
+    
+    Повторяет жизненный цикл Application.run_polling: initialize, post_init,
+    start, затем stop, shutdown и post_shutdown по сигналу остановки.
+    """
+    if not WEBHOOK_URL:
+        raise RuntimeError("WEBHOOK_URL is required in webhook mode")
+    
+    # Без секрета любой, кто знает адрес, может присылать боту поддельные обновления
+    if not WEBHOOK_SECRET_TOKEN:
+        raise RuntimeError("WEBHOOK_SECRET_TOKEN is required in webhook mode")
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: остановка только по KeyboardInterrupt
+            pass
+    
+    runner = web.AppRunner(create_web_app(application))
+    
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+        
+        await application.bot.set_webhook(
+            url=f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+            allowed_updates=allowed_updates,
+            secret_token=WEBHOOK_SECRET_TOKEN
+        )
+        await application.start()
+        
+        await runner.setup()
+        await web.TCPSite(runner, WEBHOOK_LISTEN, WEBHOOK_PORT).start()
+        logger.info(f"Webhook server listening on {WEBHOOK_LISTEN}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        
+        await stop_event.wait()
+    finally:
+        await runner.cleanup()
+        
+        if application.running:
+            await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        
+        await application.shutdown()
+        
+        if application.post_shutdown:
+            await application.post_shutdown(application)